@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ( Usuario,  TipoQuarto,  Quarto,  Reserva,  ServicoAdicional,  SolicitacaoServico,  Avaliacao)
+from .models import ( Usuario,  TipoQuarto,  Quarto,  Reserva,  ServicoAdicional,  SolicitacaoServico,  Avaliacao, TarifaSazonal, Tarefa)
 
 admin.site.register(Usuario)
 admin.site.register(TipoQuarto)
@@ -7,4 +7,6 @@ admin.site.register(Quarto)
 admin.site.register(Reserva)
 admin.site.register(ServicoAdicional)
 admin.site.register(SolicitacaoServico)
-admin.site.register(Avaliacao)
\ No newline at end of file
+admin.site.register(Avaliacao)
+admin.site.register(TarifaSazonal)
+admin.site.register(Tarefa)
@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .cache import cache_compartilhado
+from .models import Usuario
+
+CAMPOS_USUARIO = ['id', 'username', 'tipo', 'is_staff', 'is_superuser', 'is_active']
+
+
+def chave_cache(key):
+    return f'auth:token:{key}'
+
+
+def invalidar_tokens(*keys):
+    cache.delete_many([chave_cache(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication que guarda token -> dados básicos do usuário no cache por
+    AUTH_TOKEN_CACHE_TTL segundos, evitando o join Token + Usuario em cada request.
+
+    O usuário devolvido é uma instância de Usuario com só os campos de CAMPOS_USUARIO
+    carregados; os demais são buscados sob demanda e save() grava apenas os carregados.
+    As entradas são removidas pelos sinais de Token e Usuario em signals.py.
+
+    Só usa o cache se ele for compartilhado (REDIS_URL): com cache local um token apagado
+    continuaria valendo nos outros workers até expirar, então cai no TokenAuthentication.
+    """
+
+    def authenticate_credentials(self, key):
+        if not cache_compartilhado():
+            return super().authenticate_credentials(key)
+
+        dados = cache.get(chave_cache(key))
+
+        if dados is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+            dados = {campo: getattr(token.user, campo) for campo in CAMPOS_USUARIO}
+            cache.set(chave_cache(key), dados, getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 300))
+
+        # from_db espera os valores na ordem dos campos do modelo.
+        campos = [campo.attname for campo in Usuario._meta.concrete_fields if campo.attname in dados]
+        usuario = Usuario.from_db('default', campos, [dados[campo] for campo in campos])
+        if not usuario.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token = Token.from_db('default', ['key', 'user_id'], [key, usuario.id])
+        token.user = usuario
+        return (usuario, token)
@@ -0,0 +1,96 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import Avaliacao, AvaliacaoQuarto, Reserva
+
+NOTAS = range(1, 6)
+CAMPOS_CONTADORES = ['total', 'soma'] + [f'nota_{nota}' for nota in NOTAS]
+
+
+def quarto_da_reserva(reserva_id):
+    return Reserva.objects.filter(pk=reserva_id).values_list('quarto_id', flat=True).first()
+
+
+def ajustar_avaliacoes(variacoes):
+    """
+    Aplica ``variacoes`` (tuplas ``(quarto_id, nota, delta)``) aos contadores de AvaliacaoQuarto
+    com um UPDATE por quarto, na transação de quem gravou a avaliação.
+    """
+
+    contagem = Counter()
+    for quarto_id, nota, delta in variacoes:
+        if quarto_id and nota:
+            contagem[quarto_id, nota] += delta
+
+    contagem = {chave: delta for chave, delta in contagem.items() if delta}
+    if not contagem:
+        return
+
+    with transaction.atomic():
+        quarto_ids = sorted({quarto_id for quarto_id, _ in contagem})
+        AvaliacaoQuarto.objects.bulk_create(
+            [AvaliacaoQuarto(quarto_id=quarto_id) for quarto_id in quarto_ids], ignore_conflicts=True
+        )
+
+        # Em ordem de quarto, para duas transações não se travarem em ordem inversa.
+        for quarto_id in quarto_ids:
+            alteracoes = Counter()
+            for (quarto, nota), delta in contagem.items():
+                if quarto == quarto_id:
+                    alteracoes['total'] += delta
+                    alteracoes['soma'] += delta * nota
+                    alteracoes[f'nota_{nota}'] += delta
+
+            AvaliacaoQuarto.objects.filter(quarto_id=quarto_id).update(**{
+                campo: F(campo) + delta for campo, delta in alteracoes.items() if delta
+            })
+
+
+def recalcular_avaliacoes():
+    """Refaz todos os contadores a partir da tabela Avaliacao."""
+
+    linhas = Avaliacao.objects.values('reserva__quarto_id').annotate(
+        total=Count('id'),
+        soma=Sum('nota'),
+        **{f'nota_{nota}': Count('id', filter=Q(nota=nota)) for nota in NOTAS},
+    ).order_by()
+
+    with transaction.atomic():
+        resumos = [
+            AvaliacaoQuarto(quarto_id=linha.pop('reserva__quarto_id'), **linha)
+            for linha in linhas
+        ]
+        AvaliacaoQuarto.objects.exclude(quarto_id__in=[resumo.quarto_id for resumo in resumos]).delete()
+        AvaliacaoQuarto.objects.bulk_create(
+            resumos,
+            update_conflicts=True,
+            unique_fields=['quarto'],
+            update_fields=CAMPOS_CONTADORES,
+            batch_size=2000,
+        )
+
+    return len(resumos)
+
+
+def resumo_avaliacoes(agrupar, filtros):
+    """
+    Quantidade, média e histograma das notas por quarto ou por tipo de quarto, lidos só dos
+    contadores; o resumo de um tipo soma as linhas dos seus quartos.
+    """
+
+    campo = 'quarto_id' if agrupar == 'quarto' else 'quarto__tipo_quarto_id'
+    linhas = AvaliacaoQuarto.objects.filter(total__gt=0, **filtros).values(campo).annotate(
+        **{f'_{nome}': Sum(nome) for nome in CAMPOS_CONTADORES}
+    ).order_by(campo)
+
+    return [
+        {
+            agrupar: linha[campo],
+            'total': linha['_total'],
+            'media': round(linha['_soma'] / linha['_total'], 2),
+            'histograma': {str(nota): linha[f'_nota_{nota}'] for nota in NOTAS},
+        }
+        for linha in linhas
+    ]
@@ -0,0 +1,13 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def cache_compartilhado(alias='default'):
+    """
+    Se o cache é o mesmo para todos os workers. Com LocMem (ou Dummy) cada processo tem o
+    seu, e o que depende de invalidação entre processos (tokens, versões do catálogo) não
+    deve usá-lo.
+    """
+
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
@@ -0,0 +1,122 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from .cache import cache_compartilhado
+
+
+def chave_versao(modelo):
+    return f'catalogo:versao:{modelo._meta.label_lower}'
+
+
+def versoes(modelos):
+    """
+    Versão atual de cada modelo. Um contador que não está no cache (primeiro uso ou
+    despejado) começa no relógio em nanossegundos, para não repetir uma versão já usada.
+    """
+
+    chaves = [chave_versao(modelo) for modelo in modelos]
+    atuais = cache.get_many(chaves)
+    for chave in chaves:
+        if chave not in atuais:
+            cache.add(chave, time.time_ns())
+            atuais[chave] = cache.get(chave)
+    return [atuais[chave] for chave in chaves]
+
+
+def _incrementar(chave):
+    try:
+        cache.incr(chave)
+    except ValueError:
+        pass
+
+
+def invalidar_catalogo(modelo):
+    chave = chave_versao(modelo)
+    _incrementar(chave)
+    # De novo após o commit, para descartar uma resposta montada por outra request antes dele.
+    transaction.on_commit(lambda: _incrementar(chave))
+
+
+class CacheCatalogoMixin:
+    """
+    Cache de respostas para ``list``/``retrieve`` de dados que mudam pouco. A chave junta a
+    URL com os parâmetros, o formato negociado e as versões de ``modelos_cache``, que os
+    sinais incrementam a cada escrita; uma escrita invalida todas as respostas do modelo.
+
+    A chave vira o ETag: um ``If-None-Match`` igual responde 304 sem consultar nada, e um
+    acerto no cache devolve o JSON já renderizado, sem banco nem serializer. O cliente deve
+    revalidar depois de CATALOGO_CACHE_MAX_AGE segundos.
+
+    Com cache local de processo nada é guardado nem recebe ETag: a versão incrementada
+    por uma escrita num worker não chegaria aos outros, que serviriam o catálogo antigo.
+    """
+
+    modelos_cache = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.resposta_em_cache(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.resposta_em_cache(super().retrieve, request, *args, **kwargs)
+
+    def resposta_em_cache(self, acao, request, *args, **kwargs):
+        # O Browsable API depende do usuário e não é guardado.
+        if request.accepted_renderer.format != 'json' or not cache_compartilhado():
+            return acao(request, *args, **kwargs)
+
+        partes = [
+            type(self).__name__,
+            self.action,
+            request.build_absolute_uri(request.path),
+            urlencode(sorted(request.query_params.lists()), doseq=True),
+            request.accepted_media_type,
+            *versoes(self.modelos_cache),
+        ]
+        resumo = hashlib.sha1('|'.join(map(str, partes)).encode()).hexdigest()
+        self.cache_catalogo = (f'catalogo:resposta:{resumo}', f'"{resumo}"')
+
+        etags = parse_etags(request.headers.get('If-None-Match', ''))
+        if '*' in etags or self.cache_catalogo[1] in [etag.removeprefix('W/') for etag in etags]:
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+
+        guardada = cache.get(self.cache_catalogo[0])
+        if guardada is not None:
+            conteudo, content_type = guardada
+            return HttpResponse(conteudo, content_type=content_type)
+
+        return acao(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        cache_catalogo = getattr(self, 'cache_catalogo', None)
+        if cache_catalogo is None or response.status_code not in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            return response
+
+        chave, etag = cache_catalogo
+        if response.status_code == status.HTTP_200_OK and isinstance(response, Response):
+            response.render()
+            cache.set(chave, (response.content, response['Content-Type']), getattr(settings, 'CATALOGO_CACHE_TTL', 600))
+
+        publico = all(isinstance(permissao, AllowAny) for permissao in self.get_permissions())
+        response['ETag'] = etag
+        patch_cache_control(
+            response,
+            max_age=getattr(settings, 'CATALOGO_CACHE_MAX_AGE', 0),
+            must_revalidate=True,
+            **{'public' if publico else 'private': True},
+        )
+        if not publico:
+            patch_vary_headers(response, ['Authorization'])
+        return response
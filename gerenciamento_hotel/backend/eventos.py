@@ -0,0 +1,93 @@
+import asyncio
+import contextlib
+import json
+import threading
+from collections import deque
+
+from django.db import transaction
+
+
+class Broker:
+    """
+    Broker em memória para o quadro de quartos. Cada evento recebe um número de sequência
+    crescente e fica num histórico limitado; quem reconecta pede os eventos depois da última
+    sequência vista e, se ela já saiu do histórico, recebe ``resync`` e recarrega o snapshot.
+
+    Só enxerga as escritas do próprio processo: rode o servidor ASGI com um único worker
+    ou troque esta classe por um broker compartilhado.
+    """
+
+    def __init__(self, historico=2000):
+        self._lock = threading.Lock()
+        self._eventos = deque(maxlen=historico)
+        self._assinantes = set()
+        self.sequencia = 0
+
+    def publicar(self, tipo, dados):
+        with self._lock:
+            self.sequencia += 1
+            self._eventos.append((self.sequencia, tipo, dados))
+            assinantes = list(self._assinantes)
+
+        # Os sinais rodam em threads síncronas; acorda cada assinante no loop dele.
+        for loop, sinal in assinantes:
+            loop.call_soon_threadsafe(sinal.set)
+
+    def desde(self, sequencia):
+        with self._lock:
+            if sequencia == self.sequencia:
+                return []
+            if sequencia > self.sequencia:
+                # Sequência de uma execução anterior do servidor.
+                return None
+            if not self._eventos or self._eventos[0][0] > sequencia + 1:
+                return None
+            return [evento for evento in self._eventos if evento[0] > sequencia]
+
+    @contextlib.asynccontextmanager
+    async def assinatura(self):
+        assinante = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._assinantes.add(assinante)
+        try:
+            yield assinante[1]
+        finally:
+            with self._lock:
+                self._assinantes.discard(assinante)
+
+
+broker = Broker()
+
+
+def publicar_quarto(quarto_id, numero, status):
+    transaction.on_commit(lambda: broker.publicar('quarto', {'id': quarto_id, 'numero': numero, 'status': status}))
+
+
+def publicar_reserva(reserva_id, quarto_id, status):
+    transaction.on_commit(lambda: broker.publicar('reserva', {'id': reserva_id, 'quarto': quarto_id, 'status': status}))
+
+
+def formatar(sequencia, tipo, dados):
+    return f'id: {sequencia}\nevent: {tipo}\ndata: {json.dumps(dados)}\n\n'
+
+
+async def fluxo_eventos(desde, intervalo_ping=15):
+
+    async with broker.assinatura() as sinal:
+        while True:
+            sinal.clear()
+            eventos = broker.desde(desde)
+
+            if eventos is None:
+                desde = broker.sequencia
+                yield formatar(desde, 'resync', {'sequencia': desde})
+                continue
+
+            for sequencia, tipo, dados in eventos:
+                desde = sequencia
+                yield formatar(sequencia, tipo, dados)
+
+            try:
+                await asyncio.wait_for(sinal.wait(), intervalo_ping)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
@@ -0,0 +1,40 @@
+from django.db import IntegrityError
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.views import exception_handler as drf_exception_handler
+
+from .precos import RegistroSemPreco
+
+
+class ConflitoReserva(APIException):
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'O quarto já está reservado neste período.'
+    default_code = 'conflito_reserva'
+
+
+class ServicoSobrecarregado(APIException):
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Muitas consultas em andamento. Tente novamente em instantes.'
+    default_code = 'servico_sobrecarregado'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = wait
+
+
+def nome_constraint(exc):
+    diag = getattr(exc.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None)
+
+
+def exception_handler(exc, context):
+
+    if isinstance(exc, IntegrityError) and nome_constraint(exc) == 'reserva_sem_sobreposicao':
+        exc = ConflitoReserva()
+    elif isinstance(exc, RegistroSemPreco):
+        # Quarto, tipo ou serviço removido entre a validação do serializer e o cálculo do preço.
+        exc = ValidationError(str(exc))
+
+    return drf_exception_handler(exc, context)
@@ -0,0 +1,236 @@
+import csv
+from datetime import datetime, time
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import models
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.negotiation import BaseContentNegotiation
+
+from .filters import ReservaFilter
+from .models import Reserva, SolicitacaoServico
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+LOTE_PADRAO = 5000
+
+# Para cada exportação: modelo, colunas (cabeçalho, lookup), prefixo que leva os filtros de
+# ReservaFilter até a reserva e o campo usado pelo período data_inicio/data_fim.
+EXPORTACOES = {
+    'reservas': (
+        Reserva,
+        [
+            ('id', 'id'),
+            ('hospede', 'hospede__username'),
+            ('quarto', 'quarto__numero'),
+            ('tipo_quarto', 'quarto__tipo_quarto__nome'),
+            ('data_checkin', 'data_checkin'),
+            ('data_checkout', 'data_checkout'),
+            ('num_hospedes', 'num_hospedes'),
+            ('valor_total', 'valor_total'),
+            ('valor_reembolso', 'valor_reembolso'),
+            ('status', 'status'),
+            ('data_reserva', 'data_reserva'),
+        ],
+        '',
+        'data_checkin',
+    ),
+    'servicos': (
+        SolicitacaoServico,
+        [
+            ('id', 'id'),
+            ('reserva', 'reserva'),
+            ('hospede', 'reserva__hospede__username'),
+            ('quarto', 'reserva__quarto__numero'),
+            ('servico', 'servico__nome'),
+            ('quantidade', 'quantidade'),
+            ('valor_total', 'valor_total'),
+            ('status', 'status'),
+            ('data_solicitacao', 'data_solicitacao'),
+        ],
+        'reserva__',
+        'data_solicitacao',
+    ),
+}
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def queryset_exportacao(nome, parametros):
+    """
+    Linhas de uma exportação filtradas por ``parametros``: os mesmos filtros da lista de
+    reservas (ReservaFilter; nos serviços, aplicados à reserva de cada um) e o período
+    ``data_inicio``/``data_fim`` (AAAA-MM-DD, fim inclusivo). Levanta ValidationError.
+    """
+
+    modelo, colunas, prefixo, campo_periodo = EXPORTACOES[nome]
+
+    filtro = ReservaFilter(parametros, queryset=Reserva.objects.none())
+    if not filtro.is_valid():
+        raise ValidationError({campo: erros for campo, erros in filtro.errors.items()})
+    filtros = {
+        f'{prefixo}{campo}': valor for campo, valor in filtro.form.cleaned_data.items()
+        if valor not in (None, '')
+    }
+
+    for parametro, lookup in [('data_inicio', 'gte'), ('data_fim', 'lte')]:
+        if not parametros.get(parametro):
+            continue
+        try:
+            data = parse_date(parametros[parametro])
+        except ValueError:
+            data = None
+        if data is None:
+            raise ValidationError({parametro: ['Use o formato AAAA-MM-DD.']})
+        if isinstance(modelo._meta.get_field(campo_periodo), models.DateTimeField):
+            data = timezone.make_aware(datetime.combine(data, time.max if lookup == 'lte' else time.min))
+        filtros[f'{campo_periodo}__{lookup}'] = data
+
+    return modelo.objects.filter(**filtros).order_by('pk').values_list(*[lookup for _, lookup in colunas])
+
+
+class Eco:
+    # Destino do csv.writer que devolve a linha formatada em vez de gravá-la.
+    def write(self, valor):
+        return valor
+
+
+def partes_csv(nome, queryset, lote=LOTE_PADRAO):
+    colunas = EXPORTACOES[nome][1]
+    escritor = csv.writer(Eco())
+    yield escritor.writerow([cabecalho for cabecalho, _ in colunas])
+
+    bloco = []
+    for linha in queryset.iterator(chunk_size=lote):
+        bloco.append(escritor.writerow(linha))
+        if len(bloco) >= lote:
+            yield ''.join(bloco)
+            bloco = []
+    if bloco:
+        yield ''.join(bloco)
+
+
+def tipo_arrow(modelo, lookup):
+    campo = None
+    for parte in lookup.split('__'):
+        campo = modelo._meta.get_field(parte)
+        modelo = campo.related_model
+    if campo.is_relation:
+        campo = campo.target_field
+
+    if isinstance(campo, (models.AutoField, models.IntegerField)):
+        return pyarrow.int64()
+    if isinstance(campo, models.DecimalField):
+        return pyarrow.decimal128(campo.max_digits, campo.decimal_places)
+    if isinstance(campo, models.DateTimeField):
+        return pyarrow.timestamp('us', tz='UTC')
+    if isinstance(campo, models.DateField):
+        return pyarrow.date32()
+    return pyarrow.string()
+
+
+class Acumulador:
+    # Arquivo em memória esvaziado a cada row group escrito pelo ParquetWriter.
+    closed = False
+
+    def __init__(self):
+        self.partes = []
+        self.posicao = 0
+
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        self.posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self.posicao
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def esvaziar(self):
+        dados = b''.join(self.partes)
+        self.partes = []
+        return dados
+
+
+def partes_parquet(nome, queryset, lote=LOTE_PADRAO):
+    """Um row group por lote de linhas; só um lote fica em memória por vez."""
+
+    modelo, colunas = EXPORTACOES[nome][:2]
+    schema = pyarrow.schema([(cabecalho, tipo_arrow(modelo, lookup)) for cabecalho, lookup in colunas])
+    destino = Acumulador()
+
+    def escrever(escritor, linhas):
+        escritor.write_batch(pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(valores, type=campo.type) for valores, campo in zip(zip(*linhas), schema)],
+            schema=schema,
+        ))
+
+    with pyarrow.parquet.ParquetWriter(destino, schema) as escritor:
+        bloco = []
+        for linha in queryset.iterator(chunk_size=lote):
+            bloco.append(linha)
+            if len(bloco) >= lote:
+                escrever(escritor, bloco)
+                bloco = []
+                yield destino.esvaziar()
+        if bloco:
+            escrever(escritor, bloco)
+    yield destino.esvaziar()
+
+
+def partes_exportacao(nome, queryset, formato, lote=LOTE_PADRAO):
+    if formato == 'parquet':
+        if pyarrow is None:
+            raise ValidationError({'formato': ['A exportação em Parquet requer o pacote pyarrow.']})
+        return partes_parquet(nome, queryset, lote)
+    return partes_csv(nome, queryset, lote)
+
+
+async def em_fluxo_assincrono(partes):
+    # No ASGI um iterador síncrono seria lido inteiro antes do envio; aqui cada parte é
+    # gerada sob demanda, sempre na mesma thread (e conexão) do cursor.
+    proxima = sync_to_async(next, thread_sensitive=True)
+    fim = object()
+    while (parte := await proxima(partes, fim)) is not fim:
+        yield parte
+
+
+def resposta_exportacao(request, nome, parametros, formato, lote=LOTE_PADRAO):
+    if formato not in FORMATOS:
+        raise ValidationError({'formato': [f'Formatos aceitos: {", ".join(FORMATOS)}.']})
+
+    partes = partes_exportacao(nome, queryset_exportacao(nome, parametros), formato, lote)
+    if isinstance(request, ASGIRequest):
+        partes = em_fluxo_assincrono(partes)
+
+    content_type, extensao = FORMATOS[formato]
+    return StreamingHttpResponse(
+        partes,
+        content_type=content_type,
+        headers={'Content-Disposition': f'attachment; filename="{nome}.{extensao}"'},
+    )
+
+
+class SemNegociacao(BaseContentNegotiation):
+    # A exportação escolhe o formato por ?formato=; o Accept do cliente (text/csv) é ignorado.
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
@@ -0,0 +1,87 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.lookups import TrigramWordSimilar
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Q, Value
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Greatest, Upper
+from django_filters.rest_framework import FilterSet
+from rest_framework import filters
+
+from .models import Reserva
+
+
+class BuscaTrigramaFilter(filters.SearchFilter):
+    """
+    Substituto do SearchFilter que aproveita os índices GIN ``gin_trgm_ops`` (pg_trgm) dos
+    campos de busca. Usa os mesmos ``search_fields`` e o mesmo parâmetro ``?search=``.
+
+    Cada termo precisa casar com algum dos campos, por substring (``icontains``) ou, nos campos
+    sem prefixo, também por semelhança de palavra (``%>``, que tolera erros de digitação). As duas
+    comparações são feitas sobre ``UPPER(campo)``, a expressão dos índices trigram. Campos de outra tabela viram ``fk IN (SELECT id ...)``,
+    para que o OR entre tabelas não impeça o uso dos índices. Os resultados vêm ordenados pela
+    maior semelhança entre a busca e os campos.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        campos = self.get_search_fields(view, request)
+        termos = self.get_search_terms(request)
+        if not campos or not termos:
+            return queryset
+
+        modelo = queryset.model
+        for termo in termos:
+            queryset = queryset.filter(self.condicao(modelo, campos, termo))
+
+        busca = Value(' '.join(termos))
+        similaridades = [TrigramWordSimilarity(busca, self.separar_prefixo(campo)[1]) for campo in campos]
+        relevancia = similaridades[0] if len(similaridades) == 1 else Greatest(*similaridades)
+        ordenacao = list(queryset.query.order_by or modelo._meta.ordering)
+
+        return queryset.alias(relevancia_busca=relevancia).order_by('-relevancia_busca', *ordenacao, 'pk')
+
+    def separar_prefixo(self, campo):
+        if campo[0] in self.lookup_prefixes:
+            return campo[0], campo[1:]
+        return '', campo
+
+    def condicao(self, modelo, campos, termo):
+        condicoes = []
+        relacoes = defaultdict(list)
+
+        for campo in campos:
+            prefixo, nome = self.separar_prefixo(campo)
+            relacao, _, resto = nome.partition(LOOKUP_SEP)
+            campo_modelo = modelo._meta.get_field(relacao)
+
+            if resto and (campo_modelo.many_to_one or campo_modelo.one_to_one) and campo_modelo.concrete:
+                relacoes[relacao].append(prefixo + resto)
+            elif resto:
+                # Relação reversa ou muitos-para-muitos: subconsulta pela própria chave, sem duplicar linhas.
+                condicoes.append(Q(pk__in=modelo._default_manager.filter(self.condicao_campo(prefixo, nome, termo)).values('pk')))
+            else:
+                condicoes.append(self.condicao_campo(prefixo, nome, termo))
+
+        for relacao, subcampos in relacoes.items():
+            relacionado = modelo._meta.get_field(relacao).related_model
+            condicoes.append(Q(**{
+                f'{relacao}__in': relacionado._default_manager.filter(
+                    self.condicao(relacionado, subcampos, termo)
+                ).values('pk'),
+            }))
+
+        return reduce(or_, condicoes)
+
+    def condicao_campo(self, prefixo, nome, termo):
+        if prefixo:
+            return Q(**{f'{nome}__{self.lookup_prefixes[prefixo]}': termo})
+        return Q(**{f'{nome}__icontains': termo}) | Q(TrigramWordSimilar(Upper(nome), termo))
+
+
+class ReservaFilter(FilterSet):
+
+    class Meta:
+        model = Reserva
+        fields = ['hospede', 'status', 'quarto']
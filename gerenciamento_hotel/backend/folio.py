@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, Q, Sum, Value, When, Window
+from django.db.models import DecimalField
+
+from .cache import cache_compartilhado
+from .models import SolicitacaoServico
+
+
+def chave_cache(reserva_id):
+    return f'folio:{reserva_id}'
+
+
+def invalidar_folio(reserva_id):
+    cache.delete(chave_cache(reserva_id))
+
+
+def montar_folio(reserva):
+    """
+    Conta do hóspede: diárias da reserva (já carregada com hospede e quarto__tipo_quarto)
+    e as linhas de serviço com o total acumulado calculado no banco por uma window function.
+    Serviços cancelados aparecem na lista mas não somam.
+
+    Só usa o cache se ele for compartilhado (REDIS_URL): com cache local a invalidação de um
+    worker não chega aos outros, que mostrariam a conta antiga até expirar.
+    """
+
+    em_cache = cache_compartilhado()
+    if em_cache:
+        folio = cache.get(chave_cache(reserva.pk))
+        if folio is not None:
+            return folio
+
+    valor_cobrado = Case(
+        When(~Q(status='Cancelado'), then=F('valor_total')),
+        default=Value(0),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+    linhas = list(
+        SolicitacaoServico.objects.filter(reserva_id=reserva.pk).annotate(
+            servico_nome=F('servico__nome'),
+            acumulado=Window(Sum(valor_cobrado), order_by=[F('data_solicitacao').asc(), F('id').asc()]),
+        ).order_by('data_solicitacao', 'id').values(
+            'id', 'servico_nome', 'quantidade', 'status', 'data_solicitacao', 'valor_total', 'acumulado'
+        )
+    )
+
+    total_servicos = linhas[-1]['acumulado'] if linhas else 0
+    folio = {
+        'reserva': reserva.pk,
+        'hospede': reserva.hospede.username,
+        'quarto': reserva.quarto.numero,
+        'tipo_quarto': reserva.quarto.tipo_quarto.nome,
+        'status': reserva.status,
+        'data_checkin': reserva.data_checkin,
+        'data_checkout': reserva.data_checkout,
+        'noites': (reserva.data_checkout - reserva.data_checkin).days,
+        'valor_estadia': reserva.valor_total,
+        'servicos': linhas,
+        'total_servicos': total_servicos,
+        'total': reserva.valor_total + total_servicos,
+        'valor_reembolso': reserva.valor_reembolso,
+    }
+
+    if em_cache:
+        cache.set(chave_cache(reserva.pk), folio, getattr(settings, 'FOLIO_CACHE_TTL', 600))
+    return folio
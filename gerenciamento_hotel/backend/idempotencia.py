@@ -0,0 +1,103 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import ChaveIdempotencia
+
+TAMANHO_MAXIMO_CHAVE = 255
+
+
+def assinatura_requisicao(request):
+    # O corpo como chegou, sem passar pelo parser; se o stream já foi consumido, os dados parseados.
+    try:
+        corpo = request.body
+    except RawPostDataException:
+        corpo = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder).encode()
+    return hashlib.sha256(f'{request.method} {request.path}\n'.encode() + corpo).hexdigest()
+
+
+def buscar_chave(usuario, chave):
+    return ChaveIdempotencia.objects.filter(
+        usuario=usuario, chave=chave, expira_em__gt=timezone.now()
+    ).values('assinatura', 'status_code', 'resposta').first()
+
+
+def repetir(guardada, assinatura):
+    if guardada['assinatura'] != assinatura:
+        return Response(
+            {'error': 'Esta Idempotency-Key já foi usada em outra requisição.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return Response(guardada['resposta'], status=guardada['status_code'], headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotente(acao):
+    """
+    Suporte ao cabeçalho ``Idempotency-Key`` numa ação de viewset. A primeira requisição com
+    a chave roda normalmente e a resposta (menos erros 5xx e exceções) fica guardada por
+    usuário e chave durante IDEMPOTENCIA_TTL_HORAS; as repetições recebem essa resposta de
+    uma consulta pelo índice único, sem validar nem gravar de novo.
+
+    A chave é inserida antes da ação, na mesma transação: uma repetição simultânea espera
+    no índice único até a primeira terminar e então lê a resposta dela. Se ainda assim não
+    houver resposta guardada, a repetição recebe 409 para tentar de novo.
+    """
+
+    @wraps(acao)
+    def executar(self, request, *args, **kwargs):
+        chave = request.headers.get('Idempotency-Key')
+        if not chave or not request.user.is_authenticated:
+            return acao(self, request, *args, **kwargs)
+
+        if len(chave) > TAMANHO_MAXIMO_CHAVE:
+            return Response(
+                {'error': f'Idempotency-Key deve ter no máximo {TAMANHO_MAXIMO_CHAVE} caracteres.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        assinatura = assinatura_requisicao(request)
+        guardada = buscar_chave(request.user, chave)
+        if guardada is not None:
+            return repetir(guardada, assinatura)
+
+        agora = timezone.now()
+        with transaction.atomic():
+            # Uma chave vencida ainda ocupa o índice único até a limpeza periódica.
+            ChaveIdempotencia.objects.filter(usuario=request.user, chave=chave, expira_em__lte=agora).delete()
+            try:
+                with transaction.atomic():
+                    registro = ChaveIdempotencia.objects.create(
+                        usuario=request.user,
+                        chave=chave,
+                        assinatura=assinatura,
+                        expira_em=agora + timedelta(hours=getattr(settings, 'IDEMPOTENCIA_TTL_HORAS', 24)),
+                    )
+            except IntegrityError:
+                guardada = buscar_chave(request.user, chave)
+                if guardada is None:
+                    return Response(
+                        {'error': 'Uma requisição com esta Idempotency-Key está em andamento ou falhou; tente novamente.'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                return repetir(guardada, assinatura)
+
+            response = acao(self, request, *args, **kwargs)
+
+            if response.status_code >= 500 or not isinstance(response, Response):
+                registro.delete()
+            else:
+                registro.status_code = response.status_code
+                registro.resposta = response.data
+                registro.save(update_fields=['status_code', 'resposta'])
+            return response
+
+    return executar
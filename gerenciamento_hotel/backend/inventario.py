@@ -0,0 +1,234 @@
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max, Min
+
+from .models import InventarioTipoQuarto, Quarto, Reserva
+from .precos import precos
+from .relatorios import dias
+
+# Dias olhados antes e depois de uma estadia para medir as lacunas que ela deixa no quarto.
+JANELA_ENCAIXE = 30
+STATUS_REALOCAVEIS = ['Pendente', 'Confirmada']
+
+
+class SemDisponibilidade(Exception):
+    pass
+
+
+def estadia_ativa(quarto_id, data_checkin, data_checkout, status):
+    if quarto_id and data_checkin and data_checkout and status in Reserva.STATUS_ATIVOS:
+        return (precos.tipo_do_quarto(quarto_id), data_checkin, data_checkout)
+    return None
+
+
+def ajustar_inventario(variacoes):
+    """
+    Aplica ``variacoes`` (tuplas ``(tipo_quarto_id, data_checkin, data_checkout, delta)``) aos
+    contadores de InventarioTipoQuarto, na transação de quem alterou as reservas. As linhas são
+    travadas em ordem de (tipo, data), o que evita deadlock entre estadias sobrepostas.
+    """
+
+    contagem = Counter()
+    for tipo_quarto_id, data_checkin, data_checkout, delta in variacoes:
+        for noite in dias(data_checkin, data_checkout):
+            contagem[tipo_quarto_id, noite] += delta
+
+    contagem = {chave: delta for chave, delta in contagem.items() if delta}
+    if not contagem:
+        return
+
+    noites = [noite for _, noite in contagem]
+    with transaction.atomic():
+        InventarioTipoQuarto.objects.bulk_create(
+            [InventarioTipoQuarto(tipo_quarto_id=tipo_quarto_id, data=noite) for tipo_quarto_id, noite in contagem],
+            ignore_conflicts=True,
+        )
+        linhas = InventarioTipoQuarto.objects.filter(
+            tipo_quarto_id__in={tipo_quarto_id for tipo_quarto_id, _ in contagem},
+            data__gte=min(noites),
+            data__lte=max(noites),
+        ).order_by('tipo_quarto_id', 'data').select_for_update()
+
+        alteradas = []
+        for linha in linhas:
+            delta = contagem.get((linha.tipo_quarto_id, linha.data))
+            if delta:
+                linha.vendidos = max(linha.vendidos + delta, 0)
+                alteradas.append(linha)
+        InventarioTipoQuarto.objects.bulk_update(alteradas, ['vendidos'])
+
+
+def livres_por_noite(tipo_quarto_id, data_inicio, data_fim, capacidade=None):
+    """
+    Quartos livres do tipo em cada noite de [data_inicio, data_fim), lidos dos contadores. Quartos
+    em manutenção ficam fora da capacidade, mas os contadores incluem as reservas que eles ainda
+    têm; essas são devolvidas aqui para não descontar o mesmo quarto duas vezes.
+    """
+
+    if capacidade is None:
+        capacidade = Quarto.objects.filter(tipo_quarto_id=tipo_quarto_id).exclude(status='Manutencao').count()
+
+    livres = [capacidade] * (data_fim - data_inicio).days
+    for noite, vendidos in InventarioTipoQuarto.objects.filter(
+        tipo_quarto_id=tipo_quarto_id, data__gte=data_inicio, data__lt=data_fim
+    ).values_list('data', 'vendidos'):
+        livres[(noite - data_inicio).days] -= vendidos
+
+    em_manutencao = Reserva.objects.ativas().filter(
+        quarto__tipo_quarto_id=tipo_quarto_id, quarto__status='Manutencao'
+    ).no_periodo(data_inicio, data_fim).values_list('data_checkin', 'data_checkout')
+    for data_checkin, data_checkout in em_manutencao:
+        for noite in dias(max(data_checkin, data_inicio), min(data_checkout, data_fim)):
+            livres[(noite - data_inicio).days] += 1
+    return livres
+
+
+def escolher_quarto(quarto_ids, ocupacao, data_checkin, data_checkout, preferido=None):
+    """
+    Best fit: entre os quartos livres no período, o de menor soma das lacunas antes e depois
+    da estadia (limitadas a JANELA_ENCAIXE dias). Empates ficam com ``preferido`` e depois com o menor id.
+    """
+
+    melhor = None
+    for quarto_id in quarto_ids:
+        periodos = ocupacao.get(quarto_id, ())
+        if any(inicio < data_checkout and fim > data_checkin for inicio, fim in periodos):
+            continue
+
+        antes = max((fim for _, fim in periodos if fim <= data_checkin), default=None)
+        depois = min((inicio for inicio, _ in periodos if inicio >= data_checkout), default=None)
+        lacuna = (
+            min((data_checkin - antes).days, JANELA_ENCAIXE) if antes else JANELA_ENCAIXE
+        ) + (
+            min((depois - data_checkout).days, JANELA_ENCAIXE) if depois else JANELA_ENCAIXE
+        )
+
+        chave = (lacuna, quarto_id != preferido, quarto_id)
+        if melhor is None or chave < melhor[0]:
+            melhor = (chave, quarto_id)
+
+    return melhor[1] if melhor else None
+
+
+def realocar(quarto_ids, reservas, data_checkin, data_checkout):
+    """
+    Redistribui as reservas realocáveis que cruzam [data_checkin, data_checkout) junto com a
+    nova estadia. ``reservas`` são tuplas ``(id, quarto_id, checkin, checkout, status)``; as
+    demais ficam onde estão. Particionamento de intervalos guloso: em ordem de entrada, cada
+    estadia vai para o quarto de melhor encaixe, de preferência o atual.
+
+    Retorna ``(quarto da nova estadia, {reserva_id: novo quarto_id})`` ou ``None``.
+    """
+
+    ocupacao = defaultdict(list)
+    estadias = [(data_checkin, data_checkout, None, None)]
+    for reserva_id, quarto_id, inicio, fim, status in reservas:
+        if status in STATUS_REALOCAVEIS and inicio < data_checkout and fim > data_checkin:
+            estadias.append((inicio, fim, reserva_id, quarto_id))
+        else:
+            ocupacao[quarto_id].append((inicio, fim))
+
+    destinos = {}
+    for inicio, fim, reserva_id, atual in sorted(estadias, key=lambda estadia: estadia[:2]):
+        quarto_id = escolher_quarto(quarto_ids, ocupacao, inicio, fim, preferido=atual)
+        if quarto_id is None:
+            return None
+        ocupacao[quarto_id].append((inicio, fim))
+        if quarto_id != atual:
+            destinos[reserva_id] = quarto_id
+
+    return destinos.pop(None), destinos
+
+
+def mover_reservas(destinos):
+    # Adia a constraint de exclusão para permitir trocas entre quartos e a checa ao final.
+    with connection.cursor() as cursor:
+        cursor.execute('SET CONSTRAINTS reserva_sem_sobreposicao DEFERRED')
+
+    for reserva in Reserva.objects.filter(pk__in=destinos, status__in=STATUS_REALOCAVEIS).select_for_update():
+        reserva.quarto_id = destinos[reserva.pk]
+        reserva.save(update_fields=['quarto'])
+
+    with connection.cursor() as cursor:
+        cursor.execute('SET CONSTRAINTS reserva_sem_sobreposicao IMMEDIATE')
+
+
+def reservar_por_tipo(hospede, tipo_quarto, data_checkin, data_checkout, num_hospedes):
+    """
+    Vende uma estadia no nível do TipoQuarto: confere os contadores por noite, escolhe o quarto
+    livre de melhor encaixe e, se a disponibilidade estiver só fragmentada entre quartos,
+    realoca reservas ainda sem check-in do mesmo tipo para abrir espaço.
+
+    Alocações do mesmo tipo são serializadas pela trava dos quartos do tipo.
+    """
+
+    with transaction.atomic():
+        quarto_ids = list(
+            Quarto.objects.filter(tipo_quarto=tipo_quarto).exclude(status='Manutencao')
+            .order_by('id').select_for_update(no_key=True).values_list('id', flat=True)
+        )
+
+        livres = livres_por_noite(tipo_quarto.id, data_checkin, data_checkout, len(quarto_ids))
+        if not quarto_ids or min(livres) <= 0:
+            raise SemDisponibilidade('Não há quartos deste tipo disponíveis no período.')
+
+        # Período coberto pelas reservas que cruzam a estadia, que podem ser realocadas.
+        cruzam = Reserva.objects.ativas().filter(quarto_id__in=quarto_ids).no_periodo(
+            data_checkin, data_checkout
+        ).aggregate(inicio=Min('data_checkin'), fim=Max('data_checkout'))
+        inicio = min(filter(None, [cruzam['inicio'], data_checkin])) - timedelta(days=JANELA_ENCAIXE)
+        fim = max(filter(None, [cruzam['fim'], data_checkout])) + timedelta(days=JANELA_ENCAIXE)
+
+        reservas = list(
+            Reserva.objects.ativas().filter(quarto_id__in=quarto_ids).no_periodo(inicio, fim)
+            .values_list('id', 'quarto_id', 'data_checkin', 'data_checkout', 'status')
+        )
+
+        ocupacao = defaultdict(list)
+        for _, quarto_id, reserva_checkin, reserva_checkout, _ in reservas:
+            ocupacao[quarto_id].append((reserva_checkin, reserva_checkout))
+
+        quarto_id = escolher_quarto(quarto_ids, ocupacao, data_checkin, data_checkout)
+        if quarto_id is None:
+            realocacao = realocar(quarto_ids, reservas, data_checkin, data_checkout)
+            if realocacao is None:
+                raise SemDisponibilidade(
+                    'Há quartos livres em cada noite, mas não é possível acomodar a estadia sem mudar '
+                    'hóspedes já hospedados de quarto.'
+                )
+            quarto_id, destinos = realocacao
+            mover_reservas(destinos)
+
+        return Reserva.objects.create(
+            hospede=hospede,
+            quarto_id=quarto_id,
+            data_checkin=data_checkin,
+            data_checkout=data_checkout,
+            num_hospedes=num_hospedes,
+            status='Pendente',
+        )
+
+
+def recalcular_inventario(tipo_quarto_id, data_inicio, data_fim):
+    """Refaz os contadores de um tipo nas noites [data_inicio, data_fim) a partir das reservas ativas."""
+
+    contagem = Counter()
+    reservas = Reserva.objects.ativas().filter(quarto__tipo_quarto_id=tipo_quarto_id).no_periodo(
+        data_inicio, data_fim
+    ).values_list('data_checkin', 'data_checkout')
+
+    for data_checkin, data_checkout in reservas.iterator(chunk_size=2000):
+        for noite in dias(max(data_checkin, data_inicio), min(data_checkout, data_fim)):
+            contagem[noite] += 1
+
+    InventarioTipoQuarto.objects.bulk_create(
+        [
+            InventarioTipoQuarto(tipo_quarto_id=tipo_quarto_id, data=noite, vendidos=contagem[noite])
+            for noite in dias(data_inicio, data_fim)
+        ],
+        update_conflicts=True,
+        unique_fields=['tipo_quarto', 'data'],
+        update_fields=['vendidos'],
+    )
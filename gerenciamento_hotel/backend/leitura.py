@@ -0,0 +1,184 @@
+import decimal
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from .renderers import JSONRapidoRenderer
+
+
+class Leitor:
+    """
+    Versão compilada da parte de leitura de um serializer: as colunas de ``.values()``
+    que ele precisa e, para cada campo, uma função que monta o valor a partir da linha.
+
+    Os campos comuns reaproveitam ``to_representation`` do próprio campo, então datas,
+    decimais e choices saem iguais aos do serializer. Campos que não vêm de uma coluna
+    (``StringRelatedField``, métodos como ``get_status_display``) precisam de um extrator
+    em ``especiais``: ``{nome: (colunas, funcao(linha))}``.
+
+    Relações aninhadas são montadas uma vez por id em cada chamada de ``representar_linhas``;
+    as linhas que apontam para o mesmo quarto, tipo ou serviço compartilham o mesmo dict.
+    """
+
+    def __init__(self, serializer, especiais=None, prefixo=''):
+        especiais = especiais or {}
+        modelo = serializer.Meta.model
+        self.colunas = []
+        self.campos = []
+
+        for campo in serializer._readable_fields:
+            nome = campo.field_name
+
+            if nome in especiais:
+                colunas, funcao = especiais[nome]
+                self.colunas.extend(colunas)
+                self.campos.append((nome, lambda linha, memo, funcao=funcao: funcao(linha)))
+                continue
+
+            coluna = prefixo + '__'.join(campo.source_attrs)
+            campo_modelo = self.campo_do_modelo(modelo, campo)
+
+            if isinstance(campo, serializers.ModelSerializer):
+                aninhado = Leitor(campo, prefixo=coluna + '__')
+                self.colunas.append(coluna)
+                self.colunas.extend(aninhado.colunas)
+                self.campos.append((nome, self.relacao(coluna, aninhado.representar)))
+            elif isinstance(campo, PrimaryKeyRelatedField) and campo.pk_field is None:
+                self.colunas.append(coluna)
+                self.campos.append((nome, self.coluna(coluna)))
+            elif campo_modelo.is_relation or isinstance(campo, (serializers.BaseSerializer, ManyRelatedField)):
+                raise ImproperlyConfigured(
+                    f'{type(serializer).__name__}.{nome}: campo sem leitura direta; declare-o em especiais.'
+                )
+            else:
+                self.colunas.append(coluna)
+                self.campos.append((nome, self.convertido(coluna, self.conversor(campo))))
+
+        self.colunas = list(dict.fromkeys(self.colunas))
+
+    @staticmethod
+    def campo_do_modelo(modelo, campo):
+        campo_modelo = None
+        try:
+            for atributo in campo.source_attrs:
+                campo_modelo = modelo._meta.get_field(atributo)
+                modelo = campo_modelo.related_model
+        except (FieldDoesNotExist, AttributeError):
+            campo_modelo = None
+
+        if campo_modelo is None or campo_modelo.many_to_many or campo_modelo.one_to_many:
+            raise ImproperlyConfigured(
+                f'{campo.parent.__class__.__name__}.{campo.field_name}: a origem "{campo.source}" '
+                'não é uma coluna do modelo; declare-o em especiais.'
+            )
+        return campo_modelo
+
+    @staticmethod
+    def conversor(campo):
+        # Atalhos equivalentes ao to_representation do DRF para os tipos mais comuns,
+        # com a configuração do campo resolvida uma vez só.
+        tipo = type(campo)
+
+        if tipo is serializers.IntegerField:
+            return int
+        if tipo in (serializers.CharField, serializers.EmailField):
+            return str
+        if tipo is serializers.ChoiceField:
+            mapa = campo.choice_strings_to_values
+            return lambda valor: mapa.get(str(valor), valor)
+        if tipo is serializers.DateField and getattr(campo, 'format', api_settings.DATE_FORMAT) == ISO_8601:
+            return lambda valor: valor.isoformat()
+        if (
+            tipo is serializers.DecimalField and campo.decimal_places is not None
+            and not campo.localize and not campo.normalize_output
+            and getattr(campo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        ):
+            expoente = decimal.Decimal('.1') ** campo.decimal_places
+            contexto = decimal.getcontext().copy()
+            if campo.max_digits is not None:
+                contexto.prec = campo.max_digits
+            return lambda valor: f'{valor.quantize(expoente, rounding=campo.rounding, context=contexto):f}'
+
+        return campo.to_representation
+
+    @staticmethod
+    def coluna(coluna):
+        return lambda linha, memo: linha[coluna]
+
+    @staticmethod
+    def convertido(coluna, to_representation):
+        def extrair(linha, memo):
+            valor = linha[coluna]
+            return None if valor is None else to_representation(valor)
+        return extrair
+
+    @staticmethod
+    def relacao(coluna, representar):
+        # A coluna da FK indica se a relação é nula, como o serializer aninhado faria.
+        def extrair(linha, memo):
+            chave = (coluna, linha[coluna])
+            if chave[1] is None:
+                return None
+            if chave not in memo:
+                memo[chave] = representar(linha, memo)
+            return memo[chave]
+        return extrair
+
+    def representar(self, linha, memo):
+        return {nome: funcao(linha, memo) for nome, funcao in self.campos}
+
+    def representar_linhas(self, linhas):
+        memo = {}
+        return [self.representar(linha, memo) for linha in linhas]
+
+
+_leitores = {}
+
+
+def leitor_para(serializer_class, especiais=None):
+    leitor = _leitores.get(serializer_class)
+    if leitor is None:
+        leitor = _leitores[serializer_class] = Leitor(serializer_class(), especiais)
+    return leitor
+
+
+class LeituraRapidaMixin:
+    """
+    ``list()`` somente leitura que monta a resposta direto das linhas de ``.values()``, sem
+    instanciar modelos nem passar pelo serializer campo a campo. A saída é a mesma do
+    serializer da view. A view pode declarar ``especiais_leitura`` (ver ``Leitor``).
+
+    Opcional: só vale com ``LEITURA_RAPIDA = True`` nas settings, que também troca o
+    ``JSONRenderer`` destas views pelo ``JSONRapidoRenderer``.
+    """
+
+    especiais_leitura = None
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not getattr(settings, 'LEITURA_RAPIDA', False):
+            return renderers
+        return [JSONRapidoRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(settings, 'LEITURA_RAPIDA', False):
+            return super().list(request, *args, **kwargs)
+
+        leitor = leitor_para(self.get_serializer_class(), self.especiais_leitura)
+        colunas = leitor.colunas + [
+            campo.lstrip('-') for campo in getattr(self, 'ordenacao_keyset', ())
+            if campo.lstrip('-') not in leitor.colunas
+        ]
+        queryset = self.filter_queryset(self.get_queryset()).values(*colunas)
+
+        page = self.paginate_queryset(queryset)
+        data = leitor.representar_linhas(queryset if page is None else page)
+
+        response = Response(data) if page is None else self.get_paginated_response(data)
+        response.leitura_rapida = True
+        return response
@@ -0,0 +1,122 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+from .exceptions import ServicoSobrecarregado
+
+
+def prioritario(request, view):
+    # Tráfego da equipe (permissões em ``permissoes_prioritarias`` da view) nunca é limitado.
+    return any(
+        permissao().has_permission(request, view)
+        for permissao in getattr(view, 'permissoes_prioritarias', ())
+    )
+
+
+class LimiteConsultas(BaseThrottle):
+    """
+    Limite por usuário autenticado ou, sem login, por IP. Os limites vêm de LIMITES_CONSULTAS:
+    ``{'anonimo': (capacidade, requests por segundo), 'autenticado': (...)}``; cada cliente
+    tem ``capacidade`` requests por janela de ``capacidade / requests por segundo`` segundos,
+    o que dá a mesma taxa média e aceita rajadas do tamanho da capacidade.
+
+    O contador da janela é incrementado com ``cache.add`` + ``cache.incr``, atômicos no Redis,
+    então o limite vale para todos os workers juntos. Com o cache local de processo
+    (sem REDIS_URL) cada worker conta à parte e o limite efetivo é multiplicado por eles.
+    """
+
+    escopo = 'consultas'
+
+    def allow_request(self, request, view):
+        if prioritario(request, view):
+            return True
+
+        if request.user and request.user.is_authenticated:
+            classe, identidade = 'autenticado', f'usuario:{request.user.pk}'
+        else:
+            classe, identidade = 'anonimo', f'ip:{self.get_ident(request)}'
+        capacidade, por_segundo = settings.LIMITES_CONSULTAS[classe]
+
+        duracao = capacidade / por_segundo
+        agora = time.time()
+        janela = int(agora // duracao)
+        chave = f'limite:{self.escopo}:{identidade}:{janela}'
+
+        cache.add(chave, 0, math.ceil(duracao) + 1)
+        try:
+            usadas = cache.incr(chave)
+        except ValueError:
+            # Expirou entre o add e o incr.
+            cache.set(chave, 1, math.ceil(duracao) + 1)
+            usadas = 1
+
+        self.espera = None if usadas <= capacidade else (janela + 1) * duracao - agora
+        return usadas <= capacidade
+
+    def wait(self):
+        return self.espera
+
+
+class LimiteConcorrencia:
+    """
+    Conta as consultas pesadas em andamento neste processo. O orçamento de
+    CONSULTAS_PESADAS_SIMULTANEAS vale por worker: o total no banco é ele vezes o número
+    de workers. O tráfego prioritário entra sempre, mas ocupa vaga.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.em_andamento = 0
+
+    def entrar(self, prioritaria):
+        with self._lock:
+            if not prioritaria and self.em_andamento >= getattr(settings, 'CONSULTAS_PESADAS_SIMULTANEAS', 8):
+                return False
+            self.em_andamento += 1
+            return True
+
+    def sair(self):
+        with self._lock:
+            self.em_andamento -= 1
+
+
+consultas_pesadas = LimiteConcorrencia()
+
+
+class ConsultaPesadaMixin:
+    """
+    Para as ações em ``acoes_pesadas``: aplica LimiteConsultas (429 com Retry-After) e, depois
+    da autenticação, das permissões e dos limites, reserva uma vaga em ``consultas_pesadas``.
+    Sem vaga a request é descartada com 503 e Retry-After antes de chegar ao banco.
+    """
+
+    acoes_pesadas = ()
+    permissoes_prioritarias = ()
+
+    def get_throttles(self):
+        throttles = super().get_throttles()
+        if self.action in self.acoes_pesadas:
+            throttles.append(LimiteConsultas())
+        return throttles
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if self.action in self.acoes_pesadas:
+            if not consultas_pesadas.entrar(prioritario(request, self)):
+                raise ServicoSobrecarregado(getattr(settings, 'CONSULTAS_PESADAS_RETRY_AFTER', 2))
+            self.vaga_consulta = True
+
+    def dispatch(self, request, *args, **kwargs):
+        # Libera a vaga também quando a exceção não vira resposta (erro de banco, timeout),
+        # caso em que o dispatch do DRF propaga sem passar por finalize_response.
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if getattr(self, 'vaga_consulta', False):
+                self.vaga_consulta = False
+                consultas_pesadas.sair()
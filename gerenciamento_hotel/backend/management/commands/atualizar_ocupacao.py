@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from backend.models import Quarto
+from backend.relatorios import recalcular_grupo
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Recalcula a tabela OcupacaoDiaria a partir das reservas e serviços. Use para a carga '
+        'inicial e depois de mudar o tipo ou o andar de quartos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', help='AAAA-MM-DD (padrão: 365 dias atrás)')
+        parser.add_argument('--fim', help='AAAA-MM-DD, exclusivo (padrão: 365 dias à frente)')
+        parser.add_argument('--bloco', type=int, default=31, help='Dias recalculados por consulta.')
+
+    def handle(self, *args, **options):
+        hoje = timezone.now().date()
+        inicio = parse_date(options['inicio']) if options['inicio'] else hoje - timedelta(days=365)
+        fim = parse_date(options['fim']) if options['fim'] else hoje + timedelta(days=365)
+
+        if not inicio or not fim or fim <= inicio:
+            raise CommandError('Período inválido.')
+
+        grupos = Quarto.objects.order_by().values_list('tipo_quarto_id', 'andar').distinct()
+        for tipo_quarto_id, andar in grupos:
+            bloco_inicio = inicio
+            while bloco_inicio < fim:
+                bloco_fim = min(bloco_inicio + timedelta(days=options['bloco']), fim)
+                recalcular_grupo(tipo_quarto_id, andar, bloco_inicio, bloco_fim)
+                bloco_inicio = bloco_fim
+            self.stdout.write(f'Tipo {tipo_quarto_id}, andar {andar}: ok')
+
+        self.stdout.write(self.style.SUCCESS(f'Ocupação recalculada de {inicio} a {fim}.'))
@@ -0,0 +1,239 @@
+import json
+import statistics
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.models import (
+    Usuario, TipoQuarto, Quarto, Reserva, ServicoAdicional, SolicitacaoServico, Avaliacao
+)
+from backend.precos import precos
+from backend.urls import router
+
+BASELINE_PADRAO = Path(__file__).resolve().parents[2] / 'bench_baseline.json'
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Popula um banco local com dados sintéticos, chama todos os endpoints GET do router '
+        'da API e registra número de queries, latência p50/p99 e bytes de cada um. Falha se '
+        'algum número piorar em relação ao baseline gravado, ou se não houver baseline. Métricas '
+        'ausentes do baseline não são comparadas: o versionado guarda só o número de queries, que '
+        'não depende da máquina. Use apenas em um banco de testes.'
+    )
+
+    PREFIXO = 'benchapi'
+
+    # Ações que exigem parâmetros; as demais ações GET são chamadas sem query string.
+    PARAMETROS = {
+        'quarto-disponibilidade': lambda hoje: {
+            'data_inicio': hoje + timedelta(days=10), 'data_fim': hoje + timedelta(days=13),
+        },
+        'tipoquarto-disponibilidade': lambda hoje: {
+            'data_inicio': hoje + timedelta(days=10), 'data_fim': hoje + timedelta(days=13),
+        },
+        # Exportações medidas numa janela curta; a completa percorre a tabela inteira.
+        'reserva-exportar': lambda hoje: {'data_inicio': hoje, 'data_fim': hoje + timedelta(days=3)},
+        'solicitacaoservico-exportar': lambda hoje: {'data_inicio': hoje - timedelta(days=3), 'data_fim': hoje},
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quartos', type=int, default=2000)
+        parser.add_argument('--reservas', type=int, default=1_000_000)
+        parser.add_argument('--hospedes', type=int, default=5000)
+        parser.add_argument('--lote', type=int, default=10_000)
+        parser.add_argument('--repeticoes', type=int, default=20)
+        parser.add_argument('--baseline', default=str(BASELINE_PADRAO))
+        parser.add_argument('--gravar-baseline', action='store_true', help='Grava os resultados como novo baseline.')
+        parser.add_argument('--tolerancia-latencia', type=float, default=0.5, help='Aumento relativo aceito no p99.')
+        parser.add_argument('--tolerancia-bytes', type=float, default=0.1, help='Aumento relativo aceito no tamanho.')
+        parser.add_argument('--sem-popular', action='store_true', help='Usa os dados já existentes.')
+
+    def handle(self, *args, **options):
+        hoje = timezone.now().date()
+        if not options['sem_popular']:
+            self.popular(options, hoje)
+
+        gerente, _ = Usuario.objects.get_or_create(
+            username=f'{self.PREFIXO}-gerente', defaults={'tipo': 'Gerente'}
+        )
+        cliente = APIClient(HTTP_HOST='localhost')
+        cliente.force_authenticate(gerente)
+
+        resultados = {}
+        self.stdout.write(f"{'endpoint':<48} {'queries':>7} {'p50 ms':>8} {'p99 ms':>8} {'bytes':>9}")
+        for nome, url, parametros in self.endpoints(hoje):
+            resultado = self.medir(cliente, url, parametros, options['repeticoes'])
+            resultados[nome] = resultado
+            self.stdout.write(
+                f"{nome:<48} {resultado['queries']:>7} {resultado['p50_ms']:>8.2f} "
+                f"{resultado['p99_ms']:>8.2f} {resultado['bytes']:>9}"
+            )
+
+        caminho = Path(options['baseline'])
+        if options['gravar_baseline']:
+            caminho.write_text(json.dumps(resultados, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline gravado em {caminho}.'))
+            return
+
+        if not caminho.exists():
+            raise CommandError(f'Sem baseline em {caminho}; rode com --gravar-baseline.')
+
+        regressoes = self.comparar(json.loads(caminho.read_text()), resultados, options)
+        if regressoes:
+            raise CommandError('Regressões encontradas:\n' + '\n'.join(regressoes))
+        self.stdout.write(self.style.SUCCESS('Nenhuma regressão em relação ao baseline.'))
+
+    def endpoints(self, hoje):
+        for prefixo, viewset, basename in router.registry:
+            modelo = viewset.queryset.model
+            base = f'/api/{prefixo}/'
+            primeiro = modelo.objects.order_by('pk').values_list('pk', flat=True).first()
+
+            yield f'{basename}-list', base, {}
+            if getattr(viewset, 'ordenacao_keyset', None):
+                yield f'{basename}-list-keyset', base, {'paginacao': 'keyset'}
+            if primeiro is not None:
+                yield f'{basename}-detail', f'{base}{primeiro}/', {}
+
+            for acao in viewset.get_extra_actions():
+                if 'get' not in acao.mapping:
+                    continue
+                nome = f'{basename}-{acao.url_name}'
+                parametros = self.PARAMETROS.get(nome, lambda hoje: {})(hoje)
+                if acao.detail:
+                    if primeiro is not None:
+                        yield nome, f'{base}{primeiro}/{acao.url_path}/', parametros
+                else:
+                    yield nome, f'{base}{acao.url_path}/', parametros
+
+        yield 'relatorio-ocupacao', '/api/relatorios/ocupacao/', {
+            'data_inicio': hoje - timedelta(days=365), 'data_fim': hoje, 'agrupar': 'data,tipo_quarto',
+        }
+
+    def medir(self, cliente, url, parametros, repeticoes):
+        # Queries contadas com os caches vazios, como nos testes, para não depender da ordem das
+        # medições. execute_wrapper em vez de CaptureQueriesContext: o log é zerado a cada request.
+        cache.clear()
+        precos.invalidar()
+        queries = []
+        with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+            resposta = cliente.get(url, parametros)
+            conteudo = b''.join(resposta.streaming_content) if resposta.streaming else resposta.content
+        if resposta.status_code != 200:
+            raise CommandError(f'{url} respondeu {resposta.status_code}: {conteudo[:200]!r}')
+
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            resposta = cliente.get(url, parametros)
+            if resposta.streaming:
+                b''.join(resposta.streaming_content)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        tempos.sort()
+
+        return {
+            'queries': len(queries),
+            'p50_ms': round(statistics.median(tempos), 3),
+            'p99_ms': round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.99))], 3),
+            'bytes': len(conteudo),
+        }
+
+    def comparar(self, baseline, resultados, options):
+        regressoes = []
+        for nome, atual in resultados.items():
+            anterior = baseline.get(nome)
+            if anterior is None:
+                continue
+            if 'queries' in anterior and atual['queries'] > anterior['queries']:
+                regressoes.append(f"{nome}: queries {anterior['queries']} -> {atual['queries']}")
+            if 'p99_ms' in anterior and atual['p99_ms'] > anterior['p99_ms'] * (1 + options['tolerancia_latencia']):
+                regressoes.append(f"{nome}: p99 {anterior['p99_ms']:.2f} -> {atual['p99_ms']:.2f} ms")
+            if 'bytes' in anterior and atual['bytes'] > anterior['bytes'] * (1 + options['tolerancia_bytes']):
+                regressoes.append(f"{nome}: bytes {anterior['bytes']} -> {atual['bytes']}")
+        return regressoes
+
+    def popular(self, options, hoje):
+        tipos = [
+            TipoQuarto.objects.get_or_create(
+                nome=f'{self.PREFIXO}-{nome}', defaults={'preco_diaria': preco, 'capacidade': capacidade}
+            )[0]
+            for nome, preco, capacidade in [('standard', 150, 2), ('luxo', 300, 3), ('suite', 600, 4)]
+        ]
+        servicos = [
+            ServicoAdicional.objects.get_or_create(nome=f'{self.PREFIXO}-{nome}', defaults={'preco': preco})[0]
+            for nome, preco in [('cafe', 35), ('lavanderia', 50), ('spa', 180)]
+        ]
+
+        if Quarto.objects.filter(numero__startswith='A').filter(tipo_quarto__in=tipos).exists():
+            self.stdout.write('Dados sintéticos já existem; use --sem-popular para medir sem recriar.')
+            return
+
+        Quarto.objects.bulk_create([
+            Quarto(numero=f'A{n}', andar=n // 50 + 1, tipo_quarto=tipos[n % len(tipos)])
+            for n in range(options['quartos'])
+        ])
+        quartos = list(Quarto.objects.filter(tipo_quarto__in=tipos).order_by('id').values_list('id', 'tipo_quarto_id'))
+        precos_tipo = {tipo.id: tipo.preco_diaria for tipo in tipos}
+
+        Usuario.objects.bulk_create([
+            Usuario(username=f'{self.PREFIXO}-hospede-{n}', tipo='Hospede')
+            for n in range(options['hospedes'])
+        ], ignore_conflicts=True)
+        hospedes = list(Usuario.objects.filter(username__startswith=f'{self.PREFIXO}-hospede-').values_list('id', flat=True))
+
+        # Estadias de duas noites a cada três dias por quarto, do futuro para o passado;
+        # o status segue a data, como numa base real.
+        origem = hoje + timedelta(days=60)
+        total_quartos = len(quartos)
+        for lote_inicio in range(0, options['reservas'], options['lote']):
+            lote = []
+            for i in range(lote_inicio, min(lote_inicio + options['lote'], options['reservas'])):
+                quarto_id, tipo_id = quartos[i % total_quartos]
+                checkin = origem - timedelta(days=(i // total_quartos) * 3)
+                checkout = checkin + timedelta(days=2)
+                if checkout <= hoje:
+                    status = 'Checkout'
+                elif checkin <= hoje:
+                    status = 'Checkin'
+                else:
+                    status = 'Confirmada'
+                lote.append(Reserva(
+                    hospede_id=hospedes[i % len(hospedes)],
+                    quarto_id=quarto_id,
+                    data_checkin=checkin,
+                    data_checkout=checkout,
+                    num_hospedes=1,
+                    valor_total=2 * precos_tipo[tipo_id],
+                    status=status,
+                ))
+            criadas = Reserva.objects.bulk_create(lote)
+
+            SolicitacaoServico.objects.bulk_create([
+                SolicitacaoServico(
+                    reserva=reserva,
+                    servico=servicos[reserva.pk % len(servicos)],
+                    quantidade=1,
+                    status='Concluido',
+                    valor_total=servicos[reserva.pk % len(servicos)].preco,
+                )
+                for reserva in criadas[::4]
+            ])
+            Avaliacao.objects.bulk_create([
+                Avaliacao(reserva=reserva, hospede_id=reserva.hospede_id, nota=reserva.pk % 5 + 1)
+                for reserva in criadas[::10] if reserva.status == 'Checkout'
+            ])
+            self.stdout.write(f'  {lote_inicio + len(lote)} reservas inseridas', ending='\r')
+
+        self.stdout.write('')
+        call_command('atualizar_ocupacao', stdout=self.stdout)
+        call_command('recalcular_inventario', stdout=self.stdout)
+        call_command('recalcular_avaliacoes', stdout=self.stdout)
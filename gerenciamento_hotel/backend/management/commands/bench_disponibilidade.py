@@ -0,0 +1,105 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from backend.models import Usuario, TipoQuarto, Quarto, Reserva
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Popula o banco com reservas sintéticas em escalas crescentes e mede o tempo da '
+        'consulta de disponibilidade em cada escala. Use apenas em um banco local de testes.'
+    )
+
+    PREFIXO = 'bench'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escalas', nargs='+', type=int, default=[10_000, 100_000, 1_000_000, 10_000_000])
+        parser.add_argument('--quartos', type=int, default=1000)
+        parser.add_argument('--repeticoes', type=int, default=50)
+        parser.add_argument('--lote', type=int, default=10_000)
+        parser.add_argument('--explain', action='store_true', help='Mostra o plano da consulta em cada escala.')
+        parser.add_argument('--limpar', action='store_true', help='Remove os dados sintéticos ao final.')
+
+    def handle(self, *args, **options):
+        tipo, quartos, hospede = self.preparar(options['quartos'])
+        hoje = timezone.now().date()
+        inseridas = 0
+
+        self.stdout.write(f"{'reservas':>12} {'p50 (ms)':>10} {'p99 (ms)':>10} {'livres':>8}")
+        for escala in sorted(options['escalas']):
+            inseridas = self.popular(quartos, hospede, hoje, inseridas, escala, options['lote'])
+
+            tempos = []
+            livres = 0
+            for _ in range(options['repeticoes']):
+                inicio = hoje + timedelta(days=random.randint(0, 60))
+                fim = inicio + timedelta(days=random.randint(1, 7))
+                queryset = self.consulta(tipo, inicio, fim)
+
+                t0 = time.perf_counter()
+                livres = len(queryset)
+                tempos.append((time.perf_counter() - t0) * 1000)
+
+            tempos.sort()
+            p99 = tempos[min(len(tempos) - 1, int(len(tempos) * 0.99))]
+            self.stdout.write(f'{escala:>12} {statistics.median(tempos):>10.2f} {p99:>10.2f} {livres:>8}')
+
+            if options['explain']:
+                self.stdout.write(queryset.explain(analyze=True))
+
+        if options['limpar']:
+            Reserva.objects.filter(quarto__tipo_quarto=tipo).delete()
+            Quarto.objects.filter(tipo_quarto=tipo).delete()
+            tipo.delete()
+            hospede.delete()
+
+    def preparar(self, total_quartos):
+        tipo, _ = TipoQuarto.objects.get_or_create(
+            nome=f'{self.PREFIXO}-tipo', defaults={'preco_diaria': 100, 'capacidade': 2}
+        )
+        hospede, _ = Usuario.objects.get_or_create(username=f'{self.PREFIXO}-hospede', defaults={'tipo': 'Hospede'})
+
+        existentes = set(Quarto.objects.filter(tipo_quarto=tipo).values_list('numero', flat=True))
+        Quarto.objects.bulk_create([
+            Quarto(numero=f'B{n}', andar=n // 100, tipo_quarto=tipo)
+            for n in range(total_quartos) if f'B{n}' not in existentes
+        ])
+        quartos = list(Quarto.objects.filter(tipo_quarto=tipo).order_by('id').values_list('id', flat=True))
+        return tipo, quartos, hospede
+
+    def popular(self, quartos, hospede, hoje, inicio, escala, tamanho_lote):
+        # Estadias de duas noites a cada três dias por quarto, espalhadas para trás e para
+        # frente de hoje, todas ativas: é o pior caso para o índice parcial.
+        origem = hoje + timedelta(days=90)
+        total_quartos = len(quartos)
+
+        for lote_inicio in range(inicio, escala, tamanho_lote):
+            lote = []
+            for i in range(lote_inicio, min(lote_inicio + tamanho_lote, escala)):
+                checkin = origem - timedelta(days=(i // total_quartos) * 3)
+                lote.append(Reserva(
+                    hospede=hospede,
+                    quarto_id=quartos[i % total_quartos],
+                    data_checkin=checkin,
+                    data_checkout=checkin + timedelta(days=2),
+                    num_hospedes=1,
+                    valor_total=200,
+                    status='Confirmada',
+                ))
+            Reserva.objects.bulk_create(lote)
+            self.stdout.write(f'  {lote_inicio + len(lote)} reservas inseridas', ending='\r')
+
+        return max(inicio, escala)
+
+    def consulta(self, tipo, inicio, fim):
+        reservas_no_periodo = Reserva.objects.ativas().no_periodo(inicio, fim).filter(quarto=OuterRef('pk'))
+        return Quarto.objects.filter(
+            tipo_quarto=tipo, status__in=['Disponivel', 'Limpeza']
+        ).filter(~Exists(reservas_no_periodo)).values_list('id', flat=True)
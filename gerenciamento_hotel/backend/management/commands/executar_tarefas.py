@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.tarefas import ROTINAS, agendar, agendar_recorrentes, executar_vencidas, recuperar_travadas
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Executa as rotinas agendadas na fila de tarefas (tabela Tarefa): expiração de reservas '
+        'pendentes, não comparecimentos, liberação de quartos em limpeza e limpeza da própria fila. '
+        'Fica em laço consultando a fila; com --uma-vez executa o que estiver vencido e sai, '
+        'para uso via cron. Vários workers podem rodar ao mesmo tempo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uma-vez', action='store_true', help='Executa as tarefas vencidas e sai.')
+        parser.add_argument('--intervalo', type=float, default=30, help='Segundos entre consultas à fila.')
+        parser.add_argument('--agendar', choices=sorted(ROTINAS), help='Agenda uma execução imediata da rotina.')
+
+    def handle(self, *args, **options):
+        if options['intervalo'] <= 0:
+            raise CommandError('--intervalo deve ser positivo.')
+
+        if options['agendar']:
+            agendar(options['agendar'])
+
+        while True:
+            recuperadas = recuperar_travadas()
+            if recuperadas:
+                self.stdout.write(self.style.WARNING(f'{recuperadas} tarefas travadas voltaram para a fila.'))
+
+            agendar_recorrentes()
+            for tarefa in executar_vencidas():
+                estilo = self.style.SUCCESS if tarefa.status == 'Concluida' else self.style.ERROR
+                self.stdout.write(estilo(f'[{tarefa.status}] {tarefa.nome}: {tarefa.resultado.strip()}'))
+
+            if options['uma_vez']:
+                return
+            time.sleep(options['intervalo'])
@@ -0,0 +1,49 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.exportacao import EXPORTACOES, FORMATOS, LOTE_PADRAO, partes_exportacao, queryset_exportacao
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Exporta reservas ou solicitações de serviço em CSV ou Parquet, lendo por cursor no servidor '
+        'e gravando lote a lote, com memória constante. Aceita os mesmos filtros da lista de reservas '
+        'e um período (data_checkin nas reservas, data_solicitacao nos serviços).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('exportacao', choices=list(EXPORTACOES))
+        parser.add_argument('--formato', choices=list(FORMATOS), default='csv')
+        parser.add_argument('--saida', help='Arquivo de destino (padrão: saída padrão, só para CSV).')
+        parser.add_argument('--lote', type=int, default=LOTE_PADRAO, help='Linhas lidas por vez do cursor.')
+        parser.add_argument('--hospede')
+        parser.add_argument('--status')
+        parser.add_argument('--quarto')
+        parser.add_argument('--data-inicio', help='AAAA-MM-DD')
+        parser.add_argument('--data-fim', help='AAAA-MM-DD, inclusivo')
+
+    def handle(self, *args, **options):
+        if options['formato'] == 'parquet' and not options['saida']:
+            raise CommandError('Informe --saida para exportar em Parquet.')
+
+        parametros = {
+            campo: options[campo]
+            for campo in ['hospede', 'status', 'quarto', 'data_inicio', 'data_fim'] if options[campo]
+        }
+        try:
+            queryset = queryset_exportacao(options['exportacao'], parametros)
+            partes = partes_exportacao(options['exportacao'], queryset, options['formato'], options['lote'])
+        except ValidationError as erro:
+            raise CommandError(erro.message_dict)
+
+        if not options['saida']:
+            for parte in partes:
+                self.stdout.write(parte, ending='')
+            return
+
+        modo = 'wb' if options['formato'] == 'parquet' else 'w'
+        with open(options['saida'], modo, **({} if modo == 'wb' else {'encoding': 'utf-8', 'newline': ''})) as arquivo:
+            for parte in partes:
+                arquivo.write(parte)
+        self.stderr.write(self.style.SUCCESS(f"Exportação gravada em {options['saida']}."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from backend.avaliacoes import recalcular_avaliacoes
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Refaz a tabela AvaliacaoQuarto (quantidade, soma e histograma das notas por quarto) a '
+        'partir das avaliações. Use para a carga inicial ou se os contadores divergirem; rode fora '
+        'do horário de pico, pois avaliações gravadas durante o recálculo podem ficar de fora.'
+    )
+
+    def handle(self, *args, **options):
+        total = recalcular_avaliacoes()
+        self.stdout.write(self.style.SUCCESS(f'Resumo de avaliações recalculado para {total} quartos.'))
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from backend.inventario import recalcular_inventario
+from backend.models import TipoQuarto
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Refaz os contadores de InventarioTipoQuarto a partir das reservas ativas. Use para a carga '
+        'inicial e depois de mudar o tipo de quartos; rode fora do horário de pico, pois reservas '
+        'gravadas durante o recálculo de um bloco podem ficar de fora dele.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', help='AAAA-MM-DD (padrão: hoje)')
+        parser.add_argument('--fim', help='AAAA-MM-DD, exclusivo (padrão: 730 dias à frente)')
+        parser.add_argument('--bloco', type=int, default=31, help='Noites recalculadas por consulta.')
+
+    def handle(self, *args, **options):
+        hoje = timezone.now().date()
+        inicio = parse_date(options['inicio']) if options['inicio'] else hoje
+        fim = parse_date(options['fim']) if options['fim'] else hoje + timedelta(days=730)
+
+        if not inicio or not fim or fim <= inicio:
+            raise CommandError('Período inválido.')
+
+        for tipo_quarto_id in TipoQuarto.objects.values_list('id', flat=True):
+            bloco_inicio = inicio
+            while bloco_inicio < fim:
+                bloco_fim = min(bloco_inicio + timedelta(days=options['bloco']), fim)
+                recalcular_inventario(tipo_quarto_id, bloco_inicio, bloco_fim)
+                bloco_inicio = bloco_fim
+            self.stdout.write(f'Tipo {tipo_quarto_id}: ok')
+
+        self.stdout.write(self.style.SUCCESS(f'Inventário recalculado de {inicio} a {fim}.'))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:39
+
+import backend.models
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0001_initial'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=django.contrib.postgres.indexes.GistIndex(backend.models.DateRange('data_checkin', 'data_checkout'), models.F('quarto'), condition=models.Q(('status__in', ['Pendente', 'Confirmada', 'Checkin'])), name='reserva_periodo_ativo_gist'),
+        ),
+    ]
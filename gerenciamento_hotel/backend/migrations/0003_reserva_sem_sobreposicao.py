@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:40
+
+import backend.models
+import django.contrib.postgres.constraints
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0002_reserva_periodo_gist'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['Pendente', 'Confirmada', 'Checkin'])), expressions=[(backend.models.DateRange('data_checkin', 'data_checkout'), '&&'), ('quarto', '=')], name='reserva_sem_sobreposicao', violation_error_message='O quarto já está reservado neste período.'),
+        ),
+        migrations.RemoveIndex(
+            model_name='reserva',
+            name='reserva_periodo_ativo_gist',
+        ),
+    ]
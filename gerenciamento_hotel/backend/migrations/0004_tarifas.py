@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:42
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0003_reserva_sem_sobreposicao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tipoquarto',
+            name='multiplicador_fim_de_semana',
+            field=models.DecimalField(decimal_places=2, default=1, help_text='Multiplicador da diária nas noites de sexta e sábado', max_digits=4, validators=[django.core.validators.MinValueValidator(0.01)]),
+        ),
+        migrations.CreateModel(
+            name='TarifaSazonal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100)),
+                ('data_inicio', models.DateField(help_text='Primeira noite da temporada')),
+                ('data_fim', models.DateField(help_text='Última noite da temporada')),
+                ('multiplicador', models.DecimalField(decimal_places=2, help_text='Multiplicador aplicado à diária nas noites da temporada', max_digits=4, validators=[django.core.validators.MinValueValidator(0.01)])),
+                ('tipo_quarto', models.ForeignKey(blank=True, help_text='Deixe vazio para aplicar a todos os tipos', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tarifas_sazonais', to='backend.tipoquarto')),
+            ],
+            options={
+                'verbose_name': 'Tarifa Sazonal',
+                'verbose_name_plural': 'Tarifas Sazonais',
+                'ordering': ['data_inicio'],
+            },
+        ),
+    ]
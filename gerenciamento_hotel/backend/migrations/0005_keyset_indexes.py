@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0004_tarifas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='avaliacao',
+            index=models.Index(fields=['data_avaliacao', 'id'], name='avaliacao_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reserva',
+            index=models.Index(fields=['data_reserva', 'id'], name='reserva_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaoservico',
+            index=models.Index(fields=['data_solicitacao', 'id'], name='solicitacao_keyset_idx'),
+        ),
+    ]
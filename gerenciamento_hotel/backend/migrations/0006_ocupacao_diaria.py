@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0005_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcupacaoDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('andar', models.IntegerField()),
+                ('noites_ocupadas', models.IntegerField(default=0)),
+                ('receita_hospedagem', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('receita_servicos', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('tipo_quarto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ocupacao_diaria', to='backend.tipoquarto')),
+            ],
+            options={
+                'verbose_name': 'Ocupação Diária',
+                'verbose_name_plural': 'Ocupações Diárias',
+                'constraints': [models.UniqueConstraint(fields=('data', 'tipo_quarto', 'andar'), name='ocupacao_diaria_unica')],
+            },
+        ),
+    ]
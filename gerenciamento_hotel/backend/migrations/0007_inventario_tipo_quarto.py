@@ -0,0 +1,74 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:55
+
+from collections import Counter
+from datetime import date, timedelta
+
+import backend.models
+import django.contrib.postgres.constraints
+import django.db.models.constraints
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def popular_inventario(apps, schema_editor):
+    Reserva = apps.get_model('backend', 'Reserva')
+    InventarioTipoQuarto = apps.get_model('backend', 'InventarioTipoQuarto')
+
+    hoje = date.today()
+    contagem = Counter()
+    reservas = Reserva.objects.filter(
+        status__in=['Pendente', 'Confirmada', 'Checkin'], data_checkout__gt=hoje
+    ).values_list('quarto__tipo_quarto_id', 'data_checkin', 'data_checkout')
+
+    for tipo_quarto_id, data_checkin, data_checkout in reservas.iterator(chunk_size=2000):
+        inicio = max(data_checkin, hoje)
+        for n in range((data_checkout - inicio).days):
+            contagem[tipo_quarto_id, inicio + timedelta(days=n)] += 1
+
+    InventarioTipoQuarto.objects.bulk_create(
+        [
+            InventarioTipoQuarto(tipo_quarto_id=tipo_quarto_id, data=noite, vendidos=vendidos)
+            for (tipo_quarto_id, noite), vendidos in contagem.items()
+        ],
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0006_ocupacao_diaria'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventarioTipoQuarto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(help_text='Noite do contador')),
+                ('vendidos', models.PositiveIntegerField(default=0, help_text='Reservas ativas do tipo nesta noite')),
+            ],
+            options={
+                'verbose_name': 'Inventário por Tipo de Quarto',
+                'verbose_name_plural': 'Inventário por Tipo de Quarto',
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='reserva',
+            name='reserva_sem_sobreposicao',
+        ),
+        migrations.AddConstraint(
+            model_name='reserva',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['Pendente', 'Confirmada', 'Checkin'])), deferrable=django.db.models.constraints.Deferrable['IMMEDIATE'], expressions=[(backend.models.DateRange('data_checkin', 'data_checkout'), '&&'), ('quarto', '=')], name='reserva_sem_sobreposicao', violation_error_message='O quarto já está reservado neste período.'),
+        ),
+        migrations.AddField(
+            model_name='inventariotipoquarto',
+            name='tipo_quarto',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventario', to='backend.tipoquarto'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventariotipoquarto',
+            constraint=models.UniqueConstraint(fields=('tipo_quarto', 'data'), name='inventario_tipo_data_unico'),
+        ),
+        migrations.RunPython(popular_inventario, migrations.RunPython.noop),
+    ]
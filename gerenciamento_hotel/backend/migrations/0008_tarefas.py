@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_inventario_tipo_quarto'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reserva',
+            name='status',
+            field=models.CharField(choices=[('Pendente', 'Pendente'), ('Confirmada', 'Confirmada'), ('Checkin', 'Check-in Realizado'), ('Checkout', 'Checkout Realizado'), ('Cancelada', 'Cancelada'), ('NaoCompareceu', 'Não Compareceu')], default='Pendente', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='Tarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(help_text='Nome da rotina em tarefas.ROTINAS', max_length=50)),
+                ('agendada_para', models.DateTimeField(default=django.utils.timezone.now)),
+                ('status', models.CharField(choices=[('Pendente', 'Pendente'), ('Executando', 'Executando'), ('Concluida', 'Concluída'), ('Falhou', 'Falhou')], default='Pendente', max_length=20)),
+                ('tentativas', models.IntegerField(default=0)),
+                ('iniciada_em', models.DateTimeField(blank=True, null=True)),
+                ('concluida_em', models.DateTimeField(blank=True, null=True)),
+                ('resultado', models.TextField(blank=True, help_text='Resumo da execução ou traceback da falha')),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'indexes': [models.Index(fields=['status', 'agendada_para'], name='tarefa_fila_idx')],
+            },
+        ),
+    ]
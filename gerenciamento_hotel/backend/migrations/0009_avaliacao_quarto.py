@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def popular_resumos(apps, schema_editor):
+    Avaliacao = apps.get_model('backend', 'Avaliacao')
+    AvaliacaoQuarto = apps.get_model('backend', 'AvaliacaoQuarto')
+
+    linhas = Avaliacao.objects.values('reserva__quarto_id').annotate(
+        total=models.Count('id'),
+        soma=models.Sum('nota'),
+        **{f'nota_{nota}': models.Count('id', filter=models.Q(nota=nota)) for nota in range(1, 6)},
+    ).order_by()
+
+    AvaliacaoQuarto.objects.bulk_create(
+        [AvaliacaoQuarto(quarto_id=linha.pop('reserva__quarto_id'), **linha) for linha in linhas],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0008_tarefas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AvaliacaoQuarto',
+            fields=[
+                ('quarto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumo_avaliacoes', serialize=False, to='backend.quarto')),
+                ('total', models.IntegerField(default=0)),
+                ('soma', models.IntegerField(default=0)),
+                ('nota_1', models.IntegerField(default=0)),
+                ('nota_2', models.IntegerField(default=0)),
+                ('nota_3', models.IntegerField(default=0)),
+                ('nota_4', models.IntegerField(default=0)),
+                ('nota_5', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Resumo de Avaliações do Quarto',
+                'verbose_name_plural': 'Resumos de Avaliações dos Quartos',
+            },
+        ),
+        migrations.RunPython(popular_resumos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:02
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.db.models.functions.text
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('backend', '0009_avaliacao_quarto'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='quarto',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('numero'), name='gin_trgm_ops'), name='quarto_numero_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='tipoquarto',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('nome'), name='gin_trgm_ops'), name='tipo_quarto_nome_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('username'), name='gin_trgm_ops'), name='usuario_username_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('first_name'), name='gin_trgm_ops'), name='usuario_first_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('last_name'), name='gin_trgm_ops'), name='usuario_last_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='usuario_email_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('cpf'), name='gin_trgm_ops'), name='usuario_cpf_trgm'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:10
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0010_busca_trigram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChaveIdempotencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(help_text='Valor do cabeçalho Idempotency-Key', max_length=255)),
+                ('assinatura', models.CharField(help_text='SHA-256 do método, caminho e corpo da requisição', max_length=64)),
+                ('status_code', models.PositiveSmallIntegerField(null=True)),
+                ('resposta', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, null=True)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('expira_em', models.DateTimeField()),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chaves_idempotencia', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Chave de Idempotência',
+                'verbose_name_plural': 'Chaves de Idempotência',
+                'indexes': [models.Index(fields=['expira_em'], name='idempotencia_expira_idx')],
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'chave'), name='idempotencia_usuario_chave_unica')],
+            },
+        ),
+    ]
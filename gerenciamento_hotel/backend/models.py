@@ -1,11 +1,19 @@
 from django.db import models
+from django.db.models import Deferrable
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeOperators
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 import datetime
 
+from .precos import precos
+
 class Usuario(AbstractUser):
 
     TIPO_CHOICES = [
@@ -22,6 +30,12 @@ class Usuario(AbstractUser):
     class Meta:
         verbose_name = 'Usuário'
         verbose_name_plural = 'Usuários'
+        # Índices trigram (pg_trgm) sobre UPPER(campo), a expressão que o icontains gera;
+        # ver filters.BuscaTrigramaFilter.
+        indexes = [
+            GinIndex(OpClass(Upper(campo), name='gin_trgm_ops'), name=f'usuario_{campo}_trgm')
+            for campo in ['username', 'first_name', 'last_name', 'email', 'cpf']
+        ]
 
     def __str__(self):
         return f"{self.username} ({self.get_tipo_display()})"
@@ -33,10 +47,14 @@ class TipoQuarto(models.Model):
     descricao = models.TextField(blank=True)
     preco_diaria = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0.01)], help_text='Preço da diária para este tipo de quarto')
     capacidade = models.IntegerField(validators=[MinValueValidator(1)], help_text='Número máximo de hóspedes que o quarto suporta' )
+    multiplicador_fim_de_semana = models.DecimalField(max_digits=4, decimal_places=2, default=1, validators=[MinValueValidator(0.01)], help_text='Multiplicador da diária nas noites de sexta e sábado')
 
     class Meta:
         verbose_name = 'Tipo de Quarto'
         verbose_name_plural = 'Tipos de Quarto'
+        indexes = [
+            GinIndex(OpClass(Upper('nome'), name='gin_trgm_ops'), name='tipo_quarto_nome_trgm'),
+        ]
 
     def __str__(self):
         return f"{self.nome} (Cap: {self.capacidade} - R$ {self.preco_diaria})"
@@ -60,10 +78,58 @@ class Quarto(models.Model):
         verbose_name = 'Quarto'
         verbose_name_plural = 'Quartos'
         ordering = ['numero']
+        indexes = [
+            GinIndex(OpClass(Upper('numero'), name='gin_trgm_ops'), name='quarto_numero_trgm'),
+        ]
 
     def __str__(self):
         return f"Quarto {self.numero} ({self.tipo_quarto.nome}) - {self.get_status_display()}"
 
+
+class TarifaSazonal(models.Model):
+
+    nome = models.CharField(max_length=100)
+    data_inicio = models.DateField(help_text='Primeira noite da temporada')
+    data_fim = models.DateField(help_text='Última noite da temporada')
+    multiplicador = models.DecimalField(max_digits=4, decimal_places=2, validators=[MinValueValidator(0.01)], help_text='Multiplicador aplicado à diária nas noites da temporada')
+    tipo_quarto = models.ForeignKey(TipoQuarto, on_delete=models.CASCADE, null=True, blank=True, related_name='tarifas_sazonais', help_text='Deixe vazio para aplicar a todos os tipos')
+
+    class Meta:
+        verbose_name = 'Tarifa Sazonal'
+        verbose_name_plural = 'Tarifas Sazonais'
+        ordering = ['data_inicio']
+
+    def __str__(self):
+        return f"{self.nome} ({self.data_inicio} a {self.data_fim}) x{self.multiplicador}"
+
+    def clean(self):
+        if self.data_inicio and self.data_fim and self.data_fim < self.data_inicio:
+            raise ValidationError('A data final da temporada não pode ser anterior à inicial.')
+
+
+class DateRange(models.Func):
+
+    function = 'daterange'
+    output_field = DateRangeField()
+
+
+# Status em que a reserva ocupa o quarto. Fica fora da classe para que a constraint de
+# exclusão em Reserva.Meta use a mesma lista que ReservaQuerySet.ativas().
+STATUS_RESERVA_ATIVOS = ['Pendente', 'Confirmada', 'Checkin']
+
+
+class ReservaQuerySet(models.QuerySet):
+
+    def ativas(self):
+        return self.filter(status__in=Reserva.STATUS_ATIVOS)
+
+    def no_periodo(self, data_inicio, data_fim):
+        # Mesma expressão da constraint de exclusão, para que o planner use o índice GiST dela.
+        return self.alias(
+            periodo=DateRange('data_checkin', 'data_checkout')
+        ).filter(periodo__overlap=(data_inicio, data_fim))
+
+
 class Reserva(models.Model):
 
     STATUS_CHOICES = [
@@ -72,8 +138,11 @@ class Reserva(models.Model):
         ('Checkin', 'Check-in Realizado'),
         ('Checkout', 'Checkout Realizado'),
         ('Cancelada', 'Cancelada'),
+        ('NaoCompareceu', 'Não Compareceu'),
     ]
 
+    STATUS_ATIVOS = STATUS_RESERVA_ATIVOS
+
     hospede = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT,related_name='reservas', limit_choices_to={'tipo': 'Hospede'} )
     quarto = models.ForeignKey(Quarto, on_delete=models.PROTECT,related_name='reservas')
     data_checkin = models.DateField(help_text='Data de entrada')
@@ -84,13 +153,45 @@ class Reserva(models.Model):
     data_reserva = models.DateTimeField(auto_now_add=True)
     valor_reembolso = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text='Valor a ser reembolsado em caso de cancelamento' )
 
+    objects = ReservaQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Reserva'
         verbose_name_plural = 'Reservas'
+        constraints = [
+            ExclusionConstraint(
+                name='reserva_sem_sobreposicao',
+                expressions=[
+                    (DateRange('data_checkin', 'data_checkout'), RangeOperators.OVERLAPS),
+                    ('quarto', RangeOperators.EQUAL),
+                ],
+                condition=models.Q(status__in=STATUS_RESERVA_ATIVOS),
+                # Checada ao fim de cada comando, e não linha a linha, para que a realocação
+                # de quartos em inventario.py possa trocar reservas de quarto entre si.
+                deferrable=Deferrable.IMMEDIATE,
+                violation_error_message='O quarto já está reservado neste período.',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['data_reserva', 'id'], name='reserva_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"Reserva {self.id} - {self.hospede.username} - Quarto {self.quarto.numero}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estadia como estava no banco, para inventário e ocupação descontarem a versão antiga.
+        instance._periodo_original = (
+            instance.__dict__.get('quarto_id'),
+            instance.__dict__.get('data_checkin'),
+            instance.__dict__.get('data_checkout'),
+        )
+        instance._status_original = instance.__dict__.get('status')
+        instance._valor_original = instance.__dict__.get('valor_total')
+        return instance
+
     def clean(self):
 
         if self.data_checkin and self.data_checkin < timezone.now().date():
@@ -102,24 +203,12 @@ class Reserva(models.Model):
         if self.num_hospedes and self.quarto and self.num_hospedes > self.quarto.tipo_quarto.capacidade:
             raise ValidationError(f'O número de hóspedes ({self.num_hospedes}) excede a capacidade do quarto ({self.quarto.tipo_quarto.capacidade}).')
         
-        if self.quarto and self.data_checkin and self.data_checkout:
-            if self.quarto.status == 'Manutencao':
-                raise ValidationError('Não é possível reservar um quarto em manutenção.')
-            
-            reservas_conflitantes = Reserva.objects.filter(
-                quarto=self.quarto,
-                status__in=['Confirmada', 'Checkin', 'Pendente']
-            ).exclude(pk=self.pk).filter( data_checkin__lt=self.data_checkout, data_checkout__gt=self.data_checkin)
-        
-            if reservas_conflitantes.exists():
-                raise ValidationError(f'O Quarto {self.quarto.numero} já está reservado neste período.')
+        if self.quarto and self.quarto.status == 'Manutencao':
+            raise ValidationError('Não é possível reservar um quarto em manutenção.')
 
     def save(self, *args, **kwargs):
-        if self.data_checkin and self.data_checkout and self.quarto:
-            duracao = (self.data_checkout - self.data_checkin).days
-            if duracao <= 0:
-                duracao = 1
-            self.valor_total = duracao * self.quarto.tipo_quarto.preco_diaria
+        if self.data_checkin and self.data_checkout and self.quarto_id:
+            self.valor_total = precos.valor_estadia(self.quarto_id, self.data_checkin, self.data_checkout)
             
         super().clean()
         super().save(*args, **kwargs)
@@ -158,14 +247,28 @@ class SolicitacaoServico(models.Model):
     class Meta:
         verbose_name = 'Solicitação de Serviço'
         verbose_name_plural = 'Solicitações de Serviços'
+        indexes = [
+            models.Index(fields=['data_solicitacao', 'id'], name='solicitacao_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.quantidade}x {self.servico.nome} (Reserva {self.reserva.id})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Reserva, status e valor como estavam no banco, para a ocupação diária descontar a receita antiga.
+        instance._servico_original = (
+            instance.__dict__.get('reserva_id'),
+            instance.__dict__.get('status'),
+            instance.__dict__.get('valor_total'),
+        )
+        return instance
+
     def save(self, *args, **kwargs):
 
-        if self.servico and self.quantidade:
-            self.valor_total = self.servico.preco * self.quantidade
+        if self.servico_id and self.quantidade:
+            self.valor_total = precos.preco_servico(self.servico_id) * self.quantidade
         super().save(*args, **kwargs)
 
 
@@ -181,13 +284,131 @@ class Avaliacao(models.Model):
         verbose_name = 'Avaliação'
         verbose_name_plural = 'Avaliações'
         unique_together = ('reserva', 'hospede') 
+        indexes = [
+            models.Index(fields=['data_avaliacao', 'id'], name='avaliacao_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"Avaliação da Reserva {self.reserva.id} - Nota {self.nota}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Reserva e nota como estavam no banco, para descontar a nota antiga do resumo.
+        instance._nota_original = (instance.__dict__.get('reserva_id'), instance.__dict__.get('nota'))
+        return instance
     
     def clean(self):
         if self.reserva and self.reserva.status != 'Checkout':
             raise ValidationError('A avaliação só pode ser feita após o checkout da reserva.')
         
         if self.reserva and self.hospede != self.reserva.hospede:
-            raise ValidationError('A avaliação deve ser feita pelo hóspede da reserva.')
\ No newline at end of file
+            raise ValidationError('A avaliação deve ser feita pelo hóspede da reserva.')
+
+
+class OcupacaoDiaria(models.Model):
+
+    data = models.DateField()
+    tipo_quarto = models.ForeignKey(TipoQuarto, on_delete=models.CASCADE, related_name='ocupacao_diaria')
+    andar = models.IntegerField()
+    noites_ocupadas = models.IntegerField(default=0)
+    receita_hospedagem = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    receita_servicos = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Ocupação Diária'
+        verbose_name_plural = 'Ocupações Diárias'
+        constraints = [
+            models.UniqueConstraint(fields=['data', 'tipo_quarto', 'andar'], name='ocupacao_diaria_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.data} - Tipo {self.tipo_quarto_id} - Andar {self.andar}: {self.noites_ocupadas} noites"
+
+
+class InventarioTipoQuarto(models.Model):
+
+    tipo_quarto = models.ForeignKey(TipoQuarto, on_delete=models.CASCADE, related_name='inventario')
+    data = models.DateField(help_text='Noite do contador')
+    vendidos = models.PositiveIntegerField(default=0, help_text='Reservas ativas do tipo nesta noite')
+
+    class Meta:
+        verbose_name = 'Inventário por Tipo de Quarto'
+        verbose_name_plural = 'Inventário por Tipo de Quarto'
+        constraints = [
+            models.UniqueConstraint(fields=['tipo_quarto', 'data'], name='inventario_tipo_data_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.data} - Tipo {self.tipo_quarto_id}: {self.vendidos} vendidos"
+
+
+class AvaliacaoQuarto(models.Model):
+
+    quarto = models.OneToOneField(Quarto, on_delete=models.CASCADE, primary_key=True, related_name='resumo_avaliacoes')
+    total = models.IntegerField(default=0)
+    soma = models.IntegerField(default=0)
+    nota_1 = models.IntegerField(default=0)
+    nota_2 = models.IntegerField(default=0)
+    nota_3 = models.IntegerField(default=0)
+    nota_4 = models.IntegerField(default=0)
+    nota_5 = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Resumo de Avaliações do Quarto'
+        verbose_name_plural = 'Resumos de Avaliações dos Quartos'
+
+    def __str__(self):
+        return f"Quarto {self.quarto_id}: {self.total} avaliações"
+
+
+class Tarefa(models.Model):
+
+    STATUS_CHOICES = [
+        ('Pendente', 'Pendente'),
+        ('Executando', 'Executando'),
+        ('Concluida', 'Concluída'),
+        ('Falhou', 'Falhou'),
+    ]
+
+    nome = models.CharField(max_length=50, help_text='Nome da rotina em tarefas.ROTINAS')
+    agendada_para = models.DateTimeField(default=timezone.now)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pendente')
+    tentativas = models.IntegerField(default=0)
+    iniciada_em = models.DateTimeField(null=True, blank=True)
+    concluida_em = models.DateTimeField(null=True, blank=True)
+    resultado = models.TextField(blank=True, help_text='Resumo da execução ou traceback da falha')
+
+    class Meta:
+        verbose_name = 'Tarefa'
+        verbose_name_plural = 'Tarefas'
+        indexes = [
+            models.Index(fields=['status', 'agendada_para'], name='tarefa_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.nome} ({self.get_status_display()}) - {self.agendada_para}"
+
+
+class ChaveIdempotencia(models.Model):
+
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chaves_idempotencia')
+    chave = models.CharField(max_length=255, help_text='Valor do cabeçalho Idempotency-Key')
+    assinatura = models.CharField(max_length=64, help_text='SHA-256 do método, caminho e corpo da requisição')
+    status_code = models.PositiveSmallIntegerField(null=True)
+    resposta = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    criada_em = models.DateTimeField(auto_now_add=True)
+    expira_em = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Chave de Idempotência'
+        verbose_name_plural = 'Chaves de Idempotência'
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'chave'], name='idempotencia_usuario_chave_unica'),
+        ]
+        indexes = [
+            models.Index(fields=['expira_em'], name='idempotencia_expira_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id}: {self.chave} ({self.status_code})"
@@ -0,0 +1,120 @@
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Paginação por página (padrão do projeto) com um modo keyset opcional.
+
+    O modo keyset é ativado com ``?paginacao=keyset`` ou ao seguir um ``?cursor=``. A view
+    define ``ordenacao_keyset`` com campos que formem uma chave única, por exemplo
+    ``('-data_reserva', '-id')``; cada página filtra a partir da última chave vista em vez
+    de usar ``OFFSET`` e não executa ``COUNT(*)``, então o custo não cresce com a profundidade.
+    """
+
+    cursor_query_param = 'cursor'
+    modo_query_param = 'paginacao'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.modo_query_param) == 'keyset'
+        )
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordenacao = list(getattr(view, 'ordenacao_keyset', ('-id',)))
+        self.campos = [campo.lstrip('-') for campo in self.ordenacao]
+        self.modelo = queryset.model
+
+        valores, reverso = self.decodificar_cursor(request)
+        ordenacao = [self.inverter(campo) for campo in self.ordenacao] if reverso else self.ordenacao
+
+        queryset = queryset.order_by(*ordenacao)
+        if valores is not None:
+            queryset = queryset.filter(self.filtro_apos(valores, ordenacao))
+
+        resultados = list(queryset[:self.page_size + 1])
+        tem_mais = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+
+        if reverso:
+            resultados.reverse()
+            self.proximo = resultados[-1] if resultados else None
+            self.anterior = resultados[0] if tem_mais else None
+        else:
+            self.proximo = resultados[-1] if tem_mais else None
+            self.anterior = resultados[0] if valores is not None and resultados else None
+
+        return resultados
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response({
+            'next': self.link(self.proximo, reverso=False),
+            'previous': self.link(self.anterior, reverso=True),
+            'results': data,
+        })
+
+    @staticmethod
+    def inverter(campo):
+        return campo[1:] if campo.startswith('-') else f'-{campo}'
+
+    def filtro_apos(self, valores, ordenacao):
+        # (a, b) depois de (x, y)  =>  a > x  OR  (a = x AND b > y), respeitando a direção de cada campo.
+        condicoes = []
+        for i, campo in enumerate(ordenacao):
+            nome = campo.lstrip('-')
+            lookup = 'lt' if campo.startswith('-') else 'gt'
+            iguais = {self.campos[j]: valores[j] for j in range(i)}
+            condicoes.append(Q(**iguais, **{f'{nome}__{lookup}': valores[i]}))
+        return reduce(or_, condicoes)
+
+    def link(self, instancia, reverso):
+        if instancia is None:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.modo_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.codificar_cursor(instancia, reverso))
+
+    def codificar_cursor(self, instancia, reverso):
+        valores = []
+        for campo in self.campos:
+            # Aceita instâncias e as linhas de .values() do LeituraRapidaMixin.
+            if isinstance(instancia, dict):
+                valor = instancia[campo]
+            else:
+                valor = getattr(instancia, self.modelo._meta.get_field(campo).attname)
+            valores.append(valor.isoformat() if hasattr(valor, 'isoformat') else valor)
+
+        conteudo = json.dumps({'v': valores, 'r': reverso}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(conteudo.encode()).decode().rstrip('=')
+
+    def decodificar_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            conteudo = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            valores = [
+                self.modelo._meta.get_field(campo).to_python(valor)
+                for campo, valor in zip(self.campos, conteudo['v'], strict=True)
+            ]
+            return valores, bool(conteudo.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,126 @@
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+
+CENTAVOS = Decimal('0.01')
+NOITES_FIM_DE_SEMANA = (4, 5)  # sexta e sábado
+
+
+class RegistroSemPreco(LookupError):
+    pass
+
+
+class TabelaPrecos:
+    """
+    Cache em processo dos preços de TipoQuarto, ServicoAdicional e TarifaSazonal e do tipo
+    de cada Quarto. É recarregado inteiro (uma consulta por tabela) quando invalidado pelos
+    sinais em signals.py ou quando passa de PRECOS_CACHE_TTL segundos, o que limita o tempo
+    em que outros processos enxergam um preço antigo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dados = None
+        self._expira_em = 0.0
+        self._geracao = 0
+        # Chaves que nem a última recarga encontrou, para não recarregar tudo a cada consulta a elas.
+        self._ausentes = set()
+
+    def invalidar(self):
+        with self._lock:
+            self._geracao += 1
+            self._dados = None
+            self._ausentes = set()
+
+    def atualizar_quarto(self, quarto_id, tipo_quarto_id):
+        with self._lock:
+            dados = self._dados
+            if dados is not None:
+                if tipo_quarto_id is None:
+                    dados['quartos'].pop(quarto_id, None)
+                else:
+                    dados['quartos'][quarto_id] = tipo_quarto_id
+                    self._ausentes.discard(('quartos', quarto_id))
+
+    def _carregar(self):
+        TipoQuarto = apps.get_model('backend', 'TipoQuarto')
+        Quarto = apps.get_model('backend', 'Quarto')
+        ServicoAdicional = apps.get_model('backend', 'ServicoAdicional')
+        TarifaSazonal = apps.get_model('backend', 'TarifaSazonal')
+
+        return {
+            'tipos': {
+                tipo_id: (preco, multiplicador)
+                for tipo_id, preco, multiplicador in TipoQuarto.objects.values_list(
+                    'id', 'preco_diaria', 'multiplicador_fim_de_semana'
+                )
+            },
+            'quartos': dict(Quarto.objects.values_list('id', 'tipo_quarto_id')),
+            'servicos': dict(ServicoAdicional.objects.values_list('id', 'preco')),
+            'temporadas': list(TarifaSazonal.objects.values_list(
+                'data_inicio', 'data_fim', 'multiplicador', 'tipo_quarto_id'
+            )),
+        }
+
+    def _tabela(self, recarregar=False):
+        dados = self._dados
+        if dados is not None and not recarregar and time.monotonic() < self._expira_em:
+            return dados
+
+        geracao = self._geracao
+        dados = self._carregar()
+        with self._lock:
+            # Se alguém invalidou durante a carga, os dados podem estar velhos: usa, mas não guarda.
+            if geracao == self._geracao:
+                self._dados = dados
+                self._ausentes = set()
+                self._expira_em = time.monotonic() + getattr(settings, 'PRECOS_CACHE_TTL', 300)
+        return dados
+
+    def _buscar(self, tabela, chave):
+        valor = self._tabela()[tabela].get(chave)
+        if valor is None and (tabela, chave) not in self._ausentes:
+            # Registro criado por outro processo depois da última carga.
+            valor = self._tabela(recarregar=True)[tabela].get(chave)
+            if valor is None:
+                with self._lock:
+                    self._ausentes.add((tabela, chave))
+        if valor is None:
+            raise RegistroSemPreco(f'Registro {chave} não encontrado na tabela de preços ({tabela}).')
+        return valor
+
+    def tipo_do_quarto(self, quarto_id):
+        return self._buscar('quartos', quarto_id)
+
+    def preco_servico(self, servico_id):
+        return self._buscar('servicos', servico_id)
+
+    def valor_estadia(self, quarto_id, data_checkin, data_checkout):
+        tipo_id = self._buscar('quartos', quarto_id)
+        preco_diaria, multiplicador_fds = self._buscar('tipos', tipo_id)
+        noites = max((data_checkout - data_checkin).days, 1)
+        ultima_noite = data_checkin + timedelta(days=noites - 1)
+
+        temporadas = [
+            (inicio, fim, multiplicador)
+            for inicio, fim, multiplicador, tipo in self._tabela()['temporadas']
+            if (tipo is None or tipo == tipo_id) and inicio <= ultima_noite and fim >= data_checkin
+        ]
+
+        # Um único passe pelas noites somando o fator de cada uma; sem temporadas no
+        # período e sem multiplicador de fim de semana, o total é noites * preço.
+        fatores = 0
+        for n in range(noites):
+            dia = data_checkin + timedelta(days=n)
+            fator = multiplicador_fds if dia.weekday() in NOITES_FIM_DE_SEMANA else 1
+            fator *= max((m for inicio, fim, m in temporadas if inicio <= dia <= fim), default=1)
+            fatores += fator
+
+        return (preco_diaria * fatores).quantize(CENTAVOS)
+
+
+precos = TabelaPrecos()
@@ -0,0 +1,193 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import Quarto, Reserva, SolicitacaoServico, OcupacaoDiaria
+
+STATUS_OCUPACAO = ['Confirmada', 'Checkin', 'Checkout']
+CENTAVOS = Decimal('0.01')
+
+
+def dias(data_inicio, data_fim):
+    return [data_inicio + timedelta(days=n) for n in range((data_fim - data_inicio).days)]
+
+
+def receita_por_noite(valor_total, data_checkin, data_checkout):
+    # Divide o valor em centavos pelas noites; os centavos que sobram vão para as primeiras.
+    noites = dias(data_checkin, data_checkout)
+    if not noites:
+        return {}
+    centavos = int(Decimal(valor_total).quantize(CENTAVOS) / CENTAVOS)
+    diaria, resto = divmod(centavos, len(noites))
+    return {noite: (diaria + (n < resto)) * CENTAVOS for n, noite in enumerate(noites)}
+
+
+def recalcular_grupo(tipo_quarto_id, andar, data_inicio, data_fim):
+    """Recalcula as linhas de OcupacaoDiaria de um (tipo_quarto, andar) nos dias [data_inicio, data_fim)."""
+
+    linhas = {dia: [0, Decimal(0), Decimal(0)] for dia in dias(data_inicio, data_fim)}
+    if not linhas:
+        return
+
+    reservas = Reserva.objects.filter(
+        status__in=STATUS_OCUPACAO, quarto__tipo_quarto_id=tipo_quarto_id, quarto__andar=andar
+    ).no_periodo(data_inicio, data_fim).values_list('data_checkin', 'data_checkout', 'valor_total')
+
+    for checkin, checkout, valor_total in reservas.iterator(chunk_size=2000):
+        for dia, receita in receita_por_noite(valor_total, checkin, checkout).items():
+            if dia in linhas:
+                linhas[dia][0] += 1
+                linhas[dia][1] += receita
+
+    servicos = SolicitacaoServico.objects.exclude(status='Cancelado').filter(
+        reserva__quarto__tipo_quarto_id=tipo_quarto_id,
+        reserva__quarto__andar=andar,
+        data_solicitacao__date__gte=data_inicio,
+        data_solicitacao__date__lt=data_fim,
+    ).values_list('data_solicitacao__date').annotate(total=Sum('valor_total'))
+
+    for dia, total in servicos:
+        linhas[dia][2] += total
+
+    OcupacaoDiaria.objects.bulk_create(
+        [
+            OcupacaoDiaria(
+                data=dia,
+                tipo_quarto_id=tipo_quarto_id,
+                andar=andar,
+                noites_ocupadas=noites,
+                receita_hospedagem=receita,
+                receita_servicos=servicos_dia,
+            )
+            for dia, (noites, receita, servicos_dia) in linhas.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['data', 'tipo_quarto', 'andar'],
+        update_fields=['noites_ocupadas', 'receita_hospedagem', 'receita_servicos'],
+    )
+
+
+def variacoes_estadia(quarto_id, status, data_checkin, data_checkout, valor_total, sinal):
+    # {(quarto_id, dia): [noites, receita de hospedagem, receita de serviços]} de uma estadia.
+    if not (quarto_id and data_checkin and data_checkout) or status not in STATUS_OCUPACAO:
+        return {}
+    return {
+        (quarto_id, dia): [sinal, sinal * receita, 0]
+        for dia, receita in receita_por_noite(valor_total, data_checkin, data_checkout).items()
+    }
+
+
+def variacoes_servico(quarto_id, status, data_solicitacao, valor_total, sinal):
+    if not (quarto_id and data_solicitacao and valor_total) or status == 'Cancelado':
+        return {}
+    return {(quarto_id, timezone.localdate(data_solicitacao)): [0, 0, sinal * valor_total]}
+
+
+def ajustar_ocupacao(*variacoes):
+    """
+    Soma às linhas de OcupacaoDiaria as ``variacoes`` (dicts de variacoes_estadia e
+    variacoes_servico), na transação de quem alterou a reserva ou o serviço, sem recalcular
+    o grupo inteiro. Como em ajustar_inventario, as linhas são travadas sempre na mesma ordem.
+    """
+
+    total = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+    for variacao in variacoes:
+        for chave, valores in variacao.items():
+            for n, valor in enumerate(valores):
+                total[chave][n] += valor
+    total = {chave: valores for chave, valores in total.items() if any(valores)}
+    if not total:
+        return
+
+    grupos = {
+        quarto_id: (tipo_quarto_id, andar)
+        for quarto_id, tipo_quarto_id, andar in Quarto.objects.filter(
+            id__in={quarto_id for quarto_id, _ in total}
+        ).values_list('id', 'tipo_quarto_id', 'andar')
+    }
+    linhas = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+    for (quarto_id, dia), valores in total.items():
+        if quarto_id in grupos:
+            for n, valor in enumerate(valores):
+                linhas[(dia, *grupos[quarto_id])][n] += valor
+    if not linhas:
+        return
+
+    with transaction.atomic():
+        OcupacaoDiaria.objects.bulk_create(
+            [OcupacaoDiaria(data=dia, tipo_quarto_id=tipo_quarto_id, andar=andar) for dia, tipo_quarto_id, andar in linhas],
+            ignore_conflicts=True,
+        )
+        existentes = OcupacaoDiaria.objects.filter(
+            data__gte=min(dia for dia, _, _ in linhas),
+            data__lte=max(dia for dia, _, _ in linhas),
+            tipo_quarto_id__in={tipo_quarto_id for _, tipo_quarto_id, _ in linhas},
+            andar__in={andar for _, _, andar in linhas},
+        ).order_by('data', 'tipo_quarto_id', 'andar').select_for_update()
+
+        alteradas = []
+        for linha in existentes:
+            variacao = linhas.get((linha.data, linha.tipo_quarto_id, linha.andar))
+            if variacao:
+                linha.noites_ocupadas += variacao[0]
+                linha.receita_hospedagem += variacao[1]
+                linha.receita_servicos += variacao[2]
+                alteradas.append(linha)
+        OcupacaoDiaria.objects.bulk_update(alteradas, ['noites_ocupadas', 'receita_hospedagem', 'receita_servicos'])
+
+
+def variacoes_troca_de_quarto(reserva_id, quarto_original, quarto_atual):
+    # Serviços já lançados acompanham a reserva para o grupo do novo quarto.
+    variacoes = defaultdict(lambda: [0, 0, 0])
+    for dia, total in SolicitacaoServico.objects.filter(reserva_id=reserva_id).exclude(status='Cancelado').values_list(
+        'data_solicitacao__date'
+    ).annotate(total=Sum('valor_total')).order_by():
+        variacoes[(quarto_original, dia)][2] -= total
+        variacoes[(quarto_atual, dia)][2] += total
+    return variacoes
+
+
+def relatorio_ocupacao(data_inicio, data_fim, agrupar, filtros):
+    """
+    Lê OcupacaoDiaria agregada pelos campos de ``agrupar`` (subconjunto de data, tipo_quarto
+    e andar) e calcula taxa de ocupação, ADR e RevPAR. Quartos disponíveis vêm do inventário atual.
+    """
+
+    quartos = defaultdict(int)
+    for tipo_quarto_id, andar, total in Quarto.objects.filter(**filtros).values_list(
+        'tipo_quarto_id', 'andar'
+    ).annotate(total=Count('id')):
+        chave = tuple(
+            {'tipo_quarto': tipo_quarto_id, 'andar': andar}[campo]
+            for campo in agrupar if campo != 'data'
+        )
+        quartos[chave] += total
+
+    total_dias = 1 if 'data' in agrupar else len(dias(data_inicio, data_fim))
+
+    linhas = OcupacaoDiaria.objects.filter(
+        data__gte=data_inicio, data__lt=data_fim, **filtros
+    ).values(*agrupar).annotate(
+        noites_ocupadas=Sum('noites_ocupadas'),
+        receita_hospedagem=Sum('receita_hospedagem'),
+        receita_servicos=Sum('receita_servicos'),
+    ).order_by(*agrupar)
+
+    resultado = []
+    for linha in linhas:
+        chave = tuple(linha[campo] for campo in agrupar if campo != 'data')
+        disponiveis = quartos.get(chave, 0) * total_dias
+        noites = linha['noites_ocupadas']
+        receita = linha['receita_hospedagem']
+
+        linha['quartos_noite_disponiveis'] = disponiveis
+        linha['taxa_ocupacao'] = round(noites / disponiveis, 4) if disponiveis else None
+        linha['adr'] = (receita / noites).quantize(CENTAVOS) if noites else None
+        linha['revpar'] = (receita / disponiveis).quantize(CENTAVOS) if disponiveis else None
+        resultado.append(linha)
+
+    return resultado
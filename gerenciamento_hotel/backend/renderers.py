@@ -0,0 +1,34 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` que usa orjson (opcional) nas respostas marcadas com ``leitura_rapida``
+    pelo ``LeituraRapidaMixin``. Só é usado quando a saída é idêntica à do DRF: JSON compacto,
+    sem indentação e com unicode; nos demais casos, ou sem orjson instalado, cai no padrão.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        response = renderer_context.get('response')
+
+        if (
+            orjson is None or data is None
+            or not getattr(response, 'leitura_rapida', False)
+            or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Mesmo escape de \u2028 e \u2029 que o JSONRenderer aplica.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
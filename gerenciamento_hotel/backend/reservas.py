@@ -0,0 +1,96 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .inventario import ajustar_inventario
+from .models import Quarto, Reserva
+from .precos import precos
+
+
+def validar_item(item, quarto, hoje):
+
+    if quarto is None:
+        return f"Quarto {item['quarto']} não encontrado."
+
+    if item['data_checkin'] < hoje:
+        return 'A data de check-in não pode ser no passado.'
+
+    if item['data_checkout'] <= item['data_checkin']:
+        return 'A data de check-out deve ser posterior à data de check-in.'
+
+    if item['num_hospedes'] > quarto.tipo_quarto.capacidade:
+        return f"O número de hóspedes ({item['num_hospedes']}) excede a capacidade do quarto ({quarto.tipo_quarto.capacidade})."
+
+    if quarto.status == 'Manutencao':
+        return 'Não é possível reservar um quarto em manutenção.'
+
+    return None
+
+
+def criar_reservas_em_lote(hospede, itens):
+    """
+    Cria as reservas de ``itens`` (pares ``(indice, dados validados)``) com uma consulta
+    para os quartos e tipos, uma para os conflitos e um único ``bulk_create``. Os valores
+    vêm da tabela de preços em cache (precos.py).
+
+    Retorna ``(criadas, erros)``: lista de ``(indice, reserva)`` e dicionário ``indice -> mensagem``.
+    Se outra transação ocupar um dos quartos entre a checagem e o insert, a constraint
+    ``reserva_sem_sobreposicao`` aborta o lote inteiro.
+    """
+
+    hoje = timezone.now().date()
+    quartos = Quarto.objects.select_related('tipo_quarto').in_bulk({dados['quarto'] for _, dados in itens})
+    erros = {}
+    candidatas = []
+
+    for indice, dados in itens:
+        erro = validar_item(dados, quartos.get(dados['quarto']), hoje)
+        if erro:
+            erros[indice] = erro
+        else:
+            candidatas.append((indice, dados))
+
+    ocupacao = defaultdict(list)
+    if candidatas:
+        inicio = min(dados['data_checkin'] for _, dados in candidatas)
+        fim = max(dados['data_checkout'] for _, dados in candidatas)
+        existentes = Reserva.objects.ativas().no_periodo(inicio, fim).filter(
+            quarto_id__in={dados['quarto'] for _, dados in candidatas}
+        ).values_list('quarto_id', 'data_checkin', 'data_checkout')
+
+        for quarto_id, checkin, checkout in existentes:
+            ocupacao[quarto_id].append((checkin, checkout))
+
+    criadas = []
+    for indice, dados in candidatas:
+        quarto = quartos[dados['quarto']]
+        periodos = ocupacao[quarto.id]
+
+        if any(checkin < dados['data_checkout'] and checkout > dados['data_checkin'] for checkin, checkout in periodos):
+            erros[indice] = f'O Quarto {quarto.numero} já está reservado neste período.'
+            continue
+
+        # Itens do próprio lote também ocupam o quarto.
+        periodos.append((dados['data_checkin'], dados['data_checkout']))
+
+        criadas.append((indice, Reserva(
+            hospede=hospede,
+            quarto=quarto,
+            data_checkin=dados['data_checkin'],
+            data_checkout=dados['data_checkout'],
+            num_hospedes=dados['num_hospedes'],
+            valor_total=precos.valor_estadia(quarto.id, dados['data_checkin'], dados['data_checkout']),
+            status='Pendente',
+        )))
+
+    if criadas:
+        with transaction.atomic():
+            Reserva.objects.bulk_create([reserva for _, reserva in criadas])
+            # O bulk_create não dispara sinais; os contadores por tipo são atualizados aqui.
+            ajustar_inventario([
+                (reserva.quarto.tipo_quarto_id, reserva.data_checkin, reserva.data_checkout, 1)
+                for _, reserva in criadas
+            ])
+
+    return criadas, erros
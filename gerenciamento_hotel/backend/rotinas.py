@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .catalogo import invalidar_catalogo
+from .eventos import publicar_quarto, publicar_reserva
+from .folio import invalidar_folio
+from .inventario import ajustar_inventario
+from .models import ChaveIdempotencia, Quarto, Reserva, Tarefa
+from .precos import precos
+from .relatorios import ajustar_ocupacao, variacoes_estadia
+
+
+def atualizar_em_massa(queryset, valores, retorno):
+    """
+    Um único ``UPDATE ... WHERE id IN (<queryset>) RETURNING <retorno>``. As linhas são escolhidas
+    e travadas pelo queryset com SKIP LOCKED (as que estão presas numa ação HTTP ficam para a
+    próxima rodada) e só as colunas de ``retorno`` das linhas alteradas voltam para o Python.
+    """
+
+    opts = queryset.model._meta
+    nome = connection.ops.quote_name
+
+    subconsulta, parametros = queryset.select_for_update(skip_locked=True).order_by().values('pk').query.sql_with_params()
+    campos = [opts.get_field(campo) for campo in valores]
+    atribuicoes = ', '.join(f'{nome(campo.column)} = %s' for campo in campos)
+    colunas = ', '.join(nome(opts.get_field(campo).column) for campo in retorno)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {nome(opts.db_table)} SET {atribuicoes} '
+            f'WHERE {nome(opts.pk.column)} IN ({subconsulta}) RETURNING {colunas}',
+            [campo.get_db_prep_save(valor, connection) for campo, valor in zip(campos, valores.values())] + list(parametros),
+        )
+        return cursor.fetchall()
+
+
+def encerrar_reservas(queryset, status):
+    """
+    Passa as reservas ativas de ``queryset`` para ``status`` (inativo) com um UPDATE e aplica os
+    mesmos efeitos dos sinais de Reserva: contadores de inventário, ocupação diária, eventos do
+    quadro e cache do folio.
+    """
+
+    with transaction.atomic():
+        # Um UPDATE por status de origem, para saber o que cada reserva contava na ocupação.
+        linhas = []
+        for anterior in Reserva.STATUS_ATIVOS:
+            linhas += [
+                (anterior, *linha) for linha in atualizar_em_massa(
+                    queryset.filter(status=anterior),
+                    {'status': status},
+                    ['id', 'quarto', 'data_checkin', 'data_checkout', 'valor_total'],
+                )
+            ]
+        if not linhas:
+            return 0
+
+        ajustar_inventario([
+            (precos.tipo_do_quarto(quarto_id), data_checkin, data_checkout, -1)
+            for _, _, quarto_id, data_checkin, data_checkout, _ in linhas
+        ])
+        ajustar_ocupacao(*[
+            variacoes_estadia(quarto_id, anterior, data_checkin, data_checkout, valor_total, -1)
+            for anterior, _, quarto_id, data_checkin, data_checkout, valor_total in linhas
+        ])
+
+        for _, reserva_id, quarto_id, _, _, _ in linhas:
+            publicar_reserva(reserva_id, quarto_id, status)
+            invalidar_folio(reserva_id)
+            transaction.on_commit(lambda reserva_id=reserva_id: invalidar_folio(reserva_id))
+
+    return len(linhas)
+
+
+def expirar_reservas_pendentes():
+    agora = timezone.now()
+    prazo = agora - timedelta(hours=getattr(settings, 'RESERVA_PENDENTE_PRAZO_HORAS', 24))
+
+    total = encerrar_reservas(
+        Reserva.objects.filter(status='Pendente').filter(
+            Q(data_reserva__lt=prazo) | Q(data_checkin__lt=timezone.localdate(agora))
+        ),
+        'Cancelada',
+    )
+    return f'{total} reservas pendentes expiradas.'
+
+
+def marcar_nao_comparecimentos():
+    # Confirmadas cujo dia de check-in já passou sem check-in.
+    total = encerrar_reservas(
+        Reserva.objects.filter(status='Confirmada', data_checkin__lt=timezone.localdate()),
+        'NaoCompareceu',
+    )
+    return f'{total} reservas marcadas como não comparecimento.'
+
+
+def liberar_quartos_limpos():
+    # Quartos em limpeza desde um checkout de dia anterior e sem hóspede na casa.
+    hoje = timezone.localdate()
+    recentes = Reserva.objects.filter(quarto=OuterRef('pk')).filter(
+        Q(status='Checkin') | Q(status='Checkout', data_checkout__gte=hoje)
+    )
+
+    with transaction.atomic():
+        linhas = atualizar_em_massa(
+            Quarto.objects.filter(status='Limpeza').filter(~Exists(recentes)),
+            {'status': 'Disponivel'},
+            ['id', 'numero'],
+        )
+        if linhas:
+            invalidar_catalogo(Quarto)
+        for quarto_id, numero in linhas:
+            publicar_quarto(quarto_id, numero, 'Disponivel')
+
+    return f'{len(linhas)} quartos liberados da limpeza.'
+
+
+def limpar_tarefas_antigas():
+    total, _ = Tarefa.objects.filter(
+        status='Concluida', concluida_em__lt=timezone.now() - timedelta(days=7)
+    ).delete()
+    return f'{total} tarefas concluídas removidas.'
+
+
+def limpar_chaves_idempotencia():
+    total, _ = ChaveIdempotencia.objects.filter(expira_em__lte=timezone.now()).delete()
+    return f'{total} chaves de idempotência vencidas removidas.'
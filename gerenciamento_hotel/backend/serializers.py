@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from django.utils import timezone
-from .models import ( Usuario, TipoQuarto, Quarto, Reserva,  ServicoAdicional, SolicitacaoServico, Avaliacao)
+from .models import ( Usuario, TipoQuarto, Quarto, Reserva,  ServicoAdicional, SolicitacaoServico, Avaliacao, TarifaSazonal)
 from rest_framework.authtoken.models import Token
+from .transicoes import TRANSICOES
 
 class UsuarioRegistroSerializer(serializers.ModelSerializer):
 
@@ -26,12 +27,33 @@ class UsuarioRegistroSerializer(serializers.ModelSerializer):
         Token.objects.create(user=user)
         return user
 
+class HospedeSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Usuario
+        fields = ['id', 'username', 'first_name', 'last_name', 'email', 'cpf', 'telefone']
+
 class TipoQuartoSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TipoQuarto
         fields = '__all__' 
 
+class TarifaSazonalSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = TarifaSazonal
+        fields = '__all__'
+
+    def validate(self, data):
+        data_inicio = data.get('data_inicio', getattr(self.instance, 'data_inicio', None))
+        data_fim = data.get('data_fim', getattr(self.instance, 'data_fim', None))
+
+        if data_inicio and data_fim and data_fim < data_inicio:
+            raise serializers.ValidationError('A data final da temporada não pode ser anterior à inicial.')
+
+        return data
+
 class QuartoSerializer(serializers.ModelSerializer):
 
     tipo_quarto = TipoQuartoSerializer(read_only=True)
@@ -72,7 +94,7 @@ class ReservaSerializer(serializers.ModelSerializer):
         ]
         extra_kwargs = {
 
-            'quarto': {'write_only': True} 
+            'quarto': {'write_only': True, 'queryset': Quarto.objects.select_related('tipo_quarto')} 
         }
 
     def validate_data_checkin(self, value):
@@ -95,21 +117,53 @@ class ReservaSerializer(serializers.ModelSerializer):
                     f'O número de hóspedes ({num_hospedes}) excede a capacidade do quarto ({quarto.tipo_quarto.capacidade}).'
                 )
 
-        if quarto and data_checkin and data_checkout:
-            if quarto.status == 'Manutencao':
-
-                if self.instance is None or self.instance.quarto != quarto:
-                    raise serializers.ValidationError('Não é possível reservar um quarto em manutenção.')
-
-            reservas_conflitantes = Reserva.objects.filter(
-                quarto=quarto,
-                status__in=['Confirmada', 'Checkin', 'Pendente']).filter( data_checkin__lt=data_checkout,  data_checkout__gt=data_checkin )
-            
-            if self.instance:
-                reservas_conflitantes = reservas_conflitantes.exclude(pk=self.instance.pk)
-            
-            if reservas_conflitantes.exists():
-                raise serializers.ValidationError(f'O Quarto {quarto.numero} já está reservado neste período.')
+        # A sobreposição de períodos é garantida pela constraint de exclusão
+        # reserva_sem_sobreposicao no banco; o conflito vira HTTP 409 em exceptions.py.
+        if quarto and quarto.status == 'Manutencao':
+
+            if self.instance is None or self.instance.quarto != quarto:
+                raise serializers.ValidationError('Não é possível reservar um quarto em manutenção.')
+
+        return data
+
+class ReservaLoteItemSerializer(serializers.Serializer):
+
+    quarto = serializers.IntegerField()
+    data_checkin = serializers.DateField()
+    data_checkout = serializers.DateField()
+    num_hospedes = serializers.IntegerField(min_value=1)
+
+class TransicaoLoteSerializer(serializers.Serializer):
+
+    acao = serializers.ChoiceField(choices=list(TRANSICOES))
+    reservas = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_reservas(self, value):
+        lote_maximo = self.context['lote_maximo']
+        if len(value) > lote_maximo:
+            raise serializers.ValidationError(f'O lote pode ter no máximo {lote_maximo} reservas.')
+        return value
+
+class ReservaPorTipoSerializer(serializers.Serializer):
+
+    tipo_quarto = serializers.PrimaryKeyRelatedField(queryset=TipoQuarto.objects.all())
+    data_checkin = serializers.DateField()
+    data_checkout = serializers.DateField()
+    num_hospedes = serializers.IntegerField(min_value=1)
+
+    def validate_data_checkin(self, value):
+        if value < timezone.now().date():
+            raise serializers.ValidationError('A data de check-in não pode ser no passado.')
+        return value
+
+    def validate(self, data):
+        if data['data_checkout'] <= data['data_checkin']:
+            raise serializers.ValidationError('A data de check-out deve ser posterior à data de check-in.')
+
+        if data['num_hospedes'] > data['tipo_quarto'].capacidade:
+            raise serializers.ValidationError(
+                f"O número de hóspedes ({data['num_hospedes']}) excede a capacidade do quarto ({data['tipo_quarto'].capacidade})."
+            )
 
         return data
 
@@ -0,0 +1,162 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidar_tokens
+from .avaliacoes import ajustar_avaliacoes, quarto_da_reserva
+from .catalogo import invalidar_catalogo
+from .eventos import publicar_quarto, publicar_reserva
+from .folio import invalidar_folio
+from .inventario import ajustar_inventario, estadia_ativa
+from .models import Usuario, TipoQuarto, Quarto, ServicoAdicional, TarifaSazonal, Reserva, SolicitacaoServico, Avaliacao
+from .precos import precos
+from .relatorios import ajustar_ocupacao, variacoes_estadia, variacoes_servico, variacoes_troca_de_quarto
+
+
+@receiver([post_save, post_delete], sender=TipoQuarto)
+@receiver([post_save, post_delete], sender=ServicoAdicional)
+@receiver([post_save, post_delete], sender=TarifaSazonal)
+def invalidar_precos(sender, **kwargs):
+    precos.invalidar()
+    # De novo após o commit, para descartar uma carga feita por outra thread antes dele.
+    transaction.on_commit(precos.invalidar)
+
+
+@receiver([post_save, post_delete], sender=TipoQuarto)
+@receiver([post_save, post_delete], sender=ServicoAdicional)
+@receiver([post_save, post_delete], sender=Quarto)
+def invalidar_cache_catalogo(sender, **kwargs):
+    invalidar_catalogo(sender)
+
+
+@receiver(post_save, sender=Quarto)
+def atualizar_tipo_do_quarto(sender, instance, **kwargs):
+    precos.atualizar_quarto(instance.id, instance.tipo_quarto_id)
+
+
+@receiver(post_save, sender=Quarto)
+def publicar_status_quarto(sender, instance, **kwargs):
+    publicar_quarto(instance.id, instance.numero, instance.status)
+
+
+@receiver(post_save, sender=Reserva)
+def publicar_status_reserva(sender, instance, **kwargs):
+    publicar_reserva(instance.id, instance.quarto_id, instance.status)
+
+
+@receiver(post_delete, sender=Quarto)
+def remover_quarto(sender, instance, **kwargs):
+    precos.atualizar_quarto(instance.id, None)
+
+
+@receiver(post_save, sender=Reserva)
+def atualizar_agregados_reserva(sender, instance, **kwargs):
+    # Inventário e ocupação diária: desconta a estadia como estava no banco e soma a atual.
+    quarto_original, checkin_original, checkout_original = getattr(instance, '_periodo_original', (None, None, None))
+    status_original = getattr(instance, '_status_original', None)
+    valor_original = getattr(instance, '_valor_original', None)
+
+    anterior = estadia_ativa(quarto_original, checkin_original, checkout_original, status_original)
+    atual = estadia_ativa(instance.quarto_id, instance.data_checkin, instance.data_checkout, instance.status)
+    if anterior != atual:
+        ajustar_inventario(
+            ([(*anterior, -1)] if anterior else []) + ([(*atual, 1)] if atual else [])
+        )
+
+    original = (quarto_original, status_original, checkin_original, checkout_original, valor_original)
+    novo = (instance.quarto_id, instance.status, instance.data_checkin, instance.data_checkout, instance.valor_total)
+    if original != novo:
+        ajustar_ocupacao(
+            variacoes_estadia(*original, -1),
+            variacoes_estadia(*novo, 1),
+            variacoes_troca_de_quarto(instance.pk, quarto_original, instance.quarto_id)
+            if quarto_original and quarto_original != instance.quarto_id else {},
+        )
+
+    instance._periodo_original = (instance.quarto_id, instance.data_checkin, instance.data_checkout)
+    instance._status_original = instance.status
+    instance._valor_original = instance.valor_total
+
+
+@receiver(post_delete, sender=Reserva)
+def remover_agregados_reserva(sender, instance, **kwargs):
+    estadia = estadia_ativa(instance.quarto_id, instance.data_checkin, instance.data_checkout, instance.status)
+    if estadia:
+        ajustar_inventario([(*estadia, -1)])
+    # Os serviços da reserva saem da ocupação pelo próprio post_delete, na exclusão em cascata.
+    ajustar_ocupacao(variacoes_estadia(
+        instance.quarto_id, instance.status, instance.data_checkin, instance.data_checkout, instance.valor_total, -1
+    ))
+
+
+def quarto_da_solicitacao(solicitacao):
+    # Usa a reserva já carregada (serializer, select_related) em vez de buscá-la de novo.
+    if SolicitacaoServico.reserva.is_cached(solicitacao):
+        return solicitacao.reserva.quarto_id
+    return quarto_da_reserva(solicitacao.reserva_id)
+
+
+@receiver(post_save, sender=SolicitacaoServico)
+def atualizar_receita_servico(sender, instance, **kwargs):
+    original = getattr(instance, '_servico_original', None)
+    novo = (instance.reserva_id, instance.status, instance.valor_total)
+    if original != novo:
+        quarto_id = quarto_da_solicitacao(instance)
+        variacoes = [variacoes_servico(quarto_id, instance.status, instance.data_solicitacao, instance.valor_total, 1)]
+        if original:
+            reserva_original, status_original, valor_original = original
+            quarto_original = quarto_id if reserva_original == instance.reserva_id else quarto_da_reserva(reserva_original)
+            variacoes.append(variacoes_servico(quarto_original, status_original, instance.data_solicitacao, valor_original, -1))
+        ajustar_ocupacao(*variacoes)
+    instance._servico_original = novo
+
+
+@receiver(post_delete, sender=SolicitacaoServico)
+def remover_receita_servico(sender, instance, **kwargs):
+    reserva_id, status, valor_total = getattr(
+        instance, '_servico_original', (instance.reserva_id, instance.status, instance.valor_total)
+    )
+    quarto_id = quarto_da_solicitacao(instance) if reserva_id == instance.reserva_id else quarto_da_reserva(reserva_id)
+    ajustar_ocupacao(variacoes_servico(quarto_id, status, instance.data_solicitacao, valor_total, -1))
+
+
+@receiver([post_save, post_delete], sender=Token)
+def invalidar_token(sender, instance, **kwargs):
+    invalidar_tokens(instance.key)
+
+
+@receiver(post_save, sender=Usuario)
+def invalidar_tokens_do_usuario(sender, instance, created, **kwargs):
+    if not created:
+        invalidar_tokens(*Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Reserva)
+def invalidar_folio_reserva(sender, instance, **kwargs):
+    invalidar_folio(instance.pk)
+    transaction.on_commit(lambda: invalidar_folio(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=SolicitacaoServico)
+def invalidar_folio_servico(sender, instance, **kwargs):
+    invalidar_folio(instance.reserva_id)
+    transaction.on_commit(lambda: invalidar_folio(instance.reserva_id))
+
+
+@receiver(post_save, sender=Avaliacao)
+def atualizar_resumo_avaliacoes(sender, instance, created, **kwargs):
+    reserva_original, nota_original = getattr(instance, '_nota_original', (None, None))
+    if created or (reserva_original, nota_original) != (instance.reserva_id, instance.nota):
+        variacoes = [(instance.reserva.quarto_id, instance.nota, 1)]
+        if not created:
+            variacoes.append((quarto_da_reserva(reserva_original), nota_original, -1))
+        ajustar_avaliacoes(variacoes)
+    instance._nota_original = (instance.reserva_id, instance.nota)
+
+
+@receiver(post_delete, sender=Avaliacao)
+def remover_resumo_avaliacoes(sender, instance, **kwargs):
+    reserva_id, nota = getattr(instance, '_nota_original', (instance.reserva_id, instance.nota))
+    ajustar_avaliacoes([(quarto_da_reserva(reserva_id), nota, -1)])
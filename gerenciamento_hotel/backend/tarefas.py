@@ -0,0 +1,85 @@
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import rotinas
+from .models import Tarefa
+
+# Rotinas recorrentes: nome -> (função, intervalo entre execuções).
+ROTINAS = {
+    'expirar_reservas_pendentes': (rotinas.expirar_reservas_pendentes, timedelta(minutes=15)),
+    'marcar_nao_comparecimentos': (rotinas.marcar_nao_comparecimentos, timedelta(hours=1)),
+    'liberar_quartos_limpos': (rotinas.liberar_quartos_limpos, timedelta(minutes=30)),
+    'limpar_tarefas_antigas': (rotinas.limpar_tarefas_antigas, timedelta(days=1)),
+    'limpar_chaves_idempotencia': (rotinas.limpar_chaves_idempotencia, timedelta(hours=1)),
+}
+
+# Tarefas em execução há mais tempo que isso são de um worker que morreu e voltam para a fila.
+TEMPO_MAXIMO = timedelta(minutes=30)
+
+
+def agendar(nome, quando=None):
+    if nome not in ROTINAS:
+        raise ValueError(f'Rotina desconhecida: {nome}.')
+    return Tarefa.objects.create(nome=nome, agendada_para=quando or timezone.now())
+
+
+def agendar_recorrentes():
+    # Garante uma execução futura de cada rotina; a próxima é criada ao fim de cada execução.
+    agendadas = set(
+        Tarefa.objects.filter(status__in=['Pendente', 'Executando']).values_list('nome', flat=True)
+    )
+    Tarefa.objects.bulk_create([Tarefa(nome=nome) for nome in ROTINAS if nome not in agendadas])
+
+
+def recuperar_travadas():
+    return Tarefa.objects.filter(
+        status='Executando', iniciada_em__lt=timezone.now() - TEMPO_MAXIMO
+    ).update(status='Pendente')
+
+
+def reservar_proxima():
+    """Tira da fila a próxima tarefa vencida. SKIP LOCKED deixa vários workers consumirem a mesma fila."""
+
+    with transaction.atomic():
+        tarefa = Tarefa.objects.select_for_update(skip_locked=True).filter(
+            status='Pendente', agendada_para__lte=timezone.now()
+        ).order_by('agendada_para', 'id').first()
+
+        if tarefa is None:
+            return None
+
+        tarefa.status = 'Executando'
+        tarefa.iniciada_em = timezone.now()
+        tarefa.tentativas += 1
+        tarefa.save(update_fields=['status', 'iniciada_em', 'tentativas'])
+        return tarefa
+
+
+def executar(tarefa):
+    funcao, intervalo = ROTINAS[tarefa.nome]
+
+    try:
+        tarefa.resultado = funcao() or ''
+        tarefa.status = 'Concluida'
+    except Exception:
+        tarefa.resultado = traceback.format_exc()
+        tarefa.status = 'Falhou'
+
+    tarefa.concluida_em = timezone.now()
+    tarefa.save(update_fields=['status', 'resultado', 'concluida_em'])
+
+    # Agenda a próxima execução mesmo após uma falha, para a rotina não parar.
+    if not Tarefa.objects.filter(nome=tarefa.nome, status='Pendente').exists():
+        agendar(tarefa.nome, tarefa.concluida_em + intervalo)
+
+    return tarefa
+
+
+def executar_vencidas():
+    executadas = []
+    while (tarefa := reservar_proxima()) is not None:
+        executadas.append(executar(tarefa))
+    return executadas
@@ -1,3 +1,332 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import OperationalError
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import (
+    Usuario, TipoQuarto, Quarto, TarifaSazonal, Reserva, ServicoAdicional, SolicitacaoServico, Avaliacao
+)
+from .limites import consultas_pesadas
+from .precos import precos
+from .views import QuartoViewSet
+
+
+class ConsultasApiTestCase(APITestCase):
+    """
+    Número de queries de cada endpoint do router. As listas têm várias linhas nos dados
+    para que uma query por linha (N+1) apareça na contagem. Cada teste parte com o cache
+    e a tabela de preços vazios, então a contagem inclui a carga dos preços quando a view
+    precisa deles.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.hoje = timezone.now().date()
+        cls.gerente = Usuario.objects.create_user('gerente', tipo='Gerente')
+        cls.hospede = Usuario.objects.create_user('hospede', tipo='Hospede')
+        cls.outro_hospede = Usuario.objects.create_user('outro', tipo='Hospede')
+
+        cls.standard = TipoQuarto.objects.create(nome='Standard', preco_diaria=150, capacidade=2)
+        cls.luxo = TipoQuarto.objects.create(nome='Luxo', preco_diaria=300, capacidade=3)
+        cls.quartos = [
+            Quarto.objects.create(numero=f'{andar}0{n}', andar=andar, tipo_quarto=tipo)
+            for andar, tipo in [(1, cls.standard), (2, cls.luxo)]
+            for n in range(1, 4)
+        ]
+        cls.tarifa = TarifaSazonal.objects.create(
+            nome='Alta', data_inicio=cls.hoje, data_fim=cls.hoje + timedelta(days=30), multiplicador=Decimal('1.20')
+        )
+        cls.cafe = ServicoAdicional.objects.create(nome='Café', preco=35)
+        cls.spa = ServicoAdicional.objects.create(nome='Spa', preco=180)
+
+        def reservar(quarto, inicio, noites, status_reserva, hospede=cls.hospede):
+            return Reserva.objects.create(
+                hospede=hospede, quarto=quarto, num_hospedes=1, status=status_reserva,
+                data_checkin=cls.hoje + timedelta(days=inicio),
+                data_checkout=cls.hoje + timedelta(days=inicio + noites),
+            )
+
+        cls.chegando = reservar(cls.quartos[0], 0, 2, 'Confirmada')
+        cls.hospedada = reservar(cls.quartos[1], -1, 3, 'Checkin')
+        cls.futura = reservar(cls.quartos[2], 10, 3, 'Pendente')
+        cls.encerrada = reservar(cls.quartos[3], -10, 2, 'Checkout')
+        cls.de_outro = reservar(cls.quartos[4], 5, 2, 'Confirmada', hospede=cls.outro_hospede)
+
+        cls.solicitacoes = [
+            SolicitacaoServico.objects.create(reserva=reserva, servico=servico, quantidade=2)
+            for reserva in [cls.chegando, cls.hospedada]
+            for servico in [cls.cafe, cls.spa]
+        ]
+        cls.avaliacao = Avaliacao.objects.create(reserva=cls.encerrada, hospede=cls.hospede, nota=4)
+
+    def setUp(self):
+        cache.clear()
+        precos.invalidar()
+        self.client.force_authenticate(self.gerente)
+
+    def como_hospede(self):
+        self.client.force_authenticate(self.hospede)
+
+    def requisitar(self, metodo, url, queries, dados=None, esperado=status.HTTP_200_OK, **extra):
+        with self.assertNumQueries(queries):
+            if metodo == 'get':
+                resposta = self.client.get(url, dados, **extra)
+            else:
+                resposta = getattr(self.client, metodo)(url, dados, format='json', **extra)
+            if resposta.streaming:
+                b''.join(resposta.streaming_content)
+        self.assertEqual(resposta.status_code, esperado, getattr(resposta, 'data', None))
+        return resposta
+
+    def periodo(self, inicio, noites):
+        return {
+            'data_inicio': (self.hoje + timedelta(days=inicio)).isoformat(),
+            'data_fim': (self.hoje + timedelta(days=inicio + noites)).isoformat(),
+        }
+
+
+class QuartoConsultasTests(ConsultasApiTestCase):
+
+    def test_lista(self):
+        resposta = self.requisitar('get', '/api/quartos/', 2)
+        self.assertEqual(resposta.data['count'], len(self.quartos))
+
+    def test_detalhe(self):
+        self.requisitar('get', f'/api/quartos/{self.quartos[0].pk}/', 1)
+
+    def test_cria(self):
+        self.requisitar('post', '/api/quartos/', 3, {'numero': '301', 'andar': 3, 'tipo_quarto_id': self.luxo.pk}, status.HTTP_201_CREATED)
+
+    def test_atualiza(self):
+        self.requisitar('patch', f'/api/quartos/{self.quartos[5].pk}/', 2, {'status': 'Limpeza'})
+
+    def test_remove(self):
+        self.requisitar('delete', f'/api/quartos/{self.quartos[5].pk}/', 4, esperado=status.HTTP_204_NO_CONTENT)
+
+    def test_disponibilidade(self):
+        resposta = self.requisitar('get', '/api/quartos/disponibilidade/', 1, self.periodo(0, 3))
+        self.assertEqual(len(resposta.data), 4)
+
+    def test_quadro(self):
+        self.requisitar('get', '/api/quartos/quadro/', 1)
+
+
+class ReservaConsultasTests(ConsultasApiTestCase):
+
+    def test_lista(self):
+        resposta = self.requisitar('get', '/api/reservas/', 2)
+        self.assertEqual(resposta.data['count'], 5)
+
+    def test_lista_keyset(self):
+        self.requisitar('get', '/api/reservas/', 1, {'paginacao': 'keyset'})
+
+    def test_detalhe(self):
+        self.requisitar('get', f'/api/reservas/{self.futura.pk}/', 1)
+
+    def test_cria(self):
+        self.como_hospede()
+        dados = {'quarto': self.quartos[5].pk, 'num_hospedes': 2, **self.periodo_reserva(20, 2)}
+        self.requisitar('post', '/api/reservas/', 13, dados, status.HTTP_201_CREATED)
+
+    def test_atualiza(self):
+        self.requisitar('patch', f'/api/reservas/{self.futura.pk}/', 13, self.periodo_reserva(11, 3))
+
+    def test_remove(self):
+        self.requisitar('delete', f'/api/reservas/{self.futura.pk}/', 15, esperado=status.HTTP_204_NO_CONTENT)
+
+    def test_lote(self):
+        self.como_hospede()
+        dados = [
+            {'quarto': quarto.pk, 'num_hospedes': 1, **self.periodo_reserva(20, 2)}
+            for quarto in self.quartos[3:]
+        ]
+        resposta = self.requisitar('post', '/api/reservas/lote/', 14, dados, status.HTTP_201_CREATED)
+        self.assertEqual(resposta.data['criadas'], 3)
+
+    def test_por_tipo(self):
+        self.como_hospede()
+        dados = {'tipo_quarto': self.standard.pk, 'num_hospedes': 1, **self.periodo_reserva(1, 2)}
+        self.requisitar('post', '/api/reservas/por-tipo/', 20, dados, status.HTTP_201_CREATED)
+
+    def test_fazer_checkin(self):
+        self.requisitar('post', f'/api/reservas/{self.chegando.pk}/fazer_checkin/', 9)
+
+    def test_fazer_checkout(self):
+        self.requisitar('post', f'/api/reservas/{self.hospedada.pk}/fazer_checkout/', 14)
+
+    def test_transicao_lote(self):
+        dados = {'acao': 'checkin', 'reservas': [self.chegando.pk, self.futura.pk]}
+        resposta = self.requisitar('post', '/api/reservas/transicao-lote/', 5, dados)
+        self.assertEqual(resposta.data['aplicadas'], [self.chegando.pk])
+
+    def test_cancelar(self):
+        self.requisitar('post', f'/api/reservas/{self.futura.pk}/cancelar/', 13)
+
+    def test_cancelar_desfeito_se_contadores_falham(self):
+        with mock.patch('backend.signals.ajustar_inventario', side_effect=OperationalError('deadlock detected')):
+            with self.assertRaises(OperationalError):
+                self.client.post(f'/api/reservas/{self.futura.pk}/cancelar/')
+        self.futura.refresh_from_db()
+        self.assertEqual(self.futura.status, 'Pendente')
+
+    def test_folio(self):
+        self.requisitar('get', f'/api/reservas/{self.hospedada.pk}/folio/', 2)
+
+    def test_exportar(self):
+        self.requisitar('get', '/api/reservas/exportar/', 1, self.periodo(-30, 60))
+
+    def periodo_reserva(self, inicio, noites):
+        return {
+            'data_checkin': (self.hoje + timedelta(days=inicio)).isoformat(),
+            'data_checkout': (self.hoje + timedelta(days=inicio + noites)).isoformat(),
+        }
+
+
+class SolicitacaoServicoConsultasTests(ConsultasApiTestCase):
+
+    def test_lista(self):
+        resposta = self.requisitar('get', '/api/solicitacoes-servico/', 2)
+        self.assertEqual(resposta.data['count'], len(self.solicitacoes))
+
+    def test_lista_keyset(self):
+        self.requisitar('get', '/api/solicitacoes-servico/', 1, {'paginacao': 'keyset'})
+
+    def test_detalhe(self):
+        self.requisitar('get', f'/api/solicitacoes-servico/{self.solicitacoes[0].pk}/', 1)
+
+    def test_cria(self):
+        self.como_hospede()
+        dados = {'reserva': self.hospedada.pk, 'servico': self.cafe.pk, 'quantidade': 1}
+        self.requisitar('post', '/api/solicitacoes-servico/', 17, dados, status.HTTP_201_CREATED)
+
+    def test_atualiza(self):
+        self.requisitar('patch', f'/api/solicitacoes-servico/{self.solicitacoes[0].pk}/', 8, {'status': 'Concluido'})
+
+    def test_remove(self):
+        self.requisitar('delete', f'/api/solicitacoes-servico/{self.solicitacoes[0].pk}/', 10, esperado=status.HTTP_204_NO_CONTENT)
+
+    def test_exportar(self):
+        self.requisitar('get', '/api/solicitacoes-servico/exportar/', 1, self.periodo(-1, 2))
+
+
+class TipoQuartoConsultasTests(ConsultasApiTestCase):
+
+    def test_lista(self):
+        self.requisitar('get', '/api/tipos-quarto/', 2)
+
+    def test_detalhe(self):
+        self.requisitar('get', f'/api/tipos-quarto/{self.luxo.pk}/', 1)
+
+    def test_cria(self):
+        self.requisitar('post', '/api/tipos-quarto/', 2, {'nome': 'Suíte', 'preco_diaria': '600.00', 'capacidade': 4}, status.HTTP_201_CREATED)
+
+    def test_atualiza(self):
+        self.requisitar('patch', f'/api/tipos-quarto/{self.luxo.pk}/', 2, {'preco_diaria': '320.00'})
+
+    def test_remove(self):
+        tipo = TipoQuarto.objects.create(nome='Vazio', preco_diaria=100, capacidade=1)
+        self.requisitar('delete', f'/api/tipos-quarto/{tipo.pk}/', 6, esperado=status.HTTP_204_NO_CONTENT)
+
+    def test_disponibilidade(self):
+        resposta = self.requisitar('get', f'/api/tipos-quarto/{self.standard.pk}/disponibilidade/', 4, self.periodo(0, 3))
+        self.assertEqual(len(resposta.data['noites']), 3)
+
+
+class TarifaSazonalConsultasTests(ConsultasApiTestCase):
+
+    def test_lista(self):
+        self.requisitar('get', '/api/tarifas-sazonais/', 2)
+
+    def test_detalhe(self):
+        self.requisitar('get', f'/api/tarifas-sazonais/{self.tarifa.pk}/', 1)
+
+    def test_cria(self):
+        dados = {'nome': 'Festa', 'multiplicador': '1.50', 'tipo_quarto': self.luxo.pk, **self.periodo(40, 3)}
+        self.requisitar('post', '/api/tarifas-sazonais/', 2, dados, status.HTTP_201_CREATED)
+
+    def test_atualiza(self):
+        self.requisitar('patch', f'/api/tarifas-sazonais/{self.tarifa.pk}/', 2, {'multiplicador': '1.30'})
+
+    def test_remove(self):
+        self.requisitar('delete', f'/api/tarifas-sazonais/{self.tarifa.pk}/', 2, esperado=status.HTTP_204_NO_CONTENT)
+
+
+class ServicoAdicionalConsultasTests(ConsultasApiTestCase):
+
+    def test_lista(self):
+        self.requisitar('get', '/api/servicos-adicionais/', 2)
+
+    def test_detalhe(self):
+        self.requisitar('get', f'/api/servicos-adicionais/{self.cafe.pk}/', 1)
+
+    def test_cria(self):
+        self.requisitar('post', '/api/servicos-adicionais/', 2, {'nome': 'Lavanderia', 'preco': '50.00'}, status.HTTP_201_CREATED)
+
+    def test_atualiza(self):
+        self.requisitar('patch', f'/api/servicos-adicionais/{self.cafe.pk}/', 2, {'preco': '40.00'})
+
+    def test_remove(self):
+        servico = ServicoAdicional.objects.create(nome='Sem uso', preco=10)
+        self.requisitar('delete', f'/api/servicos-adicionais/{servico.pk}/', 3, esperado=status.HTTP_204_NO_CONTENT)
+
+
+class AvaliacaoConsultasTests(ConsultasApiTestCase):
+
+    def test_lista(self):
+        self.requisitar('get', '/api/avaliacoes/', 2)
+
+    def test_detalhe(self):
+        self.requisitar('get', f'/api/avaliacoes/{self.avaliacao.pk}/', 1)
+
+    def test_cria(self):
+        self.avaliacao.delete()
+        self.como_hospede()
+        dados = {'reserva': self.encerrada.pk, 'nota': 5, 'comentario': 'Ótimo'}
+        self.requisitar('post', '/api/avaliacoes/', 11, dados, status.HTTP_201_CREATED)
+
+    def test_atualiza(self):
+        self.requisitar('patch', f'/api/avaliacoes/{self.avaliacao.pk}/', 9, {'nota': 2})
+
+    def test_remove(self):
+        self.requisitar('delete', f'/api/avaliacoes/{self.avaliacao.pk}/', 9, esperado=status.HTTP_204_NO_CONTENT)
+
+    def test_resumo(self):
+        self.requisitar('get', '/api/avaliacoes/resumo/', 1, {'agrupar': 'tipo_quarto'})
+
+
+class HospedeConsultasTests(ConsultasApiTestCase):
+
+    def test_lista(self):
+        resposta = self.requisitar('get', '/api/hospedes/', 2)
+        self.assertEqual(resposta.data['count'], 2)
+
+    def test_detalhe(self):
+        self.requisitar('get', f'/api/hospedes/{self.hospede.pk}/', 1)
+
+
+class RelatorioConsultasTests(ConsultasApiTestCase):
+
+    def test_ocupacao(self):
+        self.requisitar('get', '/api/relatorios/ocupacao/', 2, {**self.periodo(-30, 60), 'agrupar': 'data,tipo_quarto'})
+
+
+class ConsultaPesadaTests(ConsultasApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.hospede)
+
+    def test_vaga_liberada_apos_resposta(self):
+        self.assertEqual(self.client.get('/api/quartos/').status_code, status.HTTP_200_OK)
+        self.assertEqual(consultas_pesadas.em_andamento, 0)
+
+    def test_vaga_liberada_apos_erro_do_banco(self):
+        with mock.patch.object(QuartoViewSet, 'get_queryset', side_effect=OperationalError('statement timeout')):
+            with self.assertRaises(OperationalError):
+                self.client.get('/api/quartos/disponibilidade/', self.periodo(0, 3))
+        self.assertEqual(consultas_pesadas.em_andamento, 0)
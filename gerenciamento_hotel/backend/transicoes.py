@@ -0,0 +1,119 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .catalogo import invalidar_catalogo
+from .eventos import publicar_quarto, publicar_reserva
+from .folio import invalidar_folio
+from .inventario import ajustar_inventario
+from .models import Quarto, Reserva
+
+
+class TransicaoInvalida(Exception):
+    pass
+
+
+# Cada transição declara de quais status da reserva pode partir, o novo status da reserva
+# e do quarto, e regras extras no formato (condição, mensagem de erro).
+TRANSICOES = {
+    'checkin': {
+        'de': ['Confirmada'],
+        'para': 'Checkin',
+        'quarto': 'Ocupado',
+        'erro_status': 'Check-in só pode ser feito para reservas "Confirmadas".',
+        'regras': [
+            (
+                lambda reserva, hoje: reserva.data_checkin == hoje,
+                'Check-in só pode ser feito na data de check-in ({reserva.data_checkin}).',
+            ),
+        ],
+        'mensagem': 'Check-in realizado com sucesso! Quarto atualizado para Ocupado.',
+    },
+    'checkout': {
+        'de': ['Checkin'],
+        'para': 'Checkout',
+        'quarto': 'Limpeza',
+        'erro_status': 'Check-out só pode ser feito para reservas com "Check-in" realizado.',
+        'regras': [],
+        'mensagem': 'Check-out realizado com sucesso! Quarto atualizado para Limpeza.',
+    },
+}
+
+
+def travar(queryset):
+    # FOR UPDATE OF reserva, quarto: trava as duas linhas na mesma consulta, sem travar hóspede e tipo.
+    return queryset.select_related('quarto').select_for_update(of=('self', 'quarto'))
+
+
+def validar(reserva, nome, hoje):
+    transicao = TRANSICOES[nome]
+
+    if reserva.status not in transicao['de']:
+        raise TransicaoInvalida(transicao['erro_status'])
+
+    for condicao, erro in transicao['regras']:
+        if not condicao(reserva, hoje):
+            raise TransicaoInvalida(erro.format(reserva=reserva))
+
+    return transicao
+
+
+def aplicar_transicao(reserva, nome):
+    """Aplica a transição a uma reserva já travada com ``travar`` dentro de ``transaction.atomic``."""
+
+    transicao = validar(reserva, nome, timezone.now().date())
+
+    reserva.status = transicao['para']
+    reserva.save(update_fields=['status'])
+    reserva.quarto.status = transicao['quarto']
+    reserva.quarto.save(update_fields=['status'])
+
+    return transicao['mensagem']
+
+
+def aplicar_transicao_em_lote(queryset, reserva_ids, nome):
+    """
+    Trava as reservas de ``reserva_ids`` (em ordem de id) e seus quartos, aplica a transição às
+    válidas com um UPDATE para as reservas e outro para os quartos, e devolve ``(aplicadas, erros)``.
+    Os UPDATEs em massa não passam por save() nem disparam sinais; os eventos do quadro de
+    quartos, os contadores de inventário e o cache do folio são atualizados aqui.
+    """
+
+    transicao = TRANSICOES[nome]
+    hoje = timezone.now().date()
+    erros = {}
+
+    with transaction.atomic():
+        reservas = list(travar(queryset).filter(pk__in=reserva_ids).order_by('pk'))
+
+        aplicadas = []
+        for reserva in reservas:
+            try:
+                validar(reserva, nome, hoje)
+            except TransicaoInvalida as erro:
+                erros[reserva.pk] = str(erro)
+            else:
+                aplicadas.append(reserva)
+
+        if aplicadas:
+            Reserva.objects.filter(pk__in=[reserva.pk for reserva in aplicadas]).update(status=transicao['para'])
+            Quarto.objects.filter(pk__in={reserva.quarto_id for reserva in aplicadas}).update(status=transicao['quarto'])
+            invalidar_catalogo(Quarto)
+
+            if transicao['para'] not in Reserva.STATUS_ATIVOS:
+                ajustar_inventario([
+                    (reserva.quarto.tipo_quarto_id, reserva.data_checkin, reserva.data_checkout, -1)
+                    for reserva in aplicadas if reserva.status in Reserva.STATUS_ATIVOS
+                ])
+
+            for reserva in aplicadas:
+                publicar_reserva(reserva.pk, reserva.quarto_id, transicao['para'])
+                publicar_quarto(reserva.quarto_id, reserva.quarto.numero, transicao['quarto'])
+                invalidar_folio(reserva.pk)
+                transaction.on_commit(lambda reserva_id=reserva.pk: invalidar_folio(reserva_id))
+
+    encontradas = {reserva.pk for reserva in reservas}
+    for reserva_id in reserva_ids:
+        if reserva_id not in encontradas:
+            erros[reserva_id] = 'Reserva não encontrada.'
+
+    return aplicadas, erros
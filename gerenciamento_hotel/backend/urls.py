@@ -8,12 +8,16 @@ router.register(r'quartos', views.QuartoViewSet)
 router.register(r'reservas', views.ReservaViewSet)
 router.register(r'solicitacoes-servico', views.SolicitacaoServicoViewSet)
 router.register(r'tipos-quarto', views.TipoQuartoViewSet)
+router.register(r'tarifas-sazonais', views.TarifaSazonalViewSet)
 router.register(r'servicos-adicionais', views.ServicoAdicionalViewSet)
 router.register(r'avaliacoes', views.AvaliacaoViewSet)
+router.register(r'hospedes', views.HospedeViewSet)
 
 urlpatterns = [
+    path('quartos/quadro/eventos/', views.eventos_quadro, name='quadro_eventos'),
     path('', include(router.urls)),
     path('auth/login/', obtain_auth_token, name='api_token_auth'),
     path('auth/registro/', views.RegistroUsuarioView.as_view(), name='auth_registro'),
     path('auth/logout/', views.LogoutView.as_view(), name='auth_logout'),
+    path('relatorios/ocupacao/', views.RelatorioOcupacaoView.as_view(), name='relatorio_ocupacao'),
 ]
\ No newline at end of file
@@ -1,6 +1,15 @@
 from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.shortcuts import get_object_or_404
+from django.core.exceptions import ValidationError
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
 from datetime import timedelta
-from rest_framework import viewsets, status, filters
+from decimal import Decimal
+from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
@@ -8,8 +17,23 @@ from rest_framework.generics import CreateAPIView
 from rest_framework.views import APIView
 from rest_framework.authtoken.models import Token
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import ( Usuario, Quarto, TipoQuarto, Reserva,  ServicoAdicional, SolicitacaoServico, Avaliacao)
-from .serializers import (QuartoSerializer, TipoQuartoSerializer, ReservaSerializer, ServicoAdicionalSerializer, SolicitacaoServicoSerializer, AvaliacaoSerializer, UsuarioRegistroSerializer)
+from .models import ( Usuario, Quarto, TipoQuarto, Reserva,  ServicoAdicional, SolicitacaoServico, Avaliacao, TarifaSazonal)
+from .serializers import (HospedeSerializer, QuartoSerializer, TipoQuartoSerializer, ReservaSerializer, ReservaLoteItemSerializer, ReservaPorTipoSerializer, TransicaoLoteSerializer, ServicoAdicionalSerializer, SolicitacaoServicoSerializer, AvaliacaoSerializer, UsuarioRegistroSerializer, TarifaSazonalSerializer)
+from .reservas import criar_reservas_em_lote
+from .inventario import SemDisponibilidade, livres_por_noite, reservar_por_tipo
+from .pagination import KeysetPagination
+from .filters import BuscaTrigramaFilter, ReservaFilter
+from .leitura import LeituraRapidaMixin
+from .catalogo import CacheCatalogoMixin
+from .exportacao import SemNegociacao, resposta_exportacao
+from .limites import ConsultaPesadaMixin
+from .idempotencia import idempotente
+from .relatorios import relatorio_ocupacao
+from .avaliacoes import resumo_avaliacoes
+from .eventos import broker, fluxo_eventos
+from .folio import montar_folio
+from .authentication import CachedTokenAuthentication
+from .transicoes import TransicaoInvalida, aplicar_transicao, aplicar_transicao_em_lote, travar
 
 class RegistroUsuarioView(CreateAPIView):
     queryset = Usuario.objects.all()
@@ -51,17 +75,84 @@ class IsHospede(IsAuthenticated):
             request.user.tipo == 'Hospede'
         )
 
-class QuartoViewSet(viewsets.ModelViewSet):
+class IsGerente(IsAuthenticated):
+
+    def has_permission(self, request, view):
+        return (
+            super().has_permission(request, view) and
+            (request.user.is_staff or request.user.tipo == 'Gerente')
+        )
+
+class RelatorioOcupacaoView(APIView):
+
+    permission_classes = [IsGerente]
+
+    AGRUPAMENTOS = ['data', 'tipo_quarto', 'andar']
+    PERIODO_MAXIMO = 731
+
+    def get(self, request):
+
+        try:
+            data_inicio = parse_date(request.query_params.get('data_inicio', ''))
+            data_fim = parse_date(request.query_params.get('data_fim', ''))
+        except ValueError:
+            data_inicio = data_fim = None
+
+        if not data_inicio or not data_fim or data_fim <= data_inicio:
+            return Response(
+                {'error': 'Informe data_inicio e data_fim (AAAA-MM-DD), com data_fim posterior a data_inicio.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if (data_fim - data_inicio).days > self.PERIODO_MAXIMO:
+            return Response(
+                {'error': f'O período máximo é de {self.PERIODO_MAXIMO} dias.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        agrupar = request.query_params.get('agrupar', 'data').split(',')
+        if not set(agrupar) <= set(self.AGRUPAMENTOS):
+            return Response(
+                {'error': f'agrupar aceita: {", ".join(self.AGRUPAMENTOS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        filtros = {}
+        for campo in ['tipo_quarto', 'andar']:
+            valor = request.query_params.get(campo)
+            if valor:
+                try:
+                    filtros[campo] = int(valor)
+                except ValueError:
+                    return Response({'error': f'{campo} deve ser um número.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        agrupar = [campo for campo in self.AGRUPAMENTOS if campo in agrupar]
+        return Response(relatorio_ocupacao(data_inicio, data_fim, agrupar, filtros), status=status.HTTP_200_OK)
+
+def exportacao_em_fluxo(request, nome):
+
+    # CSV ou Parquet gerado enquanto é enviado, lendo as linhas por cursor no servidor.
+    try:
+        return resposta_exportacao(request._request, nome, request.query_params, request.query_params.get('formato', 'csv'))
+    except ValidationError as erro:
+        return Response({'error': erro.message_dict}, status=status.HTTP_400_BAD_REQUEST)
+
+class QuartoViewSet(ConsultaPesadaMixin, CacheCatalogoMixin, LeituraRapidaMixin, viewsets.ModelViewSet):
 
     queryset = Quarto.objects.all().select_related('tipo_quarto')
     serializer_class = QuartoSerializer
 
     permission_classes = [IsRecepcionistaOrGerente]
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, BuscaTrigramaFilter]
     filterset_fields = ['tipo_quarto', 'status']
     search_fields = ['numero', 'tipo_quarto__nome']
 
+    modelos_cache = (Quarto, TipoQuarto)
+
+    acoes_pesadas = ('list', 'disponibilidade')
+    permissoes_prioritarias = [IsRecepcionistaOrGerente]
+
     def get_permissions(self):
 
         if self.action in ['list', 'retrieve', 'disponibilidade']:
@@ -82,47 +173,74 @@ class QuartoViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    @action(detail=False, methods=['get'], permission_classes=[IsRecepcionistaOrGerente])
+    def quadro(self, request):
+
+        # A sequência é lida antes dos quartos: um evento concorrente pode chegar repetido
+        # no stream, mas nunca se perde. Os eventos carregam o status absoluto.
+        sequencia = broker.sequencia
+        quartos = Quarto.objects.order_by('numero').values('id', 'numero', 'andar', 'status')
+        return Response({'sequencia': sequencia, 'quartos': list(quartos)}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'])
     def disponibilidade(self, request):
 
-        data_inicio = request.query_params.get('data_inicio')
-        data_fim = request.query_params.get('data_fim')
+        try:
+            data_inicio = parse_date(request.query_params.get('data_inicio', ''))
+            data_fim = parse_date(request.query_params.get('data_fim', ''))
+        except ValueError:
+            data_inicio = data_fim = None
 
         if not data_inicio or not data_fim:
             return Response(
-                {'error': 'Parâmetros data_inicio e data_fim são obrigatórios.'},
+                {'error': 'Parâmetros data_inicio e data_fim são obrigatórios (AAAA-MM-DD).'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-            
-        quartos_disponiveis = Quarto.objects.filter(
-            status__in=['Disponivel', 'Limpeza']
-        )
-        
-        quartos_ocupados_ids = Reserva.objects.filter(
-            status__in=['Confirmada', 'Checkin', 'Pendente'],
-            data_checkin__lt=data_fim,
-            data_checkout__gt=data_inicio
-        ).values_list('quarto_id', flat=True)
-        
-        queryset = quartos_disponiveis.exclude(
-            id__in=quartos_ocupados_ids
+
+        if data_fim <= data_inicio:
+            return Response(
+                {'error': 'data_fim deve ser posterior a data_inicio.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Anti-join por quarto contra o índice GiST (periodo, quarto) das reservas ativas:
+        # o custo depende das reservas que cruzam a janela, não do tamanho da tabela.
+        reservas_no_periodo = Reserva.objects.ativas().no_periodo(data_inicio, data_fim).filter(
+            quarto=OuterRef('pk')
         )
 
+        queryset = self.get_queryset().filter(
+            status__in=['Disponivel', 'Limpeza']
+        ).filter(~Exists(reservas_no_periodo))
+
         queryset = self.filter_queryset(queryset) 
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class ReservaViewSet(viewsets.ModelViewSet):
+class ReservaViewSet(LeituraRapidaMixin, viewsets.ModelViewSet):
 
     queryset = Reserva.objects.all().select_related('hospede', 'quarto__tipo_quarto')
     serializer_class = ReservaSerializer
     permission_classes = [IsAuthenticated] 
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_fields = ['hospede', 'status', 'quarto']
+    filter_backends = [DjangoFilterBackend, BuscaTrigramaFilter]
+    filterset_class = ReservaFilter
     search_fields = ['hospede__username', 'quarto__numero']
 
+    pagination_class = KeysetPagination
+    ordenacao_keyset = ('-data_reserva', '-id')
+
+    # Mesmo texto de Usuario.__str__, usado pelo StringRelatedField de hospede.
+    especiais_leitura = {
+        'hospede': (
+            ['hospede__username', 'hospede__tipo'],
+            lambda linha: f"{linha['hospede__username']} ({dict(Usuario.TIPO_CHOICES).get(linha['hospede__tipo'], linha['hospede__tipo'])})",
+        ),
+    }
+
+    LOTE_MAXIMO = 500
+
     def get_queryset(self):
 
         user = self.request.user
@@ -135,95 +253,212 @@ class ReservaViewSet(viewsets.ModelViewSet):
         
         return self.queryset.none()
 
+    @idempotente
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
 
         if self.request.user.tipo != 'Hospede':
             raise serializers.ValidationError(
                 "Apenas usuários do tipo 'Hóspede' podem criar reservas."
             )
-        serializer.save(hospede=self.request.user, status='Pendente')
+        # Os sinais de Reserva ajustam inventário e ocupação; na mesma transação da escrita.
+        with transaction.atomic():
+            serializer.save(hospede=self.request.user, status='Pendente')
 
-    @action(detail=True, methods=['post'], permission_classes=[IsRecepcionistaOrGerente])
-    def fazer_checkin(self, request, pk=None):
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
 
-        reserva = self.get_object()
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
 
-        if reserva.status != 'Confirmada':
-            return Response( {'error': 'Check-in só pode ser feito para reservas "Confirmadas".'},status=status.HTTP_400_BAD_REQUEST )
+    @action(detail=False, methods=['post'])
+    @idempotente
+    def lote(self, request):
 
-        if reserva.data_checkin != timezone.now().date():
-            return Response( {'error': f'Check-in só pode ser feito na data de check-in ({reserva.data_checkin}).'},status=status.HTTP_400_BAD_REQUEST )
+        if request.user.tipo != 'Hospede':
+            return Response(
+                {'error': "Apenas usuários do tipo 'Hóspede' podem criar reservas."},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
-        reserva.status = 'Checkin'
-        reserva.quarto.status = 'Ocupado'
-        reserva.quarto.save()
-        reserva.save()
-        
-        return Response(
-            {'status': 'Check-in realizado com sucesso! Quarto atualizado para Ocupado.'},
-            status=status.HTTP_200_OK
-        )
+        if not isinstance(request.data, list) or not request.data:
+            return Response(
+                {'error': 'Envie uma lista não vazia de reservas.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(request.data) > self.LOTE_MAXIMO:
+            return Response(
+                {'error': f'O lote pode ter no máximo {self.LOTE_MAXIMO} reservas.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        itens = []
+        erros = {}
+        for indice, dados in enumerate(request.data):
+            item = ReservaLoteItemSerializer(data=dados)
+            if item.is_valid():
+                itens.append((indice, item.validated_data))
+            else:
+                erros[indice] = item.errors
+
+        criadas, erros_lote = criar_reservas_em_lote(request.user, itens)
+        erros.update(erros_lote)
+
+        resultados = [
+            {'indice': indice, 'status': 'criada', 'reserva': self.get_serializer(reserva).data}
+            for indice, reserva in criadas
+        ] + [
+            {'indice': indice, 'status': 'erro', 'erros': erro}
+            for indice, erro in erros.items()
+        ]
+        resultados.sort(key=lambda resultado: resultado['indice'])
+
+        if not erros:
+            codigo = status.HTTP_201_CREATED
+        elif criadas:
+            codigo = status.HTTP_207_MULTI_STATUS
+        else:
+            codigo = status.HTTP_400_BAD_REQUEST
+
+        return Response({'criadas': len(criadas), 'erros': len(erros), 'resultados': resultados}, status=codigo)
+
+    @action(detail=False, methods=['post'], url_path='por-tipo')
+    @idempotente
+    def por_tipo(self, request):
+
+        if request.user.tipo != 'Hospede':
+            return Response(
+                {'error': "Apenas usuários do tipo 'Hóspede' podem criar reservas."},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        dados = ReservaPorTipoSerializer(data=request.data)
+        dados.is_valid(raise_exception=True)
+
+        try:
+            reserva = reservar_por_tipo(request.user, **dados.validated_data)
+        except SemDisponibilidade as erro:
+            return Response({'error': str(erro)}, status=status.HTTP_409_CONFLICT)
+
+        return Response(self.get_serializer(reserva).data, status=status.HTTP_201_CREATED)
+
+    def executar_transicao(self, nome):
+
+        with transaction.atomic():
+            reserva = get_object_or_404(travar(self.get_queryset()), pk=self.kwargs['pk'])
+            self.check_object_permissions(self.request, reserva)
+
+            try:
+                mensagem = aplicar_transicao(reserva, nome)
+            except TransicaoInvalida as erro:
+                return Response({'error': str(erro)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'status': mensagem}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'], permission_classes=[IsRecepcionistaOrGerente])
+    @idempotente
+    def fazer_checkin(self, request, pk=None):
+        return self.executar_transicao('checkin')
 
     @action(detail=True, methods=['post'], permission_classes=[IsRecepcionistaOrGerente])
+    @idempotente
     def fazer_checkout(self, request, pk=None):
+        return self.executar_transicao('checkout')
 
-        reserva = self.get_object()
-        
-        if reserva.status != 'Checkin':
-             return Response(
-                {'error': 'Check-out só pode ser feito para reservas com "Check-in" realizado.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    @action(detail=False, methods=['post'], url_path='transicao-lote', permission_classes=[IsRecepcionistaOrGerente])
+    @idempotente
+    def transicao_lote(self, request):
 
-        reserva.status = 'Checkout'
-        reserva.quarto.status = 'Limpeza'
-        reserva.quarto.save()
-        reserva.save()
-        
-        return Response(
-            {'status': 'Check-out realizado com sucesso! Quarto atualizado para Limpeza.'},
-            status=status.HTTP_200_OK
+        dados = TransicaoLoteSerializer(data=request.data, context={'lote_maximo': self.LOTE_MAXIMO})
+        dados.is_valid(raise_exception=True)
+
+        aplicadas, erros = aplicar_transicao_em_lote(
+            self.get_queryset(), dados.validated_data['reservas'], dados.validated_data['acao']
         )
 
+        return Response({
+            'aplicadas': [reserva.pk for reserva in aplicadas],
+            'erros': [{'reserva': reserva_id, 'error': erro} for reserva_id, erro in erros.items()],
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsRecepcionistaOrGerente], content_negotiation_class=SemNegociacao)
+    def exportar(self, request):
+
+        return exportacao_em_fluxo(request, 'reservas')
+
+    @action(detail=True, methods=['get'])
+    def folio(self, request, pk=None):
+
+        reserva = self.get_object()
+        return Response(montar_folio(reserva), status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    @idempotente
     def cancelar(self, request, pk=None):
 
-        reserva = self.get_object()
         user = request.user
 
-        if reserva.hospede != user and not IsRecepcionistaOrGerente().has_permission(request, self):
-            return Response(
-                {'error': 'Você não tem permissão para cancelar esta reserva.'},
-                status=status.HTTP_403_FORBIDDEN
+        # Trava a reserva antes de conferir o status, como nas transições, e grava o status
+        # junto com os contadores ajustados pelos sinais.
+        with transaction.atomic():
+            reserva = get_object_or_404(
+                self.get_queryset().select_for_update(of=('self',)), pk=self.kwargs['pk']
             )
+            self.check_object_permissions(request, reserva)
 
-        if reserva.status not in ['Pendente', 'Confirmada']:
-            return Response(
-                {'error': f'Não é possível cancelar uma reserva com status "{reserva.status}".'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+            if reserva.hospede != user and not IsRecepcionistaOrGerente().has_permission(request, self):
+                return Response(
+                    {'error': 'Você não tem permissão para cancelar esta reserva.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
 
-        dias_para_checkin = (reserva.data_checkin - timezone.now().date()).days
-        
-        if dias_para_checkin < 2:
-            reserva.valor_reembolso = reserva.valor_total * 0.50
-            msg = f'Reserva cancelada com menos de 48h. Reembolso: R$ {reserva.valor_reembolso}'
-        else: 
-            reserva.valor_reembolso = reserva.valor_total * 1.00
-            msg = f'Reserva cancelada com mais de 48h. Reembolso: R$ {reserva.valor_reembolso}'
-        
-        reserva.status = 'Cancelada'
-        reserva.save()
+            if reserva.status not in ['Pendente', 'Confirmada']:
+                return Response(
+                    {'error': f'Não é possível cancelar uma reserva com status "{reserva.status}".'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            dias_para_checkin = (reserva.data_checkin - timezone.now().date()).days
+            
+            if dias_para_checkin < 2:
+                reserva.valor_reembolso = reserva.valor_total * Decimal('0.50')
+                msg = f'Reserva cancelada com menos de 48h. Reembolso: R$ {reserva.valor_reembolso}'
+            else: 
+                reserva.valor_reembolso = reserva.valor_total * Decimal('1.00')
+                msg = f'Reserva cancelada com mais de 48h. Reembolso: R$ {reserva.valor_reembolso}'
+            
+            reserva.status = 'Cancelada'
+            reserva.save()
         
         return Response({'status': msg}, status=status.HTTP_200_OK)
 
 
-class SolicitacaoServicoViewSet(viewsets.ModelViewSet):
+class SolicitacaoServicoViewSet(LeituraRapidaMixin, viewsets.ModelViewSet):
 
-    queryset = SolicitacaoServico.objects.all().select_related('reserva', 'servico')
+    queryset = SolicitacaoServico.objects.all().select_related('reserva__hospede', 'reserva__quarto', 'servico')
     serializer_class = SolicitacaoServicoSerializer
     permission_classes = [IsAuthenticated]
 
+    pagination_class = KeysetPagination
+    ordenacao_keyset = ('-data_solicitacao', '-id')
+
+    # Mesmos textos de Reserva.__str__ e get_status_display.
+    especiais_leitura = {
+        'reserva_info': (
+            ['reserva__id', 'reserva__hospede__username', 'reserva__quarto__numero'],
+            lambda linha: f"Reserva {linha['reserva__id']} - {linha['reserva__hospede__username']} - Quarto {linha['reserva__quarto__numero']}",
+        ),
+        'status_display': (
+            ['status'],
+            lambda linha: dict(SolicitacaoServico.STATUS_CHOICES).get(linha['status'], linha['status']),
+        ),
+    }
+
     def get_queryset(self):
 
         user = self.request.user
@@ -244,6 +479,15 @@ class SolicitacaoServicoViewSet(viewsets.ModelViewSet):
         if self.action in ['update', 'partial_update']:
             return [IsRecepcionistaOrGerente()]
         return super().get_permissions()
+
+    @action(detail=False, methods=['get'], permission_classes=[IsRecepcionistaOrGerente], content_negotiation_class=SemNegociacao)
+    def exportar(self, request):
+
+        return exportacao_em_fluxo(request, 'servicos')
+
+    @idempotente
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
     
     def perform_create(self, serializer):
         reserva = serializer.validated_data.get('reserva')
@@ -259,23 +503,96 @@ class SolicitacaoServicoViewSet(viewsets.ModelViewSet):
                 "Serviços só podem ser solicitados para reservas 'Confirmadas' ou 'Checkin'."
             )
             
-        serializer.save()
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
 
-class TipoQuartoViewSet(viewsets.ModelViewSet):
+class HospedeViewSet(viewsets.ReadOnlyModelViewSet):
+
+    queryset = Usuario.objects.filter(tipo='Hospede').order_by('username')
+    serializer_class = HospedeSerializer
+    permission_classes = [IsRecepcionistaOrGerente]
+
+    filter_backends = [BuscaTrigramaFilter]
+    search_fields = ['username', 'first_name', 'last_name', 'email', 'cpf']
+
+class TipoQuartoViewSet(ConsultaPesadaMixin, CacheCatalogoMixin, viewsets.ModelViewSet):
     queryset = TipoQuarto.objects.all()
     serializer_class = TipoQuartoSerializer
     permission_classes = [IsRecepcionistaOrGerente]
 
-class ServicoAdicionalViewSet(viewsets.ModelViewSet):
+    modelos_cache = (TipoQuarto,)
+
+    acoes_pesadas = ('disponibilidade',)
+    permissoes_prioritarias = [IsRecepcionistaOrGerente]
+
+    PERIODO_MAXIMO = 366
+
+    def get_permissions(self):
+        if self.action == 'disponibilidade':
+            return [AllowAny()]
+        return super().get_permissions()
+
+    @action(detail=True, methods=['get'])
+    def disponibilidade(self, request, pk=None):
+
+        tipo_quarto = self.get_object()
+        try:
+            data_inicio = parse_date(request.query_params.get('data_inicio', ''))
+            data_fim = parse_date(request.query_params.get('data_fim', ''))
+        except ValueError:
+            data_inicio = data_fim = None
+
+        if not data_inicio or not data_fim or data_fim <= data_inicio:
+            return Response(
+                {'error': 'Informe data_inicio e data_fim (AAAA-MM-DD), com data_fim posterior a data_inicio.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if (data_fim - data_inicio).days > self.PERIODO_MAXIMO:
+            return Response(
+                {'error': f'O período máximo é de {self.PERIODO_MAXIMO} dias.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        livres = livres_por_noite(tipo_quarto.id, data_inicio, data_fim)
+        return Response({
+            'tipo_quarto': tipo_quarto.id,
+            'disponivel': min(livres) > 0,
+            'livres': max(min(livres), 0),
+            'noites': [
+                {'data': data_inicio + timedelta(days=n), 'livres': max(quantidade, 0)}
+                for n, quantidade in enumerate(livres)
+            ],
+        }, status=status.HTTP_200_OK)
+
+class TarifaSazonalViewSet(viewsets.ModelViewSet):
+    queryset = TarifaSazonal.objects.all()
+    serializer_class = TarifaSazonalSerializer
+    permission_classes = [IsRecepcionistaOrGerente]
+
+class ServicoAdicionalViewSet(CacheCatalogoMixin, viewsets.ModelViewSet):
     queryset = ServicoAdicional.objects.all()
     serializer_class = ServicoAdicionalSerializer
     permission_classes = [IsRecepcionistaOrGerente]
 
+    modelos_cache = (ServicoAdicional,)
+
 class AvaliacaoViewSet(viewsets.ModelViewSet):
-    queryset = Avaliacao.objects.all().select_related('reserva', 'hospede')
+    queryset = Avaliacao.objects.all().select_related('reserva__hospede', 'reserva__quarto', 'hospede')
     serializer_class = AvaliacaoSerializer
     permission_classes = [IsAuthenticated]
 
+    pagination_class = KeysetPagination
+    ordenacao_keyset = ('-data_avaliacao', '-id')
+
     def get_queryset(self):
         user = self.request.user
         if user.tipo == 'Hospede':
@@ -285,14 +602,83 @@ class AvaliacaoViewSet(viewsets.ModelViewSet):
         return self.queryset.none()
 
     def get_permissions(self):
+        if self.action == 'resumo':
+            return [AllowAny()]
         if self.action in ['update', 'partial_update', 'destroy']:
             return [IsRecepcionistaOrGerente()]
         return super().get_permissions()
 
+    @action(detail=False, methods=['get'])
+    def resumo(self, request):
+
+        agrupar = request.query_params.get('agrupar', 'quarto')
+        if agrupar not in ['quarto', 'tipo_quarto']:
+            return Response({'error': 'agrupar aceita: quarto, tipo_quarto.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        filtros = {}
+        for campo, lookup in [('quarto', 'quarto_id'), ('tipo_quarto', 'quarto__tipo_quarto_id')]:
+            valor = request.query_params.get(campo)
+            if valor:
+                try:
+                    filtros[lookup] = int(valor)
+                except ValueError:
+                    return Response({'error': f'{campo} deve ser um número.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(resumo_avaliacoes(agrupar, filtros), status=status.HTTP_200_OK)
+
     def perform_create(self, serializer):
         reserva = serializer.validated_data.get('reserva')
         
         if reserva.hospede != self.request.user:
             raise serializers.ValidationError( "Você só pode avaliar reservas que estão em seu nome.")
 
-        serializer.save(hospede=self.request.user)
\ No newline at end of file
+        # Os sinais de Avaliacao ajustam AvaliacaoQuarto; na mesma transação da escrita.
+        with transaction.atomic():
+            serializer.save(hospede=self.request.user)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
+
+def autenticar_recepcao(request):
+
+    autenticacao = CachedTokenAuthentication()
+    try:
+        resultado = autenticacao.authenticate(request)
+        # EventSource não envia cabeçalhos; aceita o token também na query string.
+        if resultado is None and request.GET.get('token'):
+            resultado = autenticacao.authenticate_credentials(request.GET['token'])
+    except AuthenticationFailed:
+        return None
+
+    if resultado is None:
+        return None
+
+    usuario = resultado[0]
+    if usuario.is_staff or usuario.tipo in ['Recepcionista', 'Gerente']:
+        return usuario
+    return None
+
+
+async def eventos_quadro(request):
+
+    usuario = await sync_to_async(autenticar_recepcao)(request)
+    if usuario is None:
+        return JsonResponse({'detail': 'Acesso restrito a recepcionistas e gerentes.'}, status=403)
+
+    desde = request.GET.get('desde') or request.headers.get('Last-Event-ID') or broker.sequencia
+    try:
+        desde = int(desde)
+    except ValueError:
+        return JsonResponse({'error': 'desde deve ser um número de sequência.'}, status=400)
+
+    return StreamingHttpResponse(
+        fluxo_eventos(desde),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
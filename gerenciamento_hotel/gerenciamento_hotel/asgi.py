@@ -5,6 +5,10 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+O stream de eventos do quadro de quartos (api/quartos/quadro/eventos/) é uma view async
+servida por esta aplicação. O broker é em memória, então use um único processo, ex.:
+    uvicorn gerenciamento_hotel.asgi:application --workers 1
 """
 
 import os
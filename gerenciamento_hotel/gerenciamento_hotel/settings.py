@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -34,6 +35,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework.authtoken',  
@@ -45,7 +47,7 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'backend.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -54,8 +56,56 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    'EXCEPTION_HANDLER': 'backend.exceptions.exception_handler',
 }
 
+# Cache compartilhado entre os workers, em Redis (REDIS_URL, ex.: redis://localhost:6379/1).
+# Sem ele o cache é local de cada processo e o cache de tokens, o de respostas do catálogo
+# e os limites de consulta por cliente passam a valer só por processo ou ficam desligados
+# (veja backend/cache.py).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Listas de quartos, reservas e solicitações montadas direto de .values() e renderizadas
+# com orjson (backend/leitura.py). Desligado: as views usam o caminho padrão do DRF.
+LEITURA_RAPIDA = False
+
+AUTH_TOKEN_CACHE_TTL = 300
+FOLIO_CACHE_TTL = 600
+
+# Respostas de catálogo (tipos de quarto, serviços, lista pública de quartos): tempo no
+# cache do servidor e por quanto tempo o cliente pode reusá-las sem revalidar o ETag.
+CATALOGO_CACHE_TTL = 600
+CATALOGO_CACHE_MAX_AGE = 0
+
+# Consultas públicas pesadas (lista de quartos e disponibilidade): (capacidade, requests por
+# segundo) por IP ou usuário, contados no cache compartilhado (por processo sem REDIS_URL),
+# e consultas simultâneas por worker antes de responder 503. Recepcionistas e gerentes não
+# são limitados.
+LIMITES_CONSULTAS = {
+    'anonimo': (20, 0.5),
+    'autenticado': (60, 2),
+}
+CONSULTAS_PESADAS_SIMULTANEAS = 8
+CONSULTAS_PESADAS_RETRY_AFTER = 2
+
+# Rotinas do executar_tarefas: reservas pendentes expiram depois deste prazo.
+RESERVA_PENDENTE_PRAZO_HORAS = 24
+
+# Respostas guardadas para repetições com o mesmo Idempotency-Key.
+IDEMPOTENCIA_TTL_HORAS = 24
+
 # Não esqueça de definir o modelo de usuário customizado
 AUTH_USER_MODEL = 'backend.Usuario'
 
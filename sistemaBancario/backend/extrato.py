@@ -0,0 +1,142 @@
+import base64
+import heapq
+import json
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import DecimalField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import serializers
+
+from .models import Conta, Deposito, Saque, Transferencia
+
+LOTE = 2000
+CENTAVO = Decimal('0.01')
+
+# Fluxos de movimentos que afetam o saldo: tipo, queryset, campo da conta, sinal e campo
+# com a conta do outro lado. Os tipos estão em ordem alfabética, que é o desempate do merge.
+FLUXOS = [
+    ('deposito', Deposito.objects.all(), 'conta', 1, None),
+    ('saque', Saque.objects.filter(status_operacao='aprovado'), 'conta', -1, None),
+    ('transferencia_enviada', Transferencia.objects.filter(status='concluida'), 'origem', -1, 'conta_destino'),
+    ('transferencia_recebida', Transferencia.objects.filter(status='concluida'), 'destino', 1, 'conta_origem'),
+]
+TIPOS = [tipo for tipo, *_ in FLUXOS]
+
+
+class CursorInvalido(Exception):
+    pass
+
+
+def codificar_cursor(data_hora, tipo, id, saldo):
+    dados = json.dumps([data_hora.isoformat(), tipo, id, str(saldo)])
+    return base64.urlsafe_b64encode(dados.encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    try:
+        data_hora, tipo, id, saldo = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        data_hora = datetime.fromisoformat(data_hora)
+        if data_hora.tzinfo is None or tipo not in TIPOS:
+            raise ValueError
+        return data_hora, tipo, int(id), Decimal(saldo)
+    except (ValueError, TypeError, ArithmeticError):
+        raise CursorInvalido('Cursor inválido.')
+
+
+def inicio_do_dia(data):
+    return timezone.make_aware(datetime.combine(data, time.min), timezone.get_current_timezone())
+
+
+def saldo_antes(conta_id, desde):
+    """
+    Saldo da conta antes de ``desde`` (ou antes do primeiro movimento): o saldo atual menos os
+    movimentos a partir dali, numa única consulta, para que os dois venham do mesmo instante.
+    """
+
+    totais = {}
+    for tipo, queryset, campo, _, _ in FLUXOS:
+        movimentos = queryset.filter(**{campo: OuterRef('pk')})
+        if desde is not None:
+            movimentos = movimentos.filter(data_hora__gte=desde)
+        totais[tipo] = Coalesce(
+            Subquery(movimentos.order_by().values(campo).annotate(total=Sum('valor')).values('total')),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+
+    linha = Conta.objects.filter(pk=conta_id).annotate(**totais).values('saldo', *totais).get()
+    saldo = linha['saldo'] - sum(sinal * linha[tipo] for tipo, _, _, sinal, _ in FLUXOS)
+    return saldo.quantize(CENTAVO)
+
+
+def fluxo(conta_id, tipo, queryset, campo, sinal, contraparte, desde, ate, cursor):
+    filtros = Q(**{campo: conta_id})
+    if desde is not None:
+        filtros &= Q(data_hora__gte=desde)
+    if ate is not None:
+        filtros &= Q(data_hora__lt=ate)
+    if cursor is not None:
+        # Continua depois de (data_hora, tipo, id) do cursor.
+        data_hora, tipo_cursor, id, _ = cursor
+        if tipo > tipo_cursor:
+            filtros &= Q(data_hora__gte=data_hora)
+        elif tipo < tipo_cursor:
+            filtros &= Q(data_hora__gt=data_hora)
+        else:
+            filtros &= Q(data_hora__gt=data_hora) | Q(data_hora=data_hora, id__gt=id)
+
+    colunas = ['data_hora', 'id', 'valor', 'descricao'] + ([contraparte] if contraparte else [])
+    for data_hora, id, valor, descricao, *outra in queryset.filter(filtros).order_by('data_hora', 'id').values_list(*colunas).iterator(chunk_size=LOTE):
+        yield data_hora, tipo, id, sinal * valor, descricao, outra[0] if outra else None
+
+
+def movimentos(conta_id, desde=None, ate=None, cursor=None):
+    """Merge dos fluxos já ordenados por (data_hora, tipo, id), lendo cada um por cursor no banco."""
+
+    return heapq.merge(
+        *[fluxo(conta_id, *definicao, desde, ate, cursor) for definicao in FLUXOS],
+        key=lambda movimento: movimento[:3],
+    )
+
+
+def partes_extrato(conta_id, desde=None, ate=None, cursor=None, limite=None):
+    """
+    Extrato em JSON gerado aos pedaços: movimentos em ordem cronológica com o saldo após cada
+    um. Com ``limite``, para depois de tantos movimentos e devolve em ``proximo`` o cursor da
+    página seguinte, que guarda também o saldo corrente.
+    """
+
+    saldo = cursor[3] if cursor is not None else saldo_antes(conta_id, desde)
+    formatar_data = serializers.DateTimeField().to_representation
+
+    yield f'{{"conta": {conta_id}, "saldo_inicial": "{saldo}", "movimentos": ['
+
+    proximo = None
+    separador = ''
+    for n, (data_hora, tipo, id, valor, descricao, contraparte) in enumerate(movimentos(conta_id, desde, ate, cursor)):
+        if limite is not None and n == limite:
+            proximo = codificar_cursor(*ultimo, saldo)
+            break
+        saldo += valor
+        ultimo = (data_hora, tipo, id)
+        yield separador + json.dumps({
+            'tipo': tipo,
+            'id': id,
+            'data_hora': formatar_data(data_hora),
+            'valor': str(valor),
+            'saldo': str(saldo),
+            'descricao': descricao,
+            'contraparte': contraparte,
+        }, ensure_ascii=False)
+        separador = ', '
+
+    yield f'], "saldo_final": "{saldo}", "proximo": {json.dumps(proximo)}}}'
+
+
+def periodo(data_inicio, data_fim):
+    # Datas inclusivas em limites de data_hora: [início do dia inicial, início do dia seguinte ao final).
+    desde = inicio_do_dia(data_inicio) if data_inicio else None
+    ate = inicio_do_dia(data_fim + timedelta(days=1)) if data_fim else None
+    return desde, ate
@@ -0,0 +1,128 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Conta, SaqueDiario
+
+
+class ContaInvalida(Exception):
+    pass
+
+
+class SaldoInsuficiente(Exception):
+    pass
+
+
+class LimiteDiarioExcedido(Exception):
+    pass
+
+
+def id_da_conta(numero):
+    return Conta.objects.filter(numero=numero).values_list('id', flat=True).first()
+
+
+def motivo_recusa(numero):
+    situacao = Conta.objects.filter(numero=numero).values_list('status', flat=True).first()
+    if situacao is None:
+        return ContaInvalida(f'Conta {numero} não encontrada.')
+    if situacao != 'ativa':
+        return ContaInvalida(f'Conta {numero} não está ativa ({situacao}).')
+    return SaldoInsuficiente(f'Saldo insuficiente na conta {numero}.')
+
+
+def aplicar(variacoes):
+    """
+    Soma ``variacoes`` ({numero da conta: valor}) aos saldos, um UPDATE ... RETURNING por
+    conta e sempre na ordem do número da conta. O UPDATE trava a linha, então duas operações
+    sobre as mesmas contas esperam uma pela outra na mesma ordem e não entram em deadlock.
+    A condição ``saldo + valor >= 0`` no próprio UPDATE impede saldo negativo sem ler antes.
+
+    Deve rodar dentro de uma transação: se uma conta recusar, as anteriores são desfeitas
+    pelo rollback. Retorna {numero: (id da conta, novo saldo)}.
+    """
+
+    tabela = connection.ops.quote_name(Conta._meta.db_table)
+    contas = {}
+    with connection.cursor() as cursor:
+        for numero in sorted(variacoes):
+            valor = variacoes[numero]
+            cursor.execute(
+                f'UPDATE {tabela} SET saldo = saldo + %s '
+                f"WHERE numero = %s AND status = 'ativa' AND saldo + %s >= 0 RETURNING id, saldo",
+                [valor, numero, valor],
+            )
+            linha = cursor.fetchone()
+            if linha is None:
+                raise motivo_recusa(numero)
+            contas[numero] = linha
+    return contas
+
+
+def acumular_saque_diario(conta_id, valor, data):
+    """
+    Soma ``valor`` ao total sacado pela conta no dia com um único INSERT ... ON CONFLICT,
+    que só grava se o novo total couber em ``limite_saque_diario`` (0 é sem limite). Assim a
+    decisão é uma linha do contador, não a soma dos saques do dia. Roda na transação do saque,
+    depois do UPDATE que já travou a conta, então o contador muda junto com o saldo.
+    """
+
+    contadores = connection.ops.quote_name(SaqueDiario._meta.db_table)
+    contas = connection.ops.quote_name(Conta._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {contadores} (conta_id, data, total) '
+            f'SELECT id, %s, %s FROM {contas} WHERE id = %s AND (limite_saque_diario = 0 OR %s <= limite_saque_diario) '
+            f'ON CONFLICT (conta_id, data) DO UPDATE SET total = {contadores}.total + excluded.total '
+            f'WHERE (SELECT limite_saque_diario = 0 OR {contadores}.total + excluded.total <= limite_saque_diario '
+            f'FROM {contas} WHERE id = excluded.conta_id) '
+            f'RETURNING total',
+            [data, valor, conta_id, valor],
+        )
+        if cursor.fetchone() is None:
+            raise LimiteDiarioExcedido('Limite diário de saque excedido.')
+
+
+def depositar(deposito):
+    with transaction.atomic():
+        deposito.conta_id, _ = aplicar({deposito.numero_conta: deposito.valor})[deposito.numero_conta]
+        deposito.save()
+    return deposito
+
+
+def sacar(saque):
+    # Saque sem saldo ou acima do limite diário fica registrado como negado, sem mexer na conta.
+    try:
+        with transaction.atomic():
+            saque.conta_id, _ = aplicar({saque.numero_conta: -saque.valor})[saque.numero_conta]
+            acumular_saque_diario(saque.conta_id, saque.valor, timezone.localdate())
+            saque.status_operacao = 'aprovado'
+            saque.save()
+    except (SaldoInsuficiente, LimiteDiarioExcedido):
+        saque.conta_id = id_da_conta(saque.numero_conta)
+        saque.status_operacao = 'negado'
+        saque.save()
+    return saque
+
+
+def transferir(transferencia):
+    # Com origem igual ao destino as variações se fundiriam num crédito; recusa aqui, e não
+    # só no serializer, para valer para qualquer chamador.
+    if transferencia.conta_origem == transferencia.conta_destino:
+        raise ContaInvalida('A conta de destino deve ser diferente da de origem.')
+
+    # Sem saldo na origem a transferência fica registrada como falhou, sem mexer nas contas.
+    try:
+        with transaction.atomic():
+            contas = aplicar({
+                transferencia.conta_origem: -transferencia.valor,
+                transferencia.conta_destino: transferencia.valor,
+            })
+            transferencia.origem_id = contas[transferencia.conta_origem][0]
+            transferencia.destino_id = contas[transferencia.conta_destino][0]
+            transferencia.status = 'concluida'
+            transferencia.save()
+    except SaldoInsuficiente:
+        transferencia.origem_id = id_da_conta(transferencia.conta_origem)
+        transferencia.destino_id = id_da_conta(transferencia.conta_destino)
+        transferencia.status = 'falhou'
+        transferencia.save()
+    return transferencia
@@ -0,0 +1,135 @@
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.db.models import Q, Sum
+
+from backend.lancamentos import depositar, sacar, transferir
+from backend.models import Conta, Deposito, Saque, SaqueDiario, Transferencia
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Teste de concorrência do motor de lançamentos: cria contas sintéticas e dispara '
+        'transferências, saques e depósitos aleatórios em várias threads, cada uma com sua conexão. '
+        'No fim confere que nenhum saldo ficou negativo e que cada saldo é igual ao calculado a '
+        'partir das operações registradas. Use apenas em um banco de testes.'
+    )
+
+    PREFIXO = 'STRESS-'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--contas', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--operacoes', type=int, default=20_000, help='Total de operações entre todas as threads.')
+        parser.add_argument('--saldo-inicial', type=Decimal, default=Decimal('1000.00'))
+        parser.add_argument('--semente', type=int, default=0)
+
+    def handle(self, *args, **options):
+        numeros = self.preparar(options['contas'], options['saldo_inicial'])
+
+        por_thread = options['operacoes'] // options['threads']
+        contagens = [Counter() for _ in range(options['threads'])]
+        threads = [
+            threading.Thread(target=self.trabalhar, args=(numeros, por_thread, options['semente'] + n, contagens[n]))
+            for n in range(options['threads'])
+        ]
+
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+
+        total = sum(contagens, Counter())
+        executadas = por_thread * options['threads']
+        for resultado, quantidade in sorted(total.items()):
+            self.stdout.write(f'  {resultado:<40} {quantidade:>8}')
+        self.stdout.write(
+            f'{executadas} operações em {duracao:.2f} s ({executadas / duracao:.0f} op/s, '
+            f"{total['transferencia concluida'] / duracao:.0f} transferências concluídas/s)"
+        )
+
+        problemas = self.conferir(numeros)
+        erros = {resultado: quantidade for resultado, quantidade in total.items() if resultado.startswith('erro')}
+        if erros:
+            problemas.append(f'Erros de banco durante o teste: {erros}')
+        if problemas:
+            raise CommandError('\n'.join(problemas))
+        self.stdout.write(self.style.SUCCESS('Saldos consistentes com as operações registradas.'))
+
+    def preparar(self, quantidade, saldo_inicial):
+        antigas = list(Conta.objects.filter(numero__startswith=self.PREFIXO).values_list('numero', flat=True))
+        Deposito.objects.filter(numero_conta__in=antigas).delete()
+        Saque.objects.filter(numero_conta__in=antigas).delete()
+        Transferencia.objects.filter(Q(conta_origem__in=antigas) | Q(conta_destino__in=antigas)).delete()
+        Conta.objects.filter(numero__in=antigas).delete()
+
+        numeros = [f'{self.PREFIXO}{n:06d}' for n in range(quantidade)]
+        contas = Conta.objects.bulk_create([
+            Conta(numero=numero, codigo_agencia='0001', cpf_titular='000.000.000-00', tipo='corrente', saldo=saldo_inicial)
+            for numero in numeros
+        ])
+        # O saldo inicial entra como depósito para que o extrato feche com o saldo.
+        Deposito.objects.bulk_create([
+            Deposito(numero_conta=conta.numero, conta=conta, valor=saldo_inicial, tipo='dinheiro', descricao='Saldo inicial do teste')
+            for conta in contas
+        ])
+        return numeros
+
+    def trabalhar(self, numeros, quantidade, semente, contagem):
+        aleatorio = random.Random(semente)
+        try:
+            for _ in range(quantidade):
+                valor = Decimal(aleatorio.randint(1, 20000)) / 100
+                sorteio = aleatorio.random()
+                try:
+                    if sorteio < 0.8:
+                        origem, destino = aleatorio.sample(numeros, 2)
+                        transferencia = transferir(Transferencia(
+                            conta_origem=origem, conta_destino=destino, valor=valor, tipo='interna'
+                        ))
+                        contagem[f'transferencia {transferencia.status}'] += 1
+                    elif sorteio < 0.9:
+                        saque = sacar(Saque(numero_conta=aleatorio.choice(numeros), valor=valor, local='caixa'))
+                        contagem[f'saque {saque.status_operacao}'] += 1
+                    else:
+                        depositar(Deposito(numero_conta=aleatorio.choice(numeros), valor=valor, tipo='pix'))
+                        contagem['deposito'] += 1
+                except DatabaseError as erro:
+                    contagem[f'erro {type(erro.__cause__ or erro).__name__}'] += 1
+        finally:
+            connection.close()
+
+    def conferir(self, numeros):
+        esperado = defaultdict(Decimal)
+        for campo, queryset, sinal in [
+            ('numero_conta', Deposito.objects.filter(numero_conta__in=numeros), 1),
+            ('numero_conta', Saque.objects.filter(numero_conta__in=numeros, status_operacao='aprovado'), -1),
+            ('conta_origem', Transferencia.objects.filter(conta_origem__in=numeros, status='concluida'), -1),
+            ('conta_destino', Transferencia.objects.filter(conta_destino__in=numeros, status='concluida'), 1),
+        ]:
+            for numero, total in queryset.values_list(campo).annotate(total=Sum('valor')).order_by():
+                esperado[numero] += sinal * total
+
+        problemas = []
+        for numero, saldo in Conta.objects.filter(numero__in=numeros).values_list('numero', 'saldo'):
+            if saldo < 0:
+                problemas.append(f'{numero}: saldo negativo ({saldo}).')
+            if saldo != esperado[numero]:
+                problemas.append(f'{numero}: saldo {saldo}, operações somam {esperado[numero]}.')
+
+        sacado = dict(
+            Saque.objects.filter(numero_conta__in=numeros, status_operacao='aprovado')
+            .values_list('numero_conta').annotate(total=Sum('valor')).order_by()
+        )
+        for numero, total in SaqueDiario.objects.filter(conta__numero__in=numeros).values_list('conta__numero').annotate(total=Sum('total')).order_by():
+            if total != sacado.get(numero, 0):
+                problemas.append(f'{numero}: contadores de saque diário somam {total}, saques aprovados {sacado.get(numero, 0)}.')
+        return problemas
@@ -0,0 +1,30 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from backend.saldos import gerar_saldos
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Grava o saldo de fim de dia de todas as contas, um INSERT ... SELECT por data, partindo do '
+        'saldo do dia anterior. Rodar diariamente logo depois da meia-noite para o dia anterior; '
+        'com --dias, preenche um período em ordem, do dia mais antigo para o mais recente.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--data', type=date.fromisoformat, help='Último dia a gerar (padrão: ontem).')
+        parser.add_argument('--dias', type=int, default=1, help='Quantos dias gerar, terminando em --data.')
+
+    def handle(self, *args, **options):
+        ultimo = options['data'] or timezone.localdate() - timedelta(days=1)
+        for n in range(options['dias'] - 1, -1, -1):
+            data = ultimo - timedelta(days=n)
+            inicio = time.perf_counter()
+            linhas = gerar_saldos(data)
+            self.stdout.write(f'{data}: {linhas} saldos em {time.perf_counter() - inicio:.2f} s.')
+
+        self.stdout.write(self.style.SUCCESS('Saldos diários gerados.'))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, OuterRef, Subquery
+
+from backend.models import Agencia, Cliente, Conta, Deposito, Saque, Transferencia
+
+# (modelo, chave estrangeira, campo com o código antigo, modelo relacionado, campo do código nele)
+RELACOES = [
+    (Conta, 'agencia', 'codigo_agencia', Agencia, 'codigo'),
+    (Conta, 'titular', 'cpf_titular', Cliente, 'cpf'),
+    (Deposito, 'conta', 'numero_conta', Conta, 'numero'),
+    (Saque, 'conta', 'numero_conta', Conta, 'numero'),
+    (Transferencia, 'origem', 'conta_origem', Conta, 'numero'),
+    (Transferencia, 'destino', 'conta_destino', Conta, 'numero'),
+]
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Preenche as chaves estrangeiras novas a partir dos códigos antigos (número da conta, código '
+        'da agência, CPF) em lotes por faixa de id, cada lote no seu próprio UPDATE, para não segurar '
+        'travas longas. Pode ser interrompido e rodado de novo: só linhas ainda sem a FK são tocadas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000, help='Faixa de ids por UPDATE.')
+        parser.add_argument('--pausa', type=float, default=0, help='Segundos de espera entre lotes.')
+
+    def handle(self, *args, **options):
+        for modelo, campo, codigo, relacionado, atributo in RELACOES:
+            nome = f'{modelo._meta.db_table}.{campo}'
+            ultimo = modelo.objects.aggregate(ultimo=Max('pk'))['ultimo'] or 0
+            chave = Subquery(relacionado.objects.filter(**{atributo: OuterRef(codigo)}).values('pk')[:1])
+
+            preenchidas = 0
+            for inicio in range(0, ultimo + 1, options['lote']):
+                preenchidas += modelo.objects.filter(
+                    pk__gte=inicio, pk__lt=inicio + options['lote'], **{f'{campo}__isnull': True}
+                ).update(**{campo: chave})
+                if options['pausa']:
+                    time.sleep(options['pausa'])
+
+            sem_relacao = modelo.objects.filter(**{f'{campo}__isnull': True}).count()
+            self.stdout.write(f'{nome}: {preenchidas} linhas processadas, {sem_relacao} sem correspondência.')
+
+        self.stdout.write(self.style.SUCCESS('Chaves estrangeiras preenchidas.'))
@@ -0,0 +1,80 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from backend.models import Conta, Saque, SaqueDiario
+
+
+class Command(BaseCommand):
+
+    help = (
+        'Recalcula os contadores de saque diário a partir dos saques aprovados, corrigindo os que '
+        'divergirem, e apaga contadores mais antigos que --manter-dias, que o limite já não consulta. '
+        'Trava as contas de cada lote enquanto recalcula, para não perder saques feitos no meio.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=2, help='Quantos dias recalcular, terminando hoje.')
+        parser.add_argument('--manter-dias', type=int, default=31, help='Contadores mais antigos que isso são apagados.')
+        parser.add_argument('--lote', type=int, default=5000, help='Faixa de ids de conta por transação.')
+
+    def handle(self, *args, **options):
+        hoje = timezone.localdate()
+        primeiro = hoje - timedelta(days=options['dias'] - 1)
+        desde = timezone.make_aware(datetime.combine(primeiro, time.min))
+        ate = timezone.make_aware(datetime.combine(hoje + timedelta(days=1), time.min))
+
+        ultimo = Conta.objects.aggregate(ultimo=Max('pk'))['ultimo'] or 0
+        corrigidos = 0
+        for inicio in range(0, ultimo + 1, options['lote']):
+            with transaction.atomic():
+                # Saques aprovados travam a conta antes do contador; travando as contas do lote,
+                # nenhum saque delas entra entre a soma e a correção. Na ordem de numero, a mesma
+                # dos lançamentos, para não cruzar travas com uma transferência.
+                contas = list(
+                    Conta.objects.select_for_update()
+                    .filter(pk__gte=inicio, pk__lt=inicio + options['lote'])
+                    .order_by('numero')
+                    .values_list('pk', flat=True)
+                )
+                if not contas:
+                    continue
+
+                reais = {
+                    (conta, data): total
+                    for conta, data, total in Saque.objects.filter(
+                        conta__in=contas, status_operacao='aprovado', data_hora__gte=desde, data_hora__lt=ate
+                    ).annotate(data=TruncDate('data_hora')).values_list('conta', 'data').annotate(total=Sum('valor')).order_by()
+                }
+                contadores = {
+                    (conta, data): total
+                    for conta, data, total in SaqueDiario.objects.filter(
+                        conta__in=contas, data__gte=primeiro, data__lte=hoje
+                    ).values_list('conta', 'data', 'total')
+                }
+
+                divergentes = [
+                    SaqueDiario(conta_id=conta, data=data, total=total)
+                    for (conta, data), total in reais.items()
+                    if contadores.get((conta, data)) != total
+                ]
+                for conta, data in contadores.keys() - reais.keys():
+                    if contadores[(conta, data)]:
+                        divergentes.append(SaqueDiario(conta_id=conta, data=data, total=0))
+
+                for contador in divergentes:
+                    self.stdout.write(
+                        f'Conta {contador.conta_id} em {contador.data}: contador '
+                        f'{contadores.get((contador.conta_id, contador.data), 0)}, saques somam {contador.total}.'
+                    )
+                SaqueDiario.objects.bulk_create(
+                    divergentes, update_conflicts=True, unique_fields=['conta', 'data'], update_fields=['total']
+                )
+                corrigidos += len(divergentes)
+
+        apagados, _ = SaqueDiario.objects.filter(data__lt=hoje - timedelta(days=options['manter_dias'])).delete()
+        self.stdout.write(self.style.SUCCESS(f'{corrigidos} contadores corrigidos, {apagados} antigos apagados.'))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conta',
+            name='agencia',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='contas', to='backend.agencia'),
+        ),
+        migrations.AddField(
+            model_name='conta',
+            name='titular',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='contas', to='backend.cliente'),
+        ),
+        migrations.AddField(
+            model_name='deposito',
+            name='conta',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='depositos', to='backend.conta'),
+        ),
+        migrations.AddField(
+            model_name='saque',
+            name='conta',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='saques', to='backend.conta'),
+        ),
+        migrations.AddField(
+            model_name='transferencia',
+            name='destino',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='transferencias_recebidas', to='backend.conta'),
+        ),
+        migrations.AddField(
+            model_name='transferencia',
+            name='origem',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='transferencias_enviadas', to='backend.conta'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Índices criados com CREATE INDEX CONCURRENTLY, sem travar as escritas nas tabelas de operações.
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('backend', '0002_relacoes_contas'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='deposito',
+            index=models.Index(fields=['conta', 'data_hora'], name='deposito_conta_data_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='saque',
+            index=models.Index(fields=['conta', 'data_hora'], name='saque_conta_data_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transferencia',
+            index=models.Index(fields=['origem', 'data_hora'], name='transf_origem_data_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='transferencia',
+            index=models.Index(fields=['destino', 'data_hora'], name='transf_destino_data_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0003_indices_operacoes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaqueDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('conta', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='saques_diarios', to='backend.conta')),
+            ],
+            options={
+                'db_table': 'saque_diario',
+                'constraints': [models.UniqueConstraint(fields=('conta', 'data'), name='saque_diario_conta_data_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0004_saque_diario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField()),
+                ('saldo', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('conta', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='saldos_diarios', to='backend.conta')),
+            ],
+            options={
+                'db_table': 'saldo_diario',
+                'constraints': [models.UniqueConstraint(fields=('conta', 'data'), name='saldo_diario_conta_data_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Índices BRIN em data_hora para o comando gerar_saldos_diarios ler só os blocos do dia.
+# Criados com CREATE INDEX CONCURRENTLY, como os de 0003.
+
+from django.contrib.postgres.indexes import BrinIndex
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('backend', '0005_saldo_diario'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='deposito',
+            index=BrinIndex(fields=['data_hora'], name='deposito_data_brin'),
+        ),
+        AddIndexConcurrently(
+            model_name='saque',
+            index=BrinIndex(fields=['data_hora'], name='saque_data_brin'),
+        ),
+        AddIndexConcurrently(
+            model_name='transferencia',
+            index=BrinIndex(fields=['data_hora'], name='transf_data_brin'),
+        ),
+    ]
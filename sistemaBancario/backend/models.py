@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import BrinIndex
 from django.db import models
 
 class Agencia(models.Model):
@@ -38,6 +39,8 @@ class Conta(models.Model):
     numero = models.CharField(max_length=30, unique=True)
     codigo_agencia = models.CharField(max_length=20)
     cpf_titular = models.CharField(max_length=14)
+    agencia = models.ForeignKey(Agencia, on_delete=models.PROTECT, null=True, blank=True, related_name="contas")
+    titular = models.ForeignKey(Cliente, on_delete=models.PROTECT, null=True, blank=True, related_name="contas")
     tipo = models.CharField(max_length=10,)
     saldo = models.DecimalField(max_digits=14, decimal_places=2, default=0)
     data_abertura = models.DateField(auto_now_add=True)
@@ -53,6 +56,7 @@ class Conta(models.Model):
 class Deposito(models.Model):
 
     numero_conta = models.CharField(max_length=30)
+    conta = models.ForeignKey(Conta, on_delete=models.PROTECT, null=True, blank=True, db_index=False, related_name="depositos")
     valor = models.DecimalField(max_digits=14, decimal_places=2)
     data_hora = models.DateTimeField(auto_now_add=True)
     tipo = models.CharField(max_length=12)
@@ -64,10 +68,15 @@ class Deposito(models.Model):
 
     class Meta:
         db_table = "deposito"
+        indexes = [
+            models.Index(fields=["conta", "data_hora"], name="deposito_conta_data_idx"),
+            BrinIndex(fields=["data_hora"], name="deposito_data_brin"),
+        ]
 
 class Saque(models.Model):
 
     numero_conta = models.CharField(max_length=30)
+    conta = models.ForeignKey(Conta, on_delete=models.PROTECT, null=True, blank=True, db_index=False, related_name="saques")
     valor = models.DecimalField(max_digits=14, decimal_places=2)
     data_hora = models.DateTimeField(auto_now_add=True)
     local = models.CharField(max_length=20)
@@ -80,11 +89,17 @@ class Saque(models.Model):
 
     class Meta:
         db_table = "saque"
+        indexes = [
+            models.Index(fields=["conta", "data_hora"], name="saque_conta_data_idx"),
+            BrinIndex(fields=["data_hora"], name="saque_data_brin"),
+        ]
 
 class Transferencia(models.Model):
 
     conta_origem = models.CharField(max_length=30)
     conta_destino = models.CharField(max_length=30)
+    origem = models.ForeignKey(Conta, on_delete=models.PROTECT, null=True, blank=True, db_index=False, related_name="transferencias_enviadas")
+    destino = models.ForeignKey(Conta, on_delete=models.PROTECT, null=True, blank=True, db_index=False, related_name="transferencias_recebidas")
     valor = models.DecimalField(max_digits=14, decimal_places=2)
     data_hora = models.DateTimeField(auto_now_add=True)
     tipo = models.CharField(max_length=12)
@@ -96,4 +111,42 @@ class Transferencia(models.Model):
         return f"Transf {self.valor} {self.conta_origem} -> {self.conta_destino} ({self.status})"
 
     class Meta:
-        db_table = "transferencia"
\ No newline at end of file
+        db_table = "transferencia"
+        indexes = [
+            models.Index(fields=["origem", "data_hora"], name="transf_origem_data_idx"),
+            models.Index(fields=["destino", "data_hora"], name="transf_destino_data_idx"),
+            BrinIndex(fields=["data_hora"], name="transf_data_brin"),
+        ]
+
+class SaqueDiario(models.Model):
+    # Total sacado por conta e dia, mantido junto com cada saque aprovado para conferir o limite diário.
+
+    conta = models.ForeignKey(Conta, on_delete=models.CASCADE, db_index=False, related_name="saques_diarios")
+    data = models.DateField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"Saques de {self.conta_id} em {self.data}: {self.total}"
+
+    class Meta:
+        db_table = "saque_diario"
+        constraints = [
+            models.UniqueConstraint(fields=["conta", "data"], name="saque_diario_conta_data_unico"),
+        ]
+
+
+class SaldoDiario(models.Model):
+    # Saldo da conta no fim do dia, gerado pelo comando gerar_saldos_diarios.
+
+    conta = models.ForeignKey(Conta, on_delete=models.CASCADE, db_index=False, related_name="saldos_diarios")
+    data = models.DateField()
+    saldo = models.DecimalField(max_digits=14, decimal_places=2)
+
+    def __str__(self):
+        return f"Saldo de {self.conta_id} em {self.data}: {self.saldo}"
+
+    class Meta:
+        db_table = "saldo_diario"
+        constraints = [
+            models.UniqueConstraint(fields=["conta", "data"], name="saldo_diario_conta_data_unico"),
+        ]
@@ -0,0 +1,82 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from .extrato import CENTAVO, FLUXOS, inicio_do_dia, saldo_antes
+from .models import Conta, Deposito, SaldoDiario, Saque, Transferencia
+
+
+def sql_movimentos():
+    # (conta_id, data_hora, valor com sinal) de todos os movimentos que afetam saldo.
+    deposito, saque, transferencia = (
+        connection.ops.quote_name(modelo._meta.db_table) for modelo in (Deposito, Saque, Transferencia)
+    )
+    return (
+        f'SELECT conta_id, data_hora, valor FROM {deposito} '
+        f"UNION ALL SELECT conta_id, data_hora, -valor FROM {saque} WHERE status_operacao = 'aprovado' "
+        f"UNION ALL SELECT origem_id, data_hora, -valor FROM {transferencia} WHERE status = 'concluida' "
+        f"UNION ALL SELECT destino_id, data_hora, valor FROM {transferencia} WHERE status = 'concluida'"
+    )
+
+
+def gerar_saldos(data):
+    """
+    Grava o saldo de fim de dia de ``data`` de todas as contas abertas até ali num único
+    INSERT ... SELECT. Contas com o saldo do dia anterior somam a ele os movimentos do dia
+    (lidos pelo índice BRIN de data_hora); as outras partem do saldo atual menos os movimentos
+    depois do fim do dia. Rodar de novo para a mesma data sobrescreve. Retorna as linhas gravadas.
+    """
+
+    movimentos = sql_movimentos()
+    saldos = connection.ops.quote_name(SaldoDiario._meta.db_table)
+    contas = connection.ops.quote_name(Conta._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {saldos} (conta_id, data, saldo) '
+            f'SELECT c.id, %(data)s, CASE WHEN anterior.id IS NULL '
+            f'THEN c.saldo - COALESCE((SELECT SUM(m.valor) FROM ({movimentos}) m '
+            f'WHERE m.conta_id = c.id AND m.data_hora >= %(fim)s), 0) '
+            f'ELSE anterior.saldo + COALESCE(dia.valor, 0) END '
+            f'FROM {contas} c '
+            f'LEFT JOIN {saldos} anterior ON anterior.conta_id = c.id AND anterior.data = %(anterior)s '
+            f'LEFT JOIN (SELECT m.conta_id, SUM(m.valor) AS valor FROM ({movimentos}) m '
+            f'WHERE m.data_hora >= %(inicio)s AND m.data_hora < %(fim)s GROUP BY m.conta_id) dia ON dia.conta_id = c.id '
+            f'WHERE c.data_abertura <= %(data)s '
+            f'ON CONFLICT (conta_id, data) DO UPDATE SET saldo = excluded.saldo',
+            {
+                'data': data,
+                'anterior': data - timedelta(days=1),
+                'inicio': inicio_do_dia(data),
+                'fim': inicio_do_dia(data + timedelta(days=1)),
+            },
+        )
+        return cursor.rowcount
+
+
+def variacao(conta_id, desde, ate):
+    total = Decimal('0')
+    for _, queryset, campo, sinal, _ in FLUXOS:
+        soma = queryset.filter(**{campo: conta_id}, data_hora__gte=desde, data_hora__lt=ate).aggregate(total=Sum('valor'))['total']
+        total += sinal * (soma or 0)
+    return total
+
+
+def saldo_em(conta_id, instante):
+    """
+    Saldo da conta em ``instante``: o saldo diário mais recente cujo fim de dia não passa do
+    instante, mais os movimentos entre os dois, que com os saldos em dia são no máximo um dia.
+    Sem saldo diário anterior, volta do saldo atual. Retorna (saldo, data do saldo diário usado).
+    """
+
+    referencia = (
+        SaldoDiario.objects.filter(conta_id=conta_id, data__lt=timezone.localdate(instante))
+        .order_by('-data').values_list('data', 'saldo').first()
+    )
+    if referencia is None:
+        return saldo_antes(conta_id, instante), None
+
+    data, saldo = referencia
+    return (saldo + variacao(conta_id, inicio_do_dia(data + timedelta(days=1)), instante)).quantize(CENTAVO), data
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from .models import Agencia, Cliente, Conta, Deposito, Saque, Transferencia
+from .lancamentos import ContaInvalida, depositar, sacar, transferir
+from .extrato import CursorInvalido, decodificar_cursor
 
 class AgenciaSerializer(serializers.ModelSerializer):
     class Meta:
@@ -11,23 +13,124 @@ class ClienteSerializer(serializers.ModelSerializer):
         model = Cliente
         fields = '__all__' 
 
-class ContaSerializer(serializers.ModelSerializer):
+class ReferenciasSerializer(serializers.ModelSerializer):
+    """
+    Aceita a referência pela chave estrangeira ou pelo código antigo (número da conta, código
+    da agência, CPF), para os clientes que ainda enviam só o código. ``referencias`` lista
+    ``(campo da FK, campo do código, atributo do código no modelo relacionado, resolver)``;
+    com ``resolver`` a FK é buscada pelo código aqui, senão fica para o lançamento.
+    """
+
+    referencias = ()
+
+    def validate(self, data):
+        data = super().validate(data)
+        for campo, codigo, atributo, resolver in self.referencias:
+            relacionado = data.get(campo)
+            if relacionado is not None:
+                if data.get(codigo, getattr(relacionado, atributo)) != getattr(relacionado, atributo):
+                    raise serializers.ValidationError({codigo: f'Não corresponde ao campo {campo}.'})
+                data[codigo] = getattr(relacionado, atributo)
+            elif data.get(codigo):
+                if resolver:
+                    modelo = self.Meta.model._meta.get_field(campo).related_model
+                    data[campo] = modelo.objects.filter(**{atributo: data[codigo]}).first()
+            elif self.instance is None:
+                raise serializers.ValidationError({codigo: f'Informe {codigo} ou {campo}.'})
+        return data
+
+class ContaSerializer(ReferenciasSerializer):
+    referencias = [
+        ('agencia', 'codigo_agencia', 'codigo', True),
+        ('titular', 'cpf_titular', 'cpf', True),
+    ]
+
     class Meta:
         model = Conta
         fields = '__all__' 
-        
-class DepositoSerializer(serializers.ModelSerializer):
+        # O saldo só muda por depósitos, saques e transferências.
+        read_only_fields = ['saldo']
+        extra_kwargs = {'codigo_agencia': {'required': False}, 'cpf_titular': {'required': False}}
+
+
+class OperacaoSerializer(ReferenciasSerializer):
+    # Função de backend/lancamentos.py que aplica a operação; definida em cada subclasse.
+    lancamento = None
+
+    def validate_valor(self, valor):
+        if valor <= 0:
+            raise serializers.ValidationError('O valor deve ser positivo.')
+        return valor
+
+    def create(self, validated_data):
+        try:
+            return self.lancamento(self.Meta.model(**validated_data))
+        except ContaInvalida as erro:
+            raise serializers.ValidationError(str(erro))
+
+class DepositoSerializer(OperacaoSerializer):
+    referencias = [('conta', 'numero_conta', 'numero', False)]
+    lancamento = staticmethod(depositar)
+
     class Meta:
         model = Deposito
         fields = '__all__' 
+        extra_kwargs = {'numero_conta': {'required': False}}
+
 
+class SaqueSerializer(OperacaoSerializer):
+    referencias = [('conta', 'numero_conta', 'numero', False)]
+    lancamento = staticmethod(sacar)
 
-class SaqueSerializer(serializers.ModelSerializer):
     class Meta:
         model = Saque
         fields = '__all__' 
+        read_only_fields = ['status_operacao']
+        extra_kwargs = {'numero_conta': {'required': False}}
+
+class TransferenciaSerializer(OperacaoSerializer):
+    referencias = [
+        ('origem', 'conta_origem', 'numero', False),
+        ('destino', 'conta_destino', 'numero', False),
+    ]
+    lancamento = staticmethod(transferir)
 
-class TransferenciaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transferencia
-        fields = '__all__' 
\ No newline at end of file
+        fields = '__all__' 
+        read_only_fields = ['status']
+        extra_kwargs = {'conta_origem': {'required': False}, 'conta_destino': {'required': False}}
+
+    def validate(self, data):
+        data = super().validate(data)
+        if data['conta_origem'] == data['conta_destino']:
+            raise serializers.ValidationError('A conta de destino deve ser diferente da de origem.')
+        return data
+
+
+class ExtratoSerializer(serializers.Serializer):
+    data_inicio = serializers.DateField(required=False)
+    data_fim = serializers.DateField(required=False)
+    cursor = serializers.CharField(required=False)
+    limite = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_cursor(self, cursor):
+        try:
+            return decodificar_cursor(cursor)
+        except CursorInvalido as erro:
+            raise serializers.ValidationError(str(erro))
+
+    def validate(self, data):
+        if data.get('data_inicio') and data.get('data_fim') and data['data_inicio'] > data['data_fim']:
+            raise serializers.ValidationError('data_inicio deve ser anterior a data_fim.')
+        return data
+
+
+class SaldoEmSerializer(serializers.Serializer):
+    data_hora = serializers.DateTimeField(required=False)
+    data = serializers.DateField(required=False, help_text='Saldo no fim do dia.')
+
+    def validate(self, data):
+        if 'data_hora' in data and 'data' in data:
+            raise serializers.ValidationError('Informe data_hora ou data, não os dois.')
+        return data
@@ -1,3 +1,68 @@
-from django.test import TestCase
+import threading
+import unittest
+from collections import Counter
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from .lancamentos import ContaInvalida, transferir
+from .management.commands.estressar_lancamentos import Command as EstressarLancamentos
+from .models import Conta, Transferencia
+
+
+class TransferenciaTests(TestCase):
+
+    def test_recusa_transferencia_para_a_mesma_conta(self):
+        conta = Conta.objects.create(
+            numero='0001-1', codigo_agencia='0001', cpf_titular='000.000.000-00', tipo='corrente', saldo=Decimal('100.00')
+        )
+        with self.assertRaises(ContaInvalida):
+            transferir(Transferencia(conta_origem=conta.numero, conta_destino=conta.numero, valor=Decimal('50.00'), tipo='interna'))
+
+        conta.refresh_from_db()
+        self.assertEqual(conta.saldo, Decimal('100.00'))
+        self.assertFalse(Transferencia.objects.exists())
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'As travas do motor de lançamentos só são exercitadas no PostgreSQL.')
+class LancamentosConcorrentesTests(TransactionTestCase):
+    """
+    Operações simultâneas em threads, cada uma com sua conexão, sobre poucas contas com saldo
+    baixo, para forçar disputa pelas mesmas linhas e recusas por saldo insuficiente.
+    """
+
+    THREADS = 8
+
+    def disparar(self, contas, operacoes, saldo_inicial):
+        comando = EstressarLancamentos()
+        numeros = comando.preparar(contas, saldo_inicial)
+        contagens = [Counter() for _ in range(self.THREADS)]
+        threads = [
+            threading.Thread(target=comando.trabalhar, args=(numeros, operacoes // self.THREADS, n, contagens[n]))
+            for n in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return comando, numeros, sum(contagens, Counter())
+
+    def verificar(self, comando, numeros, total):
+        # Deadlocks e outros erros de banco aparecem nas contagens como "erro <tipo>".
+        self.assertEqual({resultado: n for resultado, n in total.items() if resultado.startswith('erro')}, {})
+        self.assertFalse(Conta.objects.filter(numero__in=numeros, saldo__lt=0).exists())
+        # Saldos iguais à soma das operações registradas: nenhuma atualização perdida.
+        self.assertEqual(comando.conferir(numeros), [])
+
+    def test_muitas_contas(self):
+        comando, numeros, total = self.disparar(contas=20, operacoes=2000, saldo_inicial=Decimal('100.00'))
+        self.verificar(comando, numeros, total)
+        self.assertGreater(total['transferencia concluida'], 0)
+        self.assertGreater(total['transferencia falhou'], 0)
+
+    def test_duas_contas_em_sentidos_opostos(self):
+        # Transferências cruzadas entre as mesmas duas contas: o caso clássico de deadlock.
+        comando, numeros, total = self.disparar(contas=2, operacoes=800, saldo_inicial=Decimal('50.00'))
+        self.verificar(comando, numeros, total)
+        self.assertEqual(sum(total.values()), 800)
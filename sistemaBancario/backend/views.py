@@ -1,29 +1,96 @@
 from django.shortcuts import render
-from rest_framework import viewsets
+from datetime import timedelta
+
+from django.db.models import ProtectedError
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import mixins, serializers, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from .models import Agencia, Cliente, Conta, Deposito, Saque, Transferencia
 
-from .serializers import AgenciaSerializer, ClienteSerializer, ContaSerializer, DepositoSerializer, SaqueSerializer, TransferenciaSerializer
+from .extrato import inicio_do_dia, partes_extrato, periodo
+from .saldos import saldo_em
+from .serializers import AgenciaSerializer, ClienteSerializer, ContaSerializer, DepositoSerializer, ExtratoSerializer, SaldoEmSerializer, SaqueSerializer, TransferenciaSerializer
+
+class ExclusaoProtegidaMixin:
+
+    def perform_destroy(self, instance):
+        try:
+            instance.delete()
+        except ProtectedError:
+            raise serializers.ValidationError('Há registros vinculados; altere o status em vez de excluir.')
 
-class AgenciaViewSet(viewsets.ModelViewSet):
+class AgenciaViewSet(ExclusaoProtegidaMixin, viewsets.ModelViewSet):
     queryset = Agencia.objects.all()
     serializer_class = AgenciaSerializer 
 
-class ClienteViewSet(viewsets.ModelViewSet):
+class ClienteViewSet(ExclusaoProtegidaMixin, viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer 
 
-class ContaViewSet(viewsets.ModelViewSet):
+class ContaViewSet(ExclusaoProtegidaMixin, viewsets.ModelViewSet):
     queryset = Conta.objects.all()
     serializer_class = ContaSerializer 
 
-class DepositoViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def extrato(self, request, pk=None):
+        """
+        Depósitos, saques aprovados e transferências concluídas da conta em ordem de data_hora,
+        com o saldo após cada movimento. Filtros: data_inicio e data_fim (inclusivas); com
+        limite, a resposta traz em proximo o cursor da página seguinte. O JSON é enviado aos
+        pedaços enquanto os movimentos são lidos, então o período pode ser de anos.
+        """
+        conta = self.get_object()
+        parametros = ExtratoSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+        desde, ate = periodo(parametros.validated_data.get('data_inicio'), parametros.validated_data.get('data_fim'))
+
+        return StreamingHttpResponse(
+            partes_extrato(
+                conta.pk, desde, ate,
+                cursor=parametros.validated_data.get('cursor'),
+                limite=parametros.validated_data.get('limite'),
+            ),
+            content_type='application/json',
+        )
+
+    @action(detail=True, methods=['get'])
+    def saldo(self, request, pk=None):
+        """
+        Saldo da conta num instante passado (data_hora) ou no fim de um dia (data), a partir do
+        saldo diário mais próximo; sem parâmetros, o saldo atual.
+        """
+        conta = self.get_object()
+        parametros = SaldoEmSerializer(data=request.query_params)
+        parametros.is_valid(raise_exception=True)
+
+        if 'data' in parametros.validated_data:
+            instante = inicio_do_dia(parametros.validated_data['data'] + timedelta(days=1))
+        else:
+            instante = parametros.validated_data.get('data_hora', timezone.now())
+        saldo, referencia = saldo_em(conta.pk, instante)
+
+        return Response({
+            'conta': conta.pk,
+            'data_hora': instante,
+            'saldo': str(saldo),
+            'saldo_diario_base': referencia,
+        })
+
+
+# Operações já lançadas movimentaram saldo: só podem ser criadas e consultadas.
+class OperacaoViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    pass
+
+class DepositoViewSet(OperacaoViewSet):
     queryset = Deposito.objects.all()
     serializer_class = DepositoSerializer 
 
-class SaqueViewSet(viewsets.ModelViewSet):
+class SaqueViewSet(OperacaoViewSet):
     queryset = Saque.objects.all()
     serializer_class = SaqueSerializer 
 
-class TransferenciaViewSet(viewsets.ModelViewSet):
+class TransferenciaViewSet(OperacaoViewSet):
     queryset = Transferencia.objects.all()
     serializer_class = TransferenciaSerializer 